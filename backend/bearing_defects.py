@@ -0,0 +1,301 @@
+"""
+Bearing Defect Frequency Module
+Derives the characteristic defect frequencies (BPFO, BPFI, BSF, FTF) from
+the bearing geometry in config.py and the shaft speed of each bearing's
+operating condition (PHMDataProcessor.OPERATING_CONDITIONS), and matches
+their harmonics in envelope spectra.
+
+The search windows of all defects and harmonics are turned into one
+(targets, width) index matrix, so matching a block of files is a single
+gather and max over the stacked envelope spectra. Per file and channel the
+module stores `<defect>_amplitude` (sum of the harmonic peaks) and
+`<defect>_ratio` (that sum over harmonics times the median envelope
+spectrum level) in the feature store. Cepstral features measure the same
+families (and the shaft-rate sidebands) as peaks of the real cepstrum of
+the raw signal: `cepstrum_<family>` (summed rahmonics at 1 / frequency)
+and the dominant family `cepstrum_peak` / `cepstrum_peak_spacing`.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from backend.config import (
+        DEFAULT_SAMPLING_RATE, ENVELOPE_FILTER_LOWCUT, ENVELOPE_FILTER_HIGHCUT,
+        BEARING_ROLLING_ELEMENTS, BEARING_ROLLER_DIAMETER, BEARING_PITCH_DIAMETER,
+        BEARING_CONTACT_ANGLE, DEFECT_HARMONICS, DEFECT_FREQUENCY_TOLERANCE
+    )
+    from backend.cepstrum import cepstrum, detect_families, dominant_family, family_amplitudes
+    from backend.phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra, envelope_spectra
+    from backend.phm_processor import PHMDataProcessor
+except ModuleNotFoundError:
+    from config import (
+        DEFAULT_SAMPLING_RATE, ENVELOPE_FILTER_LOWCUT, ENVELOPE_FILTER_HIGHCUT,
+        BEARING_ROLLING_ELEMENTS, BEARING_ROLLER_DIAMETER, BEARING_PITCH_DIAMETER,
+        BEARING_CONTACT_ANGLE, DEFECT_HARMONICS, DEFECT_FREQUENCY_TOLERANCE
+    )
+    from cepstrum import cepstrum, detect_families, dominant_family, family_amplitudes
+    from phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra, envelope_spectra
+    from phm_processor import PHMDataProcessor
+
+
+DEFECTS = ('bpfo', 'bpfi', 'bsf', 'ftf')
+DEFECT_FEATURES = [f"{defect}_{kind}" for defect in DEFECTS for kind in ('amplitude', 'ratio')]
+# FTF 的倒頻率（約 0.08 s）超過 0.1 s 紀錄的一半，不列入
+CEPSTRUM_FAMILIES = ('shaft', 'bpfo', 'bpfi', 'bsf')
+CEPSTRUM_FEATURES = [f"cepstrum_{family}" for family in CEPSTRUM_FAMILIES] + ['cepstrum_peak', 'cepstrum_peak_spacing']
+
+
+def defect_frequencies(
+    speed_rpm: float,
+    rolling_elements: int = BEARING_ROLLING_ELEMENTS,
+    roller_diameter: float = BEARING_ROLLER_DIAMETER,
+    pitch_diameter: float = BEARING_PITCH_DIAMETER,
+    contact_angle: float = BEARING_CONTACT_ANGLE
+) -> Dict[str, float]:
+    """
+    Characteristic defect frequencies of a rolling bearing (stationary outer race).
+
+    Args:
+        speed_rpm: Shaft speed (rpm)
+        rolling_elements: Number of rolling elements
+        roller_diameter: Rolling element diameter (same unit as pitch_diameter)
+        pitch_diameter: Pitch diameter
+        contact_angle: Contact angle (degrees)
+
+    Returns:
+        {"shaft", "bpfo", "bpfi", "bsf", "ftf"} in Hz
+    """
+    shaft = speed_rpm / 60.0
+    ratio = roller_diameter / pitch_diameter * np.cos(np.radians(contact_angle))
+    return {
+        "shaft": shaft,
+        "bpfo": rolling_elements / 2 * shaft * (1 - ratio),
+        "bpfi": rolling_elements / 2 * shaft * (1 + ratio),
+        "bsf": pitch_diameter / (2 * roller_diameter) * shaft * (1 - ratio ** 2),
+        "ftf": shaft / 2 * (1 - ratio),
+    }
+
+
+def bearing_speed(bearing_name: str) -> float:
+    """
+    Shaft speed (rpm) of a bearing's operating condition.
+
+    Raises:
+        ValueError: If the bearing has no known operating condition
+    """
+    condition = PHMDataProcessor.OPERATING_CONDITIONS.get(bearing_name)
+    if condition is None:
+        raise ValueError(f"Unknown operating condition for {bearing_name}; pass speed_rpm")
+    return float(condition['speed'])
+
+
+class BearingDefectAnalyzer:
+    """Defect-frequency harmonic matching over (stacked) envelope spectra."""
+
+    def __init__(
+        self,
+        speed_rpm: float,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE,
+        harmonics: int = DEFECT_HARMONICS,
+        tolerance: float = DEFECT_FREQUENCY_TOLERANCE,
+        lowcut: float = ENVELOPE_FILTER_LOWCUT,
+        highcut: float = ENVELOPE_FILTER_HIGHCUT
+    ):
+        if not speed_rpm > 0:
+            raise ValueError("speed_rpm must be positive")
+        if harmonics < 1 or tolerance < 0:
+            raise ValueError("harmonics must be positive and tolerance non-negative")
+        self.speed_rpm = speed_rpm
+        self.sampling_rate = sampling_rate
+        self.harmonics = harmonics
+        self.tolerance = tolerance
+        self.lowcut = lowcut
+        self.highcut = highcut
+        self.frequencies = defect_frequencies(speed_rpm)
+        # 外環、內環與滾動體故障頻率皆超出包絡頻譜 (fs / 2) 時無可比對的諧波（僅剩 FTF）
+        if all(self.frequencies[defect] * (1 + tolerance) >= sampling_rate / 2 for defect in ('bpfo', 'bpfi', 'bsf')):
+            raise ValueError(
+                f"speed_rpm {speed_rpm:g} puts every race and rolling-element defect frequency above the "
+                f"envelope spectrum range (0-{sampling_rate / 2:g} Hz)"
+            )
+
+    @classmethod
+    def for_bearing(cls, bearing_name: str, speed_rpm: Optional[float] = None, **kwargs) -> "BearingDefectAnalyzer":
+        """Analyzer at the bearing's operating speed (or `speed_rpm`)."""
+        return cls(speed_rpm if speed_rpm is not None else bearing_speed(bearing_name), **kwargs)
+
+    def targets(self) -> np.ndarray:
+        """(n_defects, harmonics) array of harmonic frequencies, in DEFECTS order."""
+        base = np.array([self.frequencies[defect] for defect in DEFECTS])
+        return base[:, None] * np.arange(1, self.harmonics + 1)
+
+    def match(self, frequencies: np.ndarray, magnitude: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Largest envelope spectrum line within each harmonic's window.
+
+        The window of a harmonic at f is [f * (1 - tolerance), f * (1 + tolerance)],
+        widened to the neighbouring spectral lines.
+
+        Args:
+            frequencies: (n_bins,) evenly spaced frequencies starting at 0
+            magnitude: (n_files, n_bins) envelope spectra
+
+        Returns:
+            {"<defect>": (n_files, harmonics) peak amplitudes (NaN above the
+            spectrum), "<defect>_frequency": (n_files, harmonics) peak
+            frequencies, "floor": (n_files,) median spectrum level}
+        """
+        df = frequencies[1] - frequencies[0]
+        n_bins = len(frequencies)
+        targets = self.targets().ravel()
+        # 視窗不含 DC（包絡平均值）
+        low = np.maximum(np.floor(targets * (1 - self.tolerance) / df).astype(int), 1)
+        high = np.ceil(targets * (1 + self.tolerance) / df).astype(int)
+        width = int((high - low).max()) + 1
+
+        # (targets, width) 視窗索引矩陣，一次取出所有檔案的所有視窗
+        index = low[:, None] + np.arange(width)
+        valid = (index <= high[:, None]) & (index < n_bins)
+        window = np.where(valid, magnitude[:, np.clip(index, 0, n_bins - 1)], -np.inf)
+        best = np.argmax(window, axis=-1)
+        peak = np.take_along_axis(window, best[..., None], axis=-1)[..., 0]
+        peak_frequency = frequencies[np.clip(np.take_along_axis(index, best.T, axis=-1).T, 0, n_bins - 1)]
+        above = high >= n_bins
+        peak[:, above] = np.nan
+        peak_frequency[:, above] = np.nan
+
+        # 雜訊基準：至最高搜尋頻率為止（不含 DC）的中位數
+        limit = min(int(high.max()) + 1, n_bins)
+        floor = np.median(magnitude[:, 1:limit], axis=-1)
+
+        shape = (magnitude.shape[0], len(DEFECTS), self.harmonics)
+        peak = peak.reshape(shape)
+        peak_frequency = peak_frequency.reshape(shape)
+        result = {"floor": floor}
+        for i, defect in enumerate(DEFECTS):
+            result[defect] = peak[:, i]
+            result[f"{defect}_frequency"] = peak_frequency[:, i]
+        return result
+
+    def spectra(self, x: np.ndarray):
+        """Envelope spectra of stacked signals with the analyzer's band."""
+        return envelope_spectra(x, self.sampling_rate, self.lowcut, self.highcut)
+
+    @staticmethod
+    def summarize(matched: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Stored features ({name: (n_files,)} for DEFECT_FEATURES) from match()."""
+        features = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for defect in DEFECTS:
+                amplitude = np.nansum(matched[defect], axis=-1)
+                counted = np.sum(np.isfinite(matched[defect]), axis=-1)
+                features[f"{defect}_amplitude"] = amplitude
+                features[f"{defect}_ratio"] = amplitude / (counted * matched["floor"])
+        return features
+
+    def features(self, x: np.ndarray) -> Dict[str, np.ndarray]:
+        """Stored defect features of stacked signals (n_files, n_samples) of one channel."""
+        return self.summarize(self.match(*self.spectra(x)))
+
+    def file_report(self, horizontal: np.ndarray, vertical: np.ndarray) -> Dict:
+        """Per-harmonic matches of one file's two channels (for display)."""
+        matched = self.match(*self.spectra(np.stack([horizontal, vertical])))
+        features = self.summarize(matched)
+        report = {}
+        for index, channel in enumerate(('horizontal', 'vertical')):
+            report[channel] = {
+                defect: {
+                    "harmonic_frequencies": _floats(matched[f"{defect}_frequency"][index]),
+                    "harmonic_amplitudes": _floats(matched[defect][index]),
+                    "amplitude": float(features[f"{defect}_amplitude"][index]),
+                    "ratio": _float(features[f"{defect}_ratio"][index]),
+                }
+                for defect in DEFECTS
+            }
+            report[channel]["noise_floor"] = float(matched["floor"][index])
+        return report
+
+    def cepstral_features(self, x: np.ndarray) -> Dict[str, np.ndarray]:
+        """Stored cepstral features ({name: (n_files,)} for CEPSTRUM_FEATURES) of one channel."""
+        return self._cepstral_features(cepstrum(x))
+
+    def _cepstral_features(self, c: np.ndarray) -> Dict[str, np.ndarray]:
+        spacings = [self.frequencies[family] for family in CEPSTRUM_FAMILIES]
+        amplitudes = family_amplitudes(c, self.sampling_rate, spacings, self.tolerance)
+        features = {f"cepstrum_{family}": amplitudes[..., i] for i, family in enumerate(CEPSTRUM_FAMILIES)}
+        features['cepstrum_peak'], features['cepstrum_peak_spacing'] = dominant_family(c, self.sampling_rate)
+        return features
+
+    def cepstrum_report(self, horizontal: np.ndarray, vertical: np.ndarray, max_families: int = 5) -> Dict:
+        """Cepstral features and detected families of one file's two channels (for display)."""
+        c = cepstrum(np.stack([horizontal, vertical]))
+        features = self._cepstral_features(c)
+        report = {}
+        for index, channel in enumerate(('horizontal', 'vertical')):
+            report[channel] = {
+                "features": {name: _float(value[index]) for name, value in features.items()},
+                "families": detect_families(
+                    c[index], self.sampling_rate, max_families=max_families,
+                    known=self.frequencies, tolerance=self.tolerance
+                ),
+            }
+        return report
+
+    def _stored_trend(self, names, compute, bearing_name, start, end, stride, max_files, persist, db_path, block_size):
+        spectra = PHMBatchSpectra(db_path, sampling_rate=self.sampling_rate)
+        trend = spectra.stored_feature_trend(
+            bearing_name, names, compute,
+            start, end, stride, max_files, persist, block_size
+        )
+        if trend is not None:
+            trend["speed_rpm"] = self.speed_rpm
+            trend["defect_frequencies"] = self.frequencies
+        return trend
+
+    def trend(
+        self,
+        bearing_name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        persist: bool = True,
+        db_path: str = None,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Defect features of every selected file, read from the feature store
+        where present and otherwise computed in stacked blocks (see
+        PHMBatchSpectra.stored_feature_trend).
+        """
+        return self._stored_trend(
+            DEFECT_FEATURES, self.features,
+            bearing_name, start, end, stride, max_files, persist, db_path, block_size
+        )
+
+    def cepstrum_trend(
+        self,
+        bearing_name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        persist: bool = True,
+        db_path: str = None,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """Cepstral features of every selected file, backed by the feature store like trend()."""
+        return self._stored_trend(
+            CEPSTRUM_FEATURES, self.cepstral_features,
+            bearing_name, start, end, stride, max_files, persist, db_path, block_size
+        )
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+
+def _floats(values: np.ndarray) -> List[Optional[float]]:
+    return [_float(value) for value in values]
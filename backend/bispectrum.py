@@ -0,0 +1,139 @@
+"""
+Bispectrum Module
+Segment-averaged bispectrum and bicoherence (direct FFT method).
+
+    B(f1, f2) = E[X(f1) X(f2) X*(f1 + f2)]
+    b^2(f1, f2) = |B|^2 / (E[|X(f1) X(f2)|^2] E[|X(f1 + f2)|^2])
+
+Bicoherence measures quadratic phase coupling: frequencies generated by
+a nonlinearity (e.g. modulation of a defect frequency by the shaft) keep a
+fixed phase relation to their parents, while independent components
+average out over segments.
+
+Segments are the shared Welch segments of cross_spectral (one rfft for all
+segments of both channels). The map is only evaluated on the principal
+domain (f2 <= f1, f1 + f2 <= fs / 2) and on a frequency grid cropped to
+[f_min, f_max] and decimated to at most `max_bins` lines per axis, so the
+triple product is one gather over (segments, grid pairs), accumulated in
+chunks of segments to bound memory.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+try:
+    from backend.config import DEFAULT_SAMPLING_RATE, BISPECTRUM_NFFT, BISPECTRUM_MAX_BINS
+    from backend.cross_spectral import CrossSpectralAnalyzer
+except ModuleNotFoundError:
+    from config import DEFAULT_SAMPLING_RATE, BISPECTRUM_NFFT, BISPECTRUM_MAX_BINS
+    from cross_spectral import CrossSpectralAnalyzer
+
+SEGMENT_CHUNK = 256  # 每次累加的分段數（限制 (segments, pairs) 暫存陣列大小）
+
+
+class BispectrumAnalyzer:
+    """Bispectrum / bicoherence of (stacked) signals on a decimated principal domain."""
+
+    def __init__(
+        self,
+        fs: float = DEFAULT_SAMPLING_RATE,
+        nfft: int = BISPECTRUM_NFFT,
+        noverlap: Optional[int] = None,
+        window: str = 'hann'
+    ):
+        self.segmenter = CrossSpectralAnalyzer(fs, nfft, noverlap, window)
+        self.fs = fs
+        self.nfft = nfft
+        self.noverlap = self.segmenter.noverlap
+
+    def grid(self, f_min: float = 0.0, f_max: Optional[float] = None, max_bins: int = BISPECTRUM_MAX_BINS) -> np.ndarray:
+        """
+        FFT bin indices of the output axes.
+
+        Bins cover [f_min, f_max] without DC and are decimated by an integer
+        step to at most `max_bins` lines.
+
+        Raises:
+            ValueError: If the range holds no frequency bins
+        """
+        if max_bins < 1:
+            raise ValueError("max_bins must be positive")
+        df = self.fs / self.nfft
+        # f1 + f2 <= fs/2 且 f2 >= 1 bin，故 f1 最多到 nfft/2 - 1
+        low = max(int(np.ceil(f_min / df)), 1)
+        high = self.nfft // 2 - 1 if f_max is None else min(int(np.floor(f_max / df)), self.nfft // 2 - 1)
+        if high < low:
+            raise ValueError(f"Frequency range [{f_min}, {f_max}] Hz holds no bins at nfft={self.nfft}")
+        step = int(np.ceil((high - low + 1) / max_bins))
+        return np.arange(low, high + 1, step)
+
+    def compute(
+        self,
+        x: np.ndarray,
+        f_min: float = 0.0,
+        f_max: Optional[float] = None,
+        max_bins: int = BISPECTRUM_MAX_BINS
+    ) -> Dict[str, np.ndarray]:
+        """
+        Bispectrum magnitude and bicoherence of each signal.
+
+        Args:
+            x: Signal (n_samples,) or stacked signals (..., n_samples)
+
+        Returns:
+            {"frequencies" (n,), "bispectrum" (..., n, n), "bicoherence"
+            (..., n, n), "segments"}; rows are f2, columns f1, and cells
+            outside the principal domain are NaN
+
+        Raises:
+            ValueError: If the cropped grid has no principal-domain cells
+        """
+        grid = self.grid(f_min, f_max, max_bins)
+        k1, k2 = np.meshgrid(grid, grid)
+        domain = (k2 <= k1) & (k1 + k2 <= self.nfft // 2)
+        if not domain.any():
+            raise ValueError(f"Frequency range [{f_min}, {f_max}] Hz lies outside the principal domain (f1 + f2 <= fs / 2)")
+        first, second = k1[domain], k2[domain]
+        total = first + second
+
+        spectra = self.segmenter.segment_spectra(x)
+        lead = spectra.shape[:-2]
+        n_segments = spectra.shape[-2]
+        triple = np.zeros(lead + (len(first),), dtype=complex)
+        pair_power = np.zeros(lead + (len(first),))
+        sum_power = np.zeros(lead + (len(first),))
+        for begin in range(0, n_segments, SEGMENT_CHUNK):
+            chunk = spectra[..., begin:begin + SEGMENT_CHUNK, :]
+            product = chunk[..., first] * chunk[..., second]
+            combined = chunk[..., total]
+            triple += np.sum(product * np.conj(combined), axis=-2)
+            pair_power += np.sum(np.abs(product) ** 2, axis=-2)
+            sum_power += np.sum(np.abs(combined) ** 2, axis=-2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bicoherence = np.abs(triple) ** 2 / (pair_power * sum_power)
+        bicoherence = np.where(np.isfinite(bicoherence), bicoherence, 0.0)
+
+        shape = lead + domain.shape
+        bispectrum_map = np.full(shape, np.nan)
+        bicoherence_map = np.full(shape, np.nan)
+        bispectrum_map[..., domain] = np.abs(triple) / n_segments
+        bicoherence_map[..., domain] = bicoherence
+        return {
+            "frequencies": grid * self.fs / self.nfft,
+            "bispectrum": bispectrum_map,
+            "bicoherence": bicoherence_map,
+            "segments": n_segments,
+        }
+
+    @staticmethod
+    def peak(frequencies: np.ndarray, bicoherence: np.ndarray) -> Dict[str, float]:
+        """Largest bicoherence of one map and its (f1, f2)."""
+        row, column = np.unravel_index(np.nanargmax(bicoherence), bicoherence.shape)
+        return {
+            "f1": float(frequencies[column]),
+            "f2": float(frequencies[row]),
+            "bicoherence": float(bicoherence[row, column]),
+            "mean_bicoherence": float(np.nanmean(bicoherence)),
+        }
@@ -0,0 +1,299 @@
+"""
+Cepstrum Module
+Real / power cepstra, liftering and quefrency-peak detection of harmonic
+families and sideband spacings.
+
+A family of spectral lines spaced Δf apart (harmonics of a shaft or gear
+frequency, or sidebands around a carrier) is a periodic ripple of the log
+spectrum, so it collapses into one cepstral peak at quefrency 1 / Δf (and
+its rahmonics at k / Δf). One rfft / irfft pair per signal therefore
+replaces a search for the individual lines:
+
+    real cepstrum   c = irfft(log |X|)
+    power cepstrum  |irfft(log |X|^2)|^2 = 4 c^2
+
+All functions work along the last axis of stacked signals. Quefrency
+windows are gathered with one index matrix, as in bearing_defects.
+`harmonic_family_sum` is the cepstral alternative to the per-multiple
+search of HarmonicSildband.Harmonic / Sildband used by the FM0 features.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import CEPSTRUM_MIN_SPACING, CEPSTRUM_MAX_SPACING, CEPSTRUM_RAHMONICS
+except ModuleNotFoundError:
+    from config import CEPSTRUM_MIN_SPACING, CEPSTRUM_MAX_SPACING, CEPSTRUM_RAHMONICS
+
+CEPSTRUM_KINDS = ('real', 'power')
+
+
+def cepstrum(x: np.ndarray, kind: str = 'real') -> np.ndarray:
+    """
+    Cepstrum of each signal (Hann window, mean removed).
+
+    Args:
+        x: Signal (n_samples,) or stacked signals (..., n_samples)
+        kind: 'real' or 'power'
+
+    Returns:
+        (..., n_samples) cepstrum; sample k is quefrency k / fs
+    """
+    if kind not in CEPSTRUM_KINDS:
+        raise ValueError(f"Unknown cepstrum kind: {kind}")
+    x = np.asarray(x, dtype=float)
+    n = x.shape[-1]
+    magnitude = np.abs(np.fft.rfft((x - x.mean(axis=-1, keepdims=True)) * np.hanning(n), axis=-1))
+    # 以各訊號最大值的 1e-12 為下限，避免 log(0)
+    floor = np.maximum(magnitude.max(axis=-1, keepdims=True) * 1e-12, np.finfo(float).tiny)
+    real = np.fft.irfft(np.log(np.maximum(magnitude, floor)), n=n, axis=-1)
+    return real if kind == 'real' else 4 * real ** 2
+
+
+def quefrencies(n_samples: int, fs: float) -> np.ndarray:
+    """Quefrency axis (s) of the first half of an n-sample cepstrum."""
+    return np.arange(n_samples // 2 + 1) / fs
+
+
+def lifter(c: np.ndarray, fs: float, cutoff: float, mode: str = 'low') -> np.ndarray:
+    """
+    Liftered cepstrum.
+
+    Args:
+        c: (..., n) real cepstra
+        cutoff: Quefrency (s) separating the two parts
+        mode: 'low' keeps quefrencies below the cutoff (smoothed spectral
+            envelope); 'high' keeps the rest (harmonic families)
+    """
+    if mode not in ('low', 'high'):
+        raise ValueError(f"Unknown lifter mode: {mode}")
+    n = c.shape[-1]
+    k = np.arange(n)
+    low = np.minimum(k, n - k) < cutoff * fs  # 倒頻譜對稱，兩端皆為低倒頻率
+    return c * (low if mode == 'low' else ~low)
+
+
+def log_spectrum(c: np.ndarray) -> np.ndarray:
+    """Log-amplitude spectrum (..., n // 2 + 1) of a (liftered) real cepstrum."""
+    return np.fft.rfft(c, axis=-1).real
+
+
+def family_amplitudes(
+    c: np.ndarray,
+    fs: float,
+    spacings: Sequence[float],
+    tolerance: float,
+    rahmonics: int = CEPSTRUM_RAHMONICS
+) -> np.ndarray:
+    """
+    Cepstral amplitude of harmonic families with known spacings.
+
+    For each spacing Δf, the largest cepstrum value within the quefrency
+    window of k / (Δf (1 ± tolerance)) is taken for k = 1 .. rahmonics and
+    summed over the rahmonics below n / 2.
+
+    Args:
+        c: (..., n) cepstra
+        spacings: Family spacings (Hz)
+
+    Returns:
+        (..., len(spacings)) array; NaN when no rahmonic fits the record
+
+    Raises:
+        ValueError: If a spacing is not positive
+    """
+    n = c.shape[-1]
+    spacings = np.asarray(spacings, dtype=float)
+    if not np.all(spacings > 0):
+        raise ValueError("Family spacings must be positive")
+    k = np.arange(1, rahmonics + 1)
+    centers = (k[None, :] * fs / spacings[:, None]).ravel()  # (families * rahmonics,) 樣本
+    low = np.floor(centers / (1 + tolerance)).astype(int)
+    high = np.ceil(centers / (1 - tolerance)).astype(int)
+    width = int((high - low).max()) + 1
+
+    index = low[:, None] + np.arange(width)
+    valid = (index <= high[:, None]) & (index <= n // 2)
+    window = np.where(valid, c[..., np.clip(index, 0, n - 1)], -np.inf)
+    peaks = window.max(axis=-1)
+    peaks = np.where(high <= n // 2, peaks, np.nan)
+    peaks = peaks.reshape(c.shape[:-1] + (len(spacings), rahmonics))
+    with np.errstate(invalid='ignore'):
+        total = np.nansum(peaks, axis=-1)
+    return np.where(np.isfinite(peaks).any(axis=-1), total, np.nan)
+
+
+def _quefrency_range(n: int, fs: float, min_spacing: float, max_spacing: float) -> Tuple[int, int]:
+    """Cepstrum sample range [low, high] of spacings in [min_spacing, max_spacing]."""
+    low = max(int(np.ceil(fs / max_spacing)), 1)
+    high = min(int(np.floor(fs / min_spacing)), n // 2)
+    if high < low:
+        raise ValueError(f"Spacings [{min_spacing}, {max_spacing}] Hz do not fit a {n}-sample record")
+    return low, high
+
+
+def dominant_family(
+    c: np.ndarray,
+    fs: float,
+    min_spacing: float = CEPSTRUM_MIN_SPACING,
+    max_spacing: float = CEPSTRUM_MAX_SPACING
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest cepstral peak with spacing in [min_spacing, max_spacing].
+
+    Returns:
+        (amplitude (...,), spacing in Hz (...,))
+    """
+    low, high = _quefrency_range(c.shape[-1], fs, min_spacing, max_spacing)
+    window = c[..., low:high + 1]
+    best = np.argmax(window, axis=-1)
+    amplitude = np.take_along_axis(window, best[..., None], axis=-1)[..., 0]
+    return amplitude, fs / (low + best)
+
+
+def _refine(c: np.ndarray, index: int) -> float:
+    """Sub-sample peak position by parabolic interpolation."""
+    if index < 1 or index >= len(c) - 1:
+        return float(index)
+    left, center, right = c[index - 1], c[index], c[index + 1]
+    denominator = left - 2 * center + right
+    return float(index) if denominator >= 0 else index + 0.5 * (left - right) / denominator
+
+
+def detect_families(
+    c: np.ndarray,
+    fs: float,
+    min_spacing: float = CEPSTRUM_MIN_SPACING,
+    max_spacing: float = CEPSTRUM_MAX_SPACING,
+    max_families: int = 5,
+    rahmonics: int = CEPSTRUM_RAHMONICS,
+    known: Optional[Dict[str, float]] = None,
+    tolerance: float = 0.02
+) -> List[Dict]:
+    """
+    Harmonic families / sideband spacings of one signal from its cepstrum.
+
+    Peaks in the quefrency range of [min_spacing, max_spacing] are ranked
+    by prominence, skipping rahmonics of stronger families; each family
+    reports its rahmonic amplitudes (largest value within ±1 sample of
+    k * quefrency).
+
+    Args:
+        c: (n,) real cepstrum
+        known: {name: frequency in Hz} to label families whose spacing is
+            within ± tolerance of a known frequency
+
+    Returns:
+        Families by decreasing prominence: {"quefrency" (s), "spacing" (Hz),
+        "amplitude", "prominence", "rahmonics": [...], "match"}
+    """
+    n = len(c)
+    low, high = _quefrency_range(n, fs, min_spacing, max_spacing)
+    peaks, properties = scipy_signal.find_peaks(c[low - 1:high + 2], prominence=0)
+    peaks = peaks + low - 1
+    keep = (peaks >= low) & (peaks <= high)
+    peaks, prominences = peaks[keep], properties["prominences"][keep]
+    order = np.argsort(prominences)[::-1]
+
+    families = []
+    accepted: List[float] = []
+    for i in order:
+        if len(families) >= max_families:
+            break
+        position = _refine(c, int(peaks[i]))
+        # 已接受諧波族的 rahmonic（k >= 2 倍倒頻率）不另列為諧波族
+        if any(round(position / q) >= 2 and abs(position - round(position / q) * q) <= 1.5 for q in accepted):
+            continue
+        accepted.append(position)
+        # 各次 rahmonic 的 ±1 樣本視窗一次取出
+        centers = np.round(position * np.arange(1, rahmonics + 1)).astype(int)
+        index = centers[:, None] + np.arange(-1, 2)
+        rahmonic = np.where(centers <= n // 2, c[np.clip(index, 0, n - 1)].max(axis=-1), np.nan)
+        spacing = fs / position
+        match = None
+        if known:
+            name, frequency = min(known.items(), key=lambda item: abs(item[1] - spacing))
+            if abs(frequency - spacing) <= tolerance * frequency:
+                match = name
+        families.append({
+            "quefrency": position / fs,
+            "spacing": spacing,
+            "amplitude": float(c[peaks[i]]),
+            "prominence": float(prominences[i]),
+            "rahmonics": [float(value) if np.isfinite(value) else None for value in rahmonic],
+            "match": match,
+        })
+    return families
+
+
+def harmonic_family_sum(
+    amp: np.ndarray,
+    fs: float,
+    spacing: float,
+    multiples: Sequence[float],
+    harmonic_range: float,
+    tolerance: float = 0.05
+) -> Tuple[float, float]:
+    """
+    Sum of the largest spectral lines at multiples of a family spacing.
+
+    The spacing is located as the cepstral peak within ± tolerance of the
+    nominal `spacing`, refined on a comb of candidate spacings (one gather
+    of all candidates and multiples), and the amplitude spectrum
+    (|X| * 2 / N, as FrequencyDomain.fft_process) is then searched within
+    ± harmonic_range (at least the neighbouring lines) of every multiple in
+    one gather. Cepstral counterpart of HarmonicSildband.Harmonic /
+    Sildband.
+
+    Args:
+        amp: Signal
+        spacing: Nominal family spacing (Hz)
+        multiples: Multiples of the spacing to sum (may be fractional)
+        harmonic_range: Half-width of each search window (Hz)
+
+    Returns:
+        (sum of the peaks, located spacing in Hz)
+
+    Raises:
+        ValueError: If the spacing is not positive
+    """
+    if not spacing > 0:
+        raise ValueError("Family spacing must be positive")
+    amp = np.asarray(amp, dtype=float)
+    n = len(amp)
+    df = fs / n
+    amplitudes = np.abs(np.fft.rfft(amp)) * 2 / n
+    multiples = np.asarray(multiples, dtype=float)
+
+    # 倒頻譜定位間距（超出紀錄長度時沿用標稱值）
+    c = cepstrum(amp)
+    low = int(np.floor(fs / (spacing * (1 + tolerance))))
+    high = int(np.ceil(fs / (spacing * (1 - tolerance))))
+    located = spacing
+    step = 0.0
+    if 1 <= low and high <= n // 2:
+        position = _refine(c, low + int(np.argmax(c[low:high + 1])))
+        located = fs / position
+        step = located / position  # 一個倒頻率樣本對應的間距誤差
+
+    # 梳狀細化：候選間距 × 倍數一次取出，取總和最大者
+    if step > 0:
+        resolution = df / (2 * multiples.max())
+        candidates = located + np.arange(-step, step + resolution, resolution)
+        bins = np.round(candidates[:, None] * multiples / df).astype(int)
+        comb = np.where(bins <= n // 2, amplitudes[np.clip(bins, 0, n // 2)], 0.0).sum(axis=-1)
+        located = float(candidates[np.argmax(comb)])
+
+    centers = located * multiples
+    first = np.floor((centers - harmonic_range) / df).astype(int)
+    last = np.ceil((centers + harmonic_range) / df).astype(int)
+    inside = last <= n // 2
+    if not inside.any():
+        return 0.0, located
+    first, last = np.maximum(first[inside], 0), last[inside]
+    index = first[:, None] + np.arange(int((last - first).max()) + 1)
+    window = np.where(index <= last[:, None], amplitudes[np.clip(index, 0, n // 2)], -np.inf)
+    return float(window.max(axis=-1).sum()), located
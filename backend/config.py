@@ -9,7 +9,7 @@ from pathlib import Path
 BACKEND_DIR = Path(__file__).parent.absolute()
 
 # PHM 資料庫路徑 (全域變數)
-PHM_DATABASE_PATH = os.path.join(BACKEND_DIR, "phm_data.db")
+PHM_DATABASE_PATH = os.environ.get("PHM_DATABASE_PATH", os.path.join(BACKEND_DIR, "phm_data.db"))
 PHM_TEMPERATURE_DATABASE_PATH = os.path.join(BACKEND_DIR, "phm_temperature_data.db")
 
 # 其他可能的配置
@@ -33,6 +33,35 @@ DEFAULT_SAMPLING_RATE = 25600  # Hz
 ENVELOPE_FILTER_LOWCUT = 4000  # Hz
 ENVELOPE_FILTER_HIGHCUT = 10000  # Hz
 
+# 頻帶能量趨勢的預設頻帶 (Hz)
+BAND_ENERGY_BANDS = [(0, 1000), (1000, 5000), (5000, 10000), (10000, 12800)]
+
+# 軸承幾何 (PRONOSTIA 測試台 NSK 6804DD)，用於計算 BPFO/BPFI/BSF/FTF
+BEARING_ROLLING_ELEMENTS = 13
+BEARING_ROLLER_DIAMETER = 3.5  # mm
+BEARING_PITCH_DIAMETER = 25.6  # mm
+BEARING_CONTACT_ANGLE = 0.0  # 度
+DEFECT_HARMONICS = 3  # 每個故障頻率比對的諧波數
+DEFECT_FREQUENCY_TOLERANCE = 0.02  # 諧波搜尋視窗 ±2%（轉速滑差）
+
+# 階次追蹤 (角度域重取樣)
+ORDER_SAMPLES_PER_REVOLUTION = 1024  # 每轉取樣點數 (>= fs / 轉頻時不需抗混疊濾波)
+ORDER_RESOLUTION = 0.25  # 階次頻譜解析度 (各轉速共用同一階次軸)
+# 無操作條件的軸承 (如即時匯入的軸承) 計算 TSA 時使用的轉速 (rpm，預設操作條件 1)
+TSA_DEFAULT_SPEED_RPM = float(os.environ.get("TSA_DEFAULT_SPEED_RPM", "1800"))
+
+# Welch 交叉頻譜 / 水平-垂直通道相干性
+WELCH_NPERSEG = 256  # 每段點數 (2,560 點紀錄 → 19 段 50% 重疊，解析度 100 Hz)
+
+# 雙頻譜 / 雙相干性 (高階頻譜)
+BISPECTRUM_NFFT = 256  # 每段點數 (50% 重疊)
+BISPECTRUM_MAX_BINS = 64  # 輸出每軸最多頻率線數 (超過時以整數步距抽取)
+
+# 倒頻譜 (諧波族 / 邊帶間距偵測)
+CEPSTRUM_MIN_SPACING = 20  # Hz，最小偵測間距 (倒頻率 50 ms)
+CEPSTRUM_MAX_SPACING = 2000  # Hz，最大偵測間距 (更低倒頻率屬頻譜包絡)
+CEPSTRUM_RAHMONICS = 3  # 每個諧波族累加的 rahmonic 數
+
 # 資料點顯示限制
 SIGNAL_DISPLAY_LIMIT = 1000  # 前端顯示的最大資料點數
 SPECTRUM_DISPLAY_LIMIT = 1000  # 頻譜顯示的最大資料點數
@@ -42,6 +71,24 @@ ENVELOPE_SPECTRUM_DISPLAY_LIMIT = 500  # 包絡頻譜顯示的最大資料點數
 PHM_DATA_DIR = os.path.join(Path(__file__).parent.parent, "phm-ieee-2012-data-challenge-dataset")
 PHM_RESULTS_DIR = os.path.join(Path(__file__).parent.parent, "phm_analysis_results")
 
+# 即時擷取匯入配置
+PHM_ACQUISITION_SAMPLES = 2560  # 每次擷取的樣本數 (0.1 秒 @ 25.6 kHz)
+PHM_INGEST_WATCH_DIR = os.environ.get("PHM_INGEST_WATCH_DIR")  # 設定後 API 啟動時監看此目錄
+PHM_INGEST_POLL_INTERVAL = float(os.environ.get("PHM_INGEST_POLL_INTERVAL", "5"))  # 秒
+
+# 背景工作佇列配置
+PHM_JOB_WORKERS = int(os.environ.get("PHM_JOB_WORKERS", "0"))  # API 行程內的工作行程數，預設 0 (以 python phm_jobs.py 獨立執行)
+PHM_JOB_POLL_INTERVAL = float(os.environ.get("PHM_JOB_POLL_INTERVAL", "1"))  # 秒
+PHM_JOB_LEASE_TIMEOUT = float(os.environ.get("PHM_JOB_LEASE_TIMEOUT", "60"))  # 秒；執行中工作超過此時間未更新心跳即重新排入佇列
+
+# 單一請求效能剖析 (?profile=1)
+PHM_PROFILING_ENABLED = os.environ.get("PHM_PROFILING_ENABLED", "0").lower() in ("1", "true", "yes")  # 預設關閉
+PHM_PROFILE_DIR = os.environ.get("PHM_PROFILE_DIR", os.path.join(BACKEND_DIR, "profiles"))
+PHM_PROFILE_INTERVAL = float(os.environ.get("PHM_PROFILE_INTERVAL", "0.001"))  # 取樣間隔秒數
+
+# 特徵庫匯出 (Parquet / Arrow)
+PHM_FEATURE_EXPORT_DIR = os.environ.get("PHM_FEATURE_EXPORT_DIR", os.path.join(Path(__file__).parent.parent, "features"))
+
 def get_phm_db_path() -> str:
     """獲取 PHM 振動資料庫路徑"""
     return PHM_DATABASE_PATH
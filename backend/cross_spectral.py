@@ -0,0 +1,198 @@
+"""
+Cross-Spectral Module
+Welch power spectral densities of the horizontal and vertical channels,
+their cross-spectral density and the magnitude-squared coherence, from one
+set of windowed segments.
+
+Both channels (and any number of files) are stacked, split into
+overlapping segments with a strided view, detrended, windowed and
+transformed with one rfft; Pxx, Pyy and Pxy are then segment means of
+|X|^2, |Y|^2 and conj(X) * Y. The conventions follow scipy.signal.welch /
+csd / coherence (constant detrend, density scaling, one-sided, mean
+average), so results match scipy while each channel is transformed once.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import DEFAULT_SAMPLING_RATE, WELCH_NPERSEG
+    from backend.phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra
+    from backend.phm_metrics import stage
+except ModuleNotFoundError:
+    from config import DEFAULT_SAMPLING_RATE, WELCH_NPERSEG
+    from phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra
+    from phm_metrics import stage
+
+
+@lru_cache(maxsize=16)
+def _window(name: str, nperseg: int) -> np.ndarray:
+    window = scipy_signal.get_window(name, nperseg)
+    window.flags.writeable = False
+    return window
+
+
+class CrossSpectralAnalyzer:
+    """Welch PSD / CSD / coherence of paired channels."""
+
+    def __init__(
+        self,
+        fs: float = DEFAULT_SAMPLING_RATE,
+        nperseg: int = WELCH_NPERSEG,
+        noverlap: Optional[int] = None,
+        window: str = 'hann'
+    ):
+        noverlap = nperseg // 2 if noverlap is None else noverlap
+        if nperseg < 2 or not 0 <= noverlap < nperseg:
+            raise ValueError("nperseg must be >= 2 and 0 <= noverlap < nperseg")
+        self.fs = fs
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.window = window
+
+    def segment_spectra(self, x: np.ndarray) -> np.ndarray:
+        """
+        Spectra of the detrended, windowed segments.
+
+        Args:
+            x: (..., n_samples) signals
+
+        Returns:
+            (..., n_segments, nperseg // 2 + 1) complex array
+        """
+        x = np.asarray(x, dtype=float)
+        if x.shape[-1] < self.nperseg:
+            raise ValueError(f"Signal ({x.shape[-1]} samples) is shorter than nperseg ({self.nperseg})")
+        segments = sliding_window_view(x, self.nperseg, axis=-1)[..., ::self.nperseg - self.noverlap, :]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        return np.fft.rfft(segments * _window(self.window, self.nperseg), axis=-1)
+
+    def _scale(self) -> np.ndarray:
+        """Density scaling of |X|^2 for the one-sided spectrum."""
+        window = _window(self.window, self.nperseg)
+        scale = np.full(self.nperseg // 2 + 1, 2.0 / (self.fs * np.sum(window ** 2)))
+        scale[0] /= 2
+        if self.nperseg % 2 == 0:
+            scale[-1] /= 2
+        return scale
+
+    def frequencies(self) -> np.ndarray:
+        return np.fft.rfftfreq(self.nperseg, 1.0 / self.fs)
+
+    def analyze(self, horizontal: np.ndarray, vertical: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        PSDs, CSD and coherence of paired signals.
+
+        Args:
+            horizontal: (..., n_samples) signals
+            vertical: Signals of the same shape
+
+        Returns:
+            {"frequencies", "psd_horizontal", "psd_vertical", "csd" (complex),
+            "coherence"}; spectra have shape (..., nperseg // 2 + 1)
+        """
+        spectra = self.segment_spectra(np.stack([horizontal, vertical]))
+        h, v = spectra[0], spectra[1]
+        scale = self._scale()
+        psd_h = np.mean(np.abs(h) ** 2, axis=-2) * scale
+        psd_v = np.mean(np.abs(v) ** 2, axis=-2) * scale
+        csd = np.mean(np.conj(h) * v, axis=-2) * scale
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coherence = np.abs(csd) ** 2 / (psd_h * psd_v)
+        coherence = np.where(np.isfinite(coherence), coherence, 0.0)
+        return {
+            "frequencies": self.frequencies(),
+            "psd_horizontal": psd_h,
+            "psd_vertical": psd_v,
+            "csd": csd,
+            "coherence": coherence,
+        }
+
+    @staticmethod
+    def band_coherence(
+        frequencies: np.ndarray,
+        coherence: np.ndarray,
+        bands: Sequence[Tuple[float, float]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Mean coherence overall (DC excluded) and within each band [low, high).
+
+        Returns:
+            {"coherence_mean": (...,), "coherence_<low>_<high>": (...,), ...};
+            bands without frequency bins are NaN
+        """
+        result = {"coherence_mean": coherence[..., 1:].mean(axis=-1)}
+        for low, high in bands:
+            mask = (frequencies >= low) & (frequencies < high)
+            name = f"coherence_{low:g}_{high:g}"
+            if mask.any():
+                result[name] = coherence[..., mask].mean(axis=-1)
+            else:
+                result[name] = np.full(coherence.shape[:-1], np.nan)
+        return result
+
+    def coherence_trend(
+        self,
+        bearing_name: str,
+        bands: Sequence[Tuple[float, float]],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        db_path: str = None,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Channel coherence of every selected file, computed in stacked blocks.
+
+        Returns:
+            {"bearing_name", "file_numbers", "bands", "coherence_mean": [...],
+            "coherence_<low>_<high>": [...]}, or None if the bearing has no
+            selected files
+        """
+        batch = PHMBatchSpectra(db_path, sampling_rate=self.fs)
+        with stage("load"):
+            files = batch.list_files(bearing_name, start, end, stride, max_files)
+        if not files:
+            return None
+
+        frequencies = self.frequencies()
+        # 依長度分組，同長度者一起堆疊計算；結果最後依檔案編號排序
+        by_length: Dict[int, List[Tuple[int, int, int]]] = {}
+        for file in files:
+            if file[2] and file[2] >= self.nperseg:
+                by_length.setdefault(file[2], []).append(file)
+        rows = []
+        for n_samples, group in by_length.items():
+            blocks = batch.iter_stacked_signals(group, n_samples, block_size)
+            try:
+                while True:
+                    with stage("load"):
+                        block = next(blocks, None)
+                    if block is None:
+                        break
+                    numbers, horiz, vert = block
+                    with stage("compute"):
+                        values = self.band_coherence(frequencies, self.analyze(horiz, vert)["coherence"], bands)
+                    rows.extend((file_number, {name: value[i] for name, value in values.items()})
+                                for i, file_number in enumerate(numbers))
+            finally:
+                blocks.close()
+        rows.sort(key=lambda row: row[0])
+
+        names = ["coherence_mean"] + [f"coherence_{low:g}_{high:g}" for low, high in bands]
+        trend = {
+            "bearing_name": bearing_name,
+            "sampling_rate": self.fs,
+            "nperseg": self.nperseg,
+            "bands": {name: [low, high] for name, (low, high) in zip(names[1:], bands)},
+            "file_numbers": [file_number for file_number, _ in rows],
+            "file_count": len(rows),
+        }
+        for name in names:
+            trend[name] = [float(values[name]) if np.isfinite(values[name]) else None for _, values in rows]
+        return trend
@@ -26,7 +26,42 @@ class FilterProcess:
     """Advanced signal processing and filtering methods"""
 
     @staticmethod
-    def NA4(signal: np.ndarray, m: int = 10) -> Tuple[float, float, float]:
+    def segment_sum_of_squares(signal: np.ndarray, m: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sum of squared deviations from the segment mean for m segments
+
+        The first m-1 segments have n // m samples and are reduced with one
+        reshape; the last segment takes the remainder. Shared by NA4 and
+        HilbertTransform.calculate_nb4.
+
+        Args:
+            signal: Input array (n_samples,) or batched (n_signals, n_samples)
+            m: Number of segments (default: 10)
+
+        Returns:
+            Tuple of (sums with shape (..., m), segment lengths with shape (m,))
+        """
+        x = np.asarray(signal, dtype=float)
+        n = x.shape[-1]
+        size = n // m
+        split = (m - 1) * size
+        sums = np.zeros(x.shape[:-1] + (m,))
+
+        if size:
+            head = x[..., :split].reshape(x.shape[:-1] + (m - 1, size))
+            deviation = head - head.mean(axis=-1, keepdims=True)
+            sums[..., :-1] = np.einsum('...i,...i->...', deviation, deviation)
+        if n > split:
+            tail = x[..., split:]
+            deviation = tail - tail.mean(axis=-1, keepdims=True)
+            sums[..., -1] = np.einsum('...i,...i->...', deviation, deviation)
+
+        lengths = np.full(m, size)
+        lengths[-1] = n - split
+        return sums, lengths
+
+    @staticmethod
+    def NA4(signal: np.ndarray, m: int = 10) -> Tuple[Any, Any, Any]:
         """
         Calculate Normalized 4th moment with segmentation (NA4)
 
@@ -34,35 +69,29 @@ class FilterProcess:
         concentration of signal energy.
 
         Args:
-            signal: Input signal array
+            signal: Input signal array, or (n_signals, n_samples) for a batch
             m: Number of segments (default: 10)
 
         Returns:
-            Tuple of (na4, total_sum_all, division_total_sum_segment)
+            Tuple of (na4, total_sum_all, division_total_sum_segment); arrays
+            of shape (n_signals,) for batched input
         """
-        n = len(signal)
-        segment_size = n // m
-        signal_mean = np.mean(signal)
+        x = np.asarray(signal, dtype=float)
+        n = x.shape[-1]
 
         # Calculate segmented variance
-        total_sum_segment = 0
-        for i in range(m):
-            start_idx = i * segment_size
-            end_idx = (i + 1) * segment_size if i < m - 1 else n
-            segment = signal[start_idx:end_idx]
-            segment_mean = np.mean(segment)
-            sum_segment = np.sum((segment - segment_mean) ** 2)
-            total_sum_segment += sum_segment
-
-        division_total_sum_segment = (total_sum_segment / m) ** 2
+        sums, _ = FilterProcess.segment_sum_of_squares(x, m)
+        division_total_sum_segment = (np.sum(sums, axis=-1) / m) ** 2
 
         # Calculate total 4th moment
-        total_sum_all = np.sum((signal - signal_mean) ** 4) * n
+        deviation = (x - np.mean(x, axis=-1, keepdims=True)) ** 2
+        total_sum_all = np.einsum('...i,...i->...', deviation, deviation) * n
 
         # Calculate NA4
-        na4 = total_sum_all / division_total_sum_segment if division_total_sum_segment != 0 else np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            na4 = np.where(division_total_sum_segment != 0, total_sum_all / division_total_sum_segment, np.nan)
 
-        return na4, total_sum_all, division_total_sum_segment
+        return na4[()], total_sum_all, division_total_sum_segment
 
     @staticmethod
     def FM4(signal: np.ndarray) -> float:
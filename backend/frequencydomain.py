@@ -4,13 +4,23 @@ try:
     from backend.initialization import InitParameter as ip
     from backend.timedomain import TimeDomain as td
     from backend.harmonic_sildband_table import HarmonicSildband as hs
+    from backend.narrowband import NarrowbandSpectrum
+    from backend.cepstrum import harmonic_family_sum
 except ModuleNotFoundError:
     from initialization import InitParameter as ip
     from timedomain import TimeDomain as td
     from harmonic_sildband_table import HarmonicSildband as hs
+    from narrowband import NarrowbandSpectrum
+    from cepstrum import harmonic_family_sum
 
 ip=ip()
 
+#Harmonic / Sildband 的搜尋方式：逐倍數迴圈（HarmonicSildband）或倒頻譜諧波族
+HARMONIC_SEARCH_METHODS = ('loop', 'cepstrum')
+#以 0.25 倍 mortor 為諧波族間距：Harmonic 為 0.25~2.5 倍，Sildband 為 2.75~14 倍及 11.71 倍
+HARMONIC_MULTIPLES = np.arange(1, 11)
+SILDBAND_MULTIPLES = np.r_[np.arange(11, 57), 11.71 * 4]
+
 class FrequencyDomain():
 
 #    計算傅立葉轉換
@@ -39,8 +49,25 @@ class FrequencyDomain():
         ifft_tsa = pd.DataFrame({'Degree':time_value,'Acc':ifft_value.real})
         return ifft_tsa,time_value
 
+    @staticmethod
+    def _check_harmonic_search(harmonic_search):
+        if harmonic_search not in HARMONIC_SEARCH_METHODS:
+            raise ValueError(f"Unknown harmonic search: {harmonic_search}")
+
     #計算低頻的FM0數值
-    def fft_fm0_si(self, amp, fs):
+    def fft_fm0_si(self, amp, fs, harmonic_search='loop'):
+        """
+        Low-frequency FM0 and motor gear / belt sideband features.
+
+        Args:
+            harmonic_search: 'loop' sums the motor harmonics with
+                HarmonicSildband.Harmonic; 'cepstrum' locates the harmonic
+                family with cepstrum.harmonic_family_sum
+
+        Returns:
+            (fftoutput, total_fft_mgs, total_fft_bi, low_fm0)
+        """
+        FrequencyDomain._check_harmonic_search(harmonic_search)
 
         fft_value,abs_fft,freqs,abs_fft_n,_,_ = FrequencyDomain.fft_process(amp,fs)
         fftoutput=pd.DataFrame({'freqs':np.round(freqs,3),
@@ -87,8 +114,11 @@ class FrequencyDomain():
         mask13 = fftoutput['freqs']>float(max_belt_si1['freqs'].values[0])
         mask14 = fftoutput['freqs']<=float(max_belt_si1['freqs'].values[0]) + ip.harmonic_gmf_range
 
-       #呼叫計算harmonic sildband table的方法
-        low_filter_sum,_ = hs.Harmonic(fftoutput)
+       #呼叫計算harmonic sildband table的方法（或以倒頻譜定位諧波族）
+        if harmonic_search == 'cepstrum':
+            low_filter_sum,_ = harmonic_family_sum(amp, fs, ip.mortor * 0.25, HARMONIC_MULTIPLES, ip.harmonic_gmf_range)
+        else:
+            low_filter_sum,_ = hs.Harmonic(fftoutput)
 
         # Safety check: if harmonic sum is 0, use peak value to avoid division by zero
         if low_filter_sum == 0:
@@ -112,9 +142,63 @@ class FrequencyDomain():
         total_fft_bi = (np.sum(fft_bi1['abs_fft_n']) + np.sum(fft_bi2['abs_fft_n'])) / len_bi if len_bi > 0 else 0.0
 
         return fftoutput,total_fft_mgs,total_fft_bi,low_fm0
+
+    #以zoom FFT在mortor gear / belt頻帶內細分頻率，計算低頻的FM0數值
+    def zoom_fm0_si(self, amp, fs, resolution=None):
+        """
+        Narrowband version of fft_fm0_si.
+
+        The motor gear / belt peaks, their sidebands and the motor harmonics
+        are evaluated with the chirp-z transform on a `resolution` Hz grid
+        (default ip.zoom_resolution) instead of the 10 Hz bins of a
+        2,560-sample FFT.
+
+        Returns:
+            (bands, total_fft_mgs, total_fft_bi, low_fm0); bands holds the
+            motor gear / belt narrowband spectra and peak frequencies
+        """
+        nb = NarrowbandSpectrum(fs, resolution or ip.zoom_resolution)
+
+#        mortor gear與培林的主要頻率及其周圍的頻率
+        mortor_gear = nb.sideband_mean(amp, ip.mortor_gear, ip.side_band_range, ip.harmonic_gmf_range)
+        belt_si = nb.sideband_mean(amp, ip.belt_si, ip.side_band_range, ip.harmonic_gmf_range)
+
+#        計算低頻的FM0的數值
+        low_filter_sum = nb.harmonic_sum(amp)
+        if low_filter_sum == 0:
+            low_filter_sum = 1.0
+        low_fm0 = td.peak(amp)/low_filter_sum
+
+        bands = {'mortor_gear': mortor_gear, 'belt_si': belt_si}
+        return bands,mortor_gear['sideband_mean'],belt_si['sideband_mean'],low_fm0
     
 #   計算實時同步訊號(TSA)的高頻FM0
-    def tsa_fft_fm0_slf(self, amp, fs, fft):
+    def tsa_fft_fm0_slf(self, amp, fs, fft=None, harmonic_search='loop'):
+        """
+        High-frequency FM0 and sideband features of a TSA signal.
+
+        Args:
+            amp: TSA signal
+            fs: Sampling rate of `amp`. For a TSA from tsa.TimeSynchronousAverager
+                this is its angle-domain rate (tsa_fs), so the TSA spectrum
+                is already in Hz.
+            fft: fftoutput of the raw signal (fft_fm0_si). Only needed when
+                `amp` is not on a known time base: the TSA frequencies are
+                then scaled by the ratio of the two largest peaks.
+            harmonic_search: 'loop' sums the sidebands with
+                HarmonicSildband.Sildband; 'cepstrum' locates the family
+                with cepstrum.harmonic_family_sum (on the `fs` time base)
+
+        The TSA spectrum lies on a shaft-order grid (one line per
+        fs / len(amp) Hz, e.g. 30 Hz at 1800 rpm), much coarser than the
+        ip search ranges. Every window is therefore widened to the grid:
+        peak / multiple windows to at least half a line (the nearest line)
+        and the sideband windows to at least one line on each side.
+
+        Returns:
+            (tsa_fftoutput, total_tsa_fft_mgs, total_tsa_fft_bi, high_fm0)
+        """
+        FrequencyDomain._check_harmonic_search(harmonic_search)
 
         tsa_fft_value,tsa_abs_fft,tsa_freqs,tsa_abs_fft_n,_,_ = FrequencyDomain.fft_process(amp,fs)
         tsa_fftoutput=pd.DataFrame({'tsa_freqs':np.round(tsa_freqs,3),
@@ -123,22 +207,21 @@ class FrequencyDomain():
                                     'tsa_abs_fft_n': tsa_abs_fft_n,
                                     'tsa_fft':tsa_fft_value})
 
-        fftoutput=fft
+        max_freqs = 1.0
+        if fft is not None:
+            fftoutput=fft
 
+#            計算TSA FFT和原始FFT頻率的倍率
+            max1=fftoutput[fftoutput['abs_fft']==np.max(fftoutput['abs_fft'])]
+            max2=tsa_fftoutput[tsa_fftoutput['tsa_abs_fft']==np.max(tsa_fftoutput['tsa_abs_fft'])]
 
-#        計算TSA FFT和原始FFT頻率的倍率
-        max1=fftoutput[fftoutput['abs_fft']==np.max(fftoutput['abs_fft'])]
-        max2=tsa_fftoutput[tsa_fftoutput['tsa_abs_fft']==np.max(tsa_fftoutput['tsa_abs_fft'])]
+            max3=max1.iloc[0:1]
+            max4=max2.iloc[0:1]
 
-        max3=max1.iloc[0:1]
-        max4=max2.iloc[0:1]
-
-        # Safety check for division by zero
-        max4_freq = float(max4['tsa_freqs1'].values[0])
-        if max4_freq == 0:
-            max_freqs = 1.0
-        else:
-            max_freqs = float(max3['freqs1'].values[0]) / max4_freq
+            # Safety check for division by zero
+            max4_freq = float(max4['tsa_freqs1'].values[0])
+            if max4_freq != 0:
+                max_freqs = float(max3['freqs1'].values[0]) / max4_freq
 
         tsa_fftoutput=pd.DataFrame({'tsa_freqs':np.round(tsa_freqs,3),
                                     'tsa_freqs1':np.round(tsa_freqs,5),
@@ -147,9 +230,16 @@ class FrequencyDomain():
                                     'tsa_abs_fft_n': tsa_abs_fft_n,
                                     'tsa_fft':tsa_fft_value})
 
+#        依TSA頻譜的頻率解析度放寬搜尋範圍（頻率經四捨五入，邊界多留一點容差）
+        resolution = fs / len(amp) * abs(max_freqs) * (1 + 1e-6)
+        side_band_range = max(ip.side_band_range, resolution / 2)
+        high_hamonic_range = max(ip.high_hamonic_range, resolution / 2)
+        mortor_gear_range = max(ip.mortor_gear_range, resolution)
+        belt_si_range = max(ip.belt_si_range, resolution)
+
 #        先計算mortor gear的主要頻率
-        mask1 = tsa_fftoutput['multiply_freqs']>=ip.mortor_gear-ip.side_band_range
-        mask2 = tsa_fftoutput['multiply_freqs']<=ip.mortor_gear+ip.side_band_range
+        mask1 = tsa_fftoutput['multiply_freqs']>=ip.mortor_gear-side_band_range
+        mask2 = tsa_fftoutput['multiply_freqs']<=ip.mortor_gear+side_band_range
         max_mortor_gear=tsa_fftoutput[mask1 & mask2]
 
         # Safety check for empty DataFrame
@@ -160,8 +250,8 @@ class FrequencyDomain():
         max_mortor_gear1=max_mortor_gear.iloc[0:1]
 
 #        先計算培林的主要頻率
-        mask3 = tsa_fftoutput['multiply_freqs']>=ip.belt_si - ip.side_band_range
-        mask4 = tsa_fftoutput['multiply_freqs']<=ip.belt_si + ip.side_band_range
+        mask3 = tsa_fftoutput['multiply_freqs']>=ip.belt_si - side_band_range
+        mask4 = tsa_fftoutput['multiply_freqs']<=ip.belt_si + side_band_range
         max_belt_si=tsa_fftoutput[mask3 & mask4]
 
         # Safety check for empty DataFrame
@@ -172,19 +262,22 @@ class FrequencyDomain():
         max_belt_si1=max_belt_si.iloc[0:1]
 
 #         用mortor gear的主要頻率來找出周圍的頻率
-        mask7 = tsa_fftoutput['multiply_freqs']>=float(max_mortor_gear1['multiply_freqs'].values[0]) - ip.mortor_gear_range
+        mask7 = tsa_fftoutput['multiply_freqs']>=float(max_mortor_gear1['multiply_freqs'].values[0]) - mortor_gear_range
         mask8 = tsa_fftoutput['multiply_freqs']<float(max_mortor_gear1['multiply_freqs'].values[0])
         mask9 = tsa_fftoutput['multiply_freqs']>float(max_mortor_gear1['multiply_freqs'].values[0])
-        mask10 = tsa_fftoutput['multiply_freqs']<=float(max_mortor_gear1['multiply_freqs'].values[0]) + ip.mortor_gear_range
+        mask10 = tsa_fftoutput['multiply_freqs']<=float(max_mortor_gear1['multiply_freqs'].values[0]) + mortor_gear_range
 
 #        用培林的主要頻率來找出周圍的頻率
-        mask11 = tsa_fftoutput['multiply_freqs']>=float(max_belt_si1['multiply_freqs'].values[0]) - ip.belt_si_range
+        mask11 = tsa_fftoutput['multiply_freqs']>=float(max_belt_si1['multiply_freqs'].values[0]) - belt_si_range
         mask12 = tsa_fftoutput['multiply_freqs']<float(max_belt_si1['multiply_freqs'].values[0])
         mask13 = tsa_fftoutput['multiply_freqs']>float(max_belt_si1['multiply_freqs'].values[0])
-        mask14 = tsa_fftoutput['multiply_freqs']<=float(max_belt_si1['multiply_freqs'].values[0]) + ip.belt_si_range
+        mask14 = tsa_fftoutput['multiply_freqs']<=float(max_belt_si1['multiply_freqs'].values[0]) + belt_si_range
 
          #---high freqency fm0---
-        high_filter_sum,_ = hs.Sildband(tsa_fftoutput)
+        if harmonic_search == 'cepstrum':
+            high_filter_sum,_ = harmonic_family_sum(amp, fs, ip.mortor * 0.25, SILDBAND_MULTIPLES, high_hamonic_range)
+        else:
+            high_filter_sum,_ = hs.Sildband(tsa_fftoutput, side_band_range, high_hamonic_range)
 
         # Safety check: if sideband sum is 0, use default value to avoid division by zero
         if high_filter_sum == 0:
@@ -56,12 +56,13 @@ class HarmonicSildband():
         return tsa_fftoutput    
         
     
-   def Sildband(tsa_fft):
+   #side_band_range / high_hamonic_range 預設為 ip 的設定值；頻率解析度較粗的 TSA 頻譜可放寬
+   def Sildband(tsa_fft, side_band_range=ip.side_band_range, high_hamonic_range=ip.high_hamonic_range):
 
         tsa_fftoutput = tsa_fft
 
-        mask1 = tsa_fftoutput['multiply_freqs']>=ip.mortor-ip.side_band_range
-        mask2 = tsa_fftoutput['multiply_freqs']<=ip.mortor+ip.side_band_range
+        mask1 = tsa_fftoutput['multiply_freqs']>=ip.mortor-side_band_range
+        mask2 = tsa_fftoutput['multiply_freqs']<=ip.mortor+side_band_range
         max_mortor=tsa_fftoutput[mask1 & mask2]
 
         # Safety check for empty DataFrame
@@ -76,8 +77,8 @@ class HarmonicSildband():
         max_filter_freq_list=[]
         max_filter_freq_combine=pd.DataFrame()
         for i in np.arange(2.75,14.25,0.25):
-            f1 = tsa_fftoutput['multiply_freqs']>=(float(max_mortor1['multiply_freqs'].values[0]) * i) - ip.high_hamonic_range
-            f2 = tsa_fftoutput['multiply_freqs']<(float(max_mortor1['multiply_freqs'].values[0]) * i) + ip.high_hamonic_range
+            f1 = tsa_fftoutput['multiply_freqs']>=(float(max_mortor1['multiply_freqs'].values[0]) * i) - high_hamonic_range
+            f2 = tsa_fftoutput['multiply_freqs']<(float(max_mortor1['multiply_freqs'].values[0]) * i) + high_hamonic_range
             filter_tsa=tsa_fftoutput[f1 & f2]
             if(filter_tsa.empty==False):
                 max_filter=np.max(filter_tsa['tsa_abs_fft_n'])
@@ -89,8 +90,8 @@ class HarmonicSildband():
                                                     axis=0, ignore_index=False)  
             
         #計算例外的頻率
-        f3 = tsa_fftoutput['multiply_freqs']>=(float(max_mortor1['multiply_freqs'].values[0]) * 11.71) - ip.high_hamonic_range
-        f4 = tsa_fftoutput['multiply_freqs']<(float(max_mortor1['multiply_freqs'].values[0]) * 11.71) + ip.high_hamonic_range
+        f3 = tsa_fftoutput['multiply_freqs']>=(float(max_mortor1['multiply_freqs'].values[0]) * 11.71) - high_hamonic_range
+        f4 = tsa_fftoutput['multiply_freqs']<(float(max_mortor1['multiply_freqs'].values[0]) * 11.71) + high_hamonic_range
         filter_tsa_other=tsa_fftoutput[f3 & f4]
         if(filter_tsa_other.empty==False):
             max_filter_other=np.max(filter_tsa_other['tsa_abs_fft_n'])
@@ -6,6 +6,11 @@ import pandas as pd
 import numpy as np
 from scipy.signal import hilbert
 
+try:
+    from backend.filterprocess import FilterProcess
+except ModuleNotFoundError:
+    from filterprocess import FilterProcess
+
 
 class HilbertTransform:
     """Hilbert Transform analysis for vibration signals"""
@@ -18,47 +23,35 @@ class HilbertTransform:
         計算 NB4 (Normalized Bispectrum 4th order) 數值
 
         Args:
-            envelope_data: numpy array of envelope amplitude
+            envelope_data: numpy array of envelope amplitude，或批次
+                (n_signals, n_samples) 陣列
             segment_count: 資料分割段數 (default: 10)
 
         Returns:
-            nb4: NB4 特徵值
+            nb4: NB4 特徵值（批次輸入時為 (n_signals,) 陣列）
         """
-        n = len(envelope_data)
+        envelope_data = np.asarray(envelope_data, dtype=float)
+        n = envelope_data.shape[-1]
+        batched = envelope_data.ndim > 1
 
         if n == 0:
-            return 0.0
-
-        # 計算整體平均值
-        amp_mean = np.mean(envelope_data)
-
-        # 分段計算
-        segment_size = n // segment_count
-        total_sum_segment = 0.0
-
-        for i in range(segment_count):
-            start_idx = i * segment_size
-            end_idx = (i + 1) * segment_size if i < segment_count - 1 else n
+            return np.zeros(envelope_data.shape[:-1]) if batched else 0.0
 
-            segment_data = envelope_data[start_idx:end_idx]
+        # 整體四次中心矩
+        deviation = (envelope_data - np.mean(envelope_data, axis=-1, keepdims=True)) ** 2
+        total_sum_all = np.einsum('...i,...i->...', deviation, deviation) / n
 
-            if len(segment_data) == 0:
-                continue
-
-            segment_mean = np.mean(segment_data)
-            sum_segment = np.sum((segment_data - segment_mean) ** 2) / len(segment_data)
-            total_sum_segment += sum_segment
+        # 分段變異數：前 segment_count-1 段以 reshape 一次計算，最後一段含餘數
+        sums, lengths = FilterProcess.segment_sum_of_squares(envelope_data, segment_count)
+        variances = np.divide(sums, lengths, out=np.zeros_like(sums), where=lengths > 0)
+        total_sum_segment = np.sum(variances, axis=-1)
 
         # 計算 NB4
-        if total_sum_segment == 0:
-            return 0.0
-
         division_total_sum_segment = (total_sum_segment / segment_count) ** 2
-        total_sum_all = np.sum((envelope_data - amp_mean) ** 4) / n
-
-        nb4 = total_sum_all / division_total_sum_segment
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nb4 = np.where(total_sum_segment == 0, 0.0, total_sum_all / division_total_sum_segment)
 
-        return float(nb4)
+        return nb4 if batched else float(nb4)
 
     def hilbert_transform(self, signal):
         """
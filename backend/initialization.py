@@ -23,6 +23,8 @@ class InitParameter():
         self.morotr_range = 8.29
         self.high_hamonic_range = 5
         
+        self.zoom_resolution = 0.05 #narrowband (zoom FFT) 頻率解析度 Hz
+        
         self.indexlist1=[]
         self.indexlist2=[]
         
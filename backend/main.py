@@ -1,25 +1,58 @@
 """
 FastAPI backend for Linear Guide Vibration Analysis System
 """
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse, FileResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import numpy as np
 import pandas as pd
 from datetime import datetime
-import os
-import json
+import sqlite3
 
 from phm_processor import PHMDataProcessor
 from phm_query import PHMDatabaseQuery
 from phm_temperature_query import PHMTemperatureQuery
-from config import PHM_DATABASE_PATH, PHM_TEMPERATURE_DATABASE_PATH, CORS_ORIGINS, DEFAULT_SAMPLING_RATE
+from config import (
+    PHM_DATABASE_PATH, PHM_TEMPERATURE_DATABASE_PATH, CORS_ORIGINS, DEFAULT_SAMPLING_RATE,
+    PHM_INGEST_WATCH_DIR, PHM_INGEST_POLL_INTERVAL, PHM_JOB_WORKERS, PHM_PROFILING_ENABLED,
+    ORDER_SAMPLES_PER_REVOLUTION, ORDER_RESOLUTION, WELCH_NPERSEG, BISPECTRUM_NFFT, BISPECTRUM_MAX_BINS,
+    CEPSTRUM_MIN_SPACING
+)
+from phm_feature_store import PHMFeatureStore, TREND_FEATURES
+from phm_stream import SSE_HEADERS, trend_event_stream, feature_event_stream
+from phm_ingest import (
+    PHMIngestor, PHMDirectoryWatcher, parse_csv_acquisition, parse_binary_acquisition, feature_events
+)
+from phm_jobs import PHMJobQueue, PHMJobWorker
 from timefrequency import TimeFrequency
+# 全域指標需與其他 backend 模組共用同一個模組實例
+try:
+    from backend.phm_metrics import metrics, stage, MetricsMiddleware
+except ModuleNotFoundError:
+    from phm_metrics import metrics, stage, MetricsMiddleware
+from phm_profiling import ProfilingMiddleware, list_profiles, profile_path
+from phm_pipeline import PIPELINE_OUTPUTS, run_pipeline
+from phm_results_cache import PHMResultsCache
+from phm_batch_spectra import PHMBatchSpectra, parse_bands
+from phm_feature_export import EXPORT_FORMATS, PHMFeatureExporter, export_path, query_features
 from hilberttransform import HilbertTransform
 from filterprocess import FilterProcess
 from timedomain import TimeDomain
-from frequencydomain import FrequencyDomain
+from frequencydomain import FrequencyDomain, HARMONIC_SEARCH_METHODS
+from narrowband import (
+    DEFAULT_RESOLUTION as NARROWBAND_RESOLUTION,
+    MIN_RESOLUTION as NARROWBAND_MIN_RESOLUTION,
+    MAX_RESOLUTION as NARROWBAND_MAX_RESOLUTION
+)
+from kurtogram import FastKurtogram, envelope_filter_band
+from bearing_defects import BearingDefectAnalyzer
+from order_tracking import OrderTracker
+from tsa import TimeSynchronousAverager
+from cross_spectral import CrossSpectralAnalyzer
+from bispectrum import BispectrumAnalyzer
+from cepstrum import cepstrum, lifter, log_spectrum, quefrencies
 
 app = FastAPI(
     title="Linear Guide Vibration Analysis API",
@@ -36,6 +69,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 請求延遲與階段計時（Server-Timing header、/metrics）
+app.add_middleware(MetricsMiddleware)
+
+# 單一請求效能剖析（PHM_PROFILING_ENABLED 時，?profile=1 或 ?profile=cprofile）
+if PHM_PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# phm_analysis_results 分析結果（載入一次，檔案 mtime 變更時重新載入）
+analysis_results_cache = PHMResultsCache()
+
+
+# 即時擷取目錄監看（設定 PHM_INGEST_WATCH_DIR 時啟用）
+ingest_watcher: Optional[PHMDirectoryWatcher] = None
+
+
+@app.on_event("startup")
+async def start_ingest_watcher():
+    global ingest_watcher
+    if PHM_INGEST_WATCH_DIR:
+        ingest_watcher = PHMDirectoryWatcher(PHM_INGEST_WATCH_DIR, PHMIngestor(), PHM_INGEST_POLL_INTERVAL)
+        ingest_watcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_ingest_watcher():
+    if ingest_watcher is not None:
+        ingest_watcher.stop()
+
+
+# 背景分析工作（PHM_JOB_WORKERS > 0 時於 API 行程內執行）
+job_worker: Optional[PHMJobWorker] = None
+
+
+@app.on_event("startup")
+async def start_job_worker():
+    global job_worker
+    if PHM_JOB_WORKERS > 0:
+        try:
+            job_worker = PHMJobWorker(PHMJobQueue(), PHM_JOB_WORKERS, broker=feature_events)
+        except FileNotFoundError as e:
+            print(f"Job worker disabled: {e}")
+            return
+        job_worker.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    if job_worker is not None:
+        job_worker.stop()
+
+
+def _job_queue_depth():
+    counts = PHMJobQueue().status_counts()
+    return {(("status", status),): counts.get(status, 0) for status in ("queued", "running")}
+
+
+metrics.register_gauge("phm_job_queue_depth", "Background analysis jobs by status.", _job_queue_depth)
+metrics.register_gauge(
+    "phm_job_worker_inflight", "Files currently submitted to the job process pool.",
+    lambda: job_worker.inflight if job_worker is not None else 0
+)
+metrics.register_gauge(
+    "phm_stream_subscribers", "Open live feature event streams.",
+    lambda: feature_events.subscriber_count
+)
+
 
 # Pydantic models for request/response
 class AnalysisRequest(BaseModel):
@@ -45,6 +144,13 @@ class AnalysisRequest(BaseModel):
     guide_spec_id: int
 
 
+class JobRequest(BaseModel):
+    job_type: str
+    bearing_name: str
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+    params: Dict = {}
+
+
 
 
 # Health check
@@ -57,6 +163,31 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 格式的效能指標（端點/階段延遲、快取命中率、佇列深度）"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/profiles")
+async def get_profiles(limit: int = 50):
+    """列出最近的請求剖析檔（需啟用 PHM_PROFILING_ENABLED）"""
+    if not PHM_PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return {"profiles": list_profiles(limit=limit)}
+
+
+@app.get("/api/profiles/{file_name}")
+async def get_profile_file(file_name: str):
+    """下載剖析檔（.folded、.speedscope.json、.prof、.txt）"""
+    if not PHM_PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    path = profile_path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {file_name} not found")
+    return FileResponse(path, filename=file_name)
+
+
 
 
 # Analysis endpoints (commented out - requires VibrationAnalyzer)
@@ -93,48 +224,26 @@ async def get_phm_training_summary():
 
 
 @app.get("/api/phm/analysis-data", response_model=Dict)
-async def get_phm_analysis_data():
-    """獲取預處理的 PHM 分析數據（從 JSON 文件）"""
+async def get_phm_analysis_data(request: Request):
+    """獲取預處理的 PHM 分析數據（從 JSON 文件，檔案未變更時直接回傳已序列化的內容）"""
     try:
-        # 獲取項目根目錄
-        # 在容器中，main.py 位於 /app/backend/main.py 或 /app/main.py
-        # phm_analysis_results 目錄掛載在 /app/phm_analysis_results
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # 判斷是否在 backend 子目錄中
-        if os.path.basename(current_dir) == 'backend':
-            project_root = os.path.dirname(current_dir)
-        else:
-            project_root = current_dir
-
-        # 讀取生成的分析結果
-        summary_path = os.path.join(project_root, "phm_analysis_results", "summary.json")
-        stats_path = os.path.join(project_root, "phm_analysis_results", "vibration_statistics.csv")
-
-        print(f"Looking for summary at: {summary_path}")
-        print(f"Looking for stats at: {stats_path}")
-        print(f"Summary exists: {os.path.exists(summary_path)}")
-        print(f"Stats exists: {os.path.exists(stats_path)}")
+        with stage("load"):
+            cached = analysis_results_cache.get()
 
-        if not os.path.exists(summary_path):
+        if cached is None:
             raise HTTPException(
                 status_code=404,
-                detail=f"Analysis results not found at {summary_path}"
+                detail=f"Analysis results not found at {analysis_results_cache.summary_path}"
             )
 
-        with open(summary_path, 'r', encoding='utf-8') as f:
-            summary = json.load(f)
+        body, etag = cached
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
 
-        # 讀取統計數據
-        stats_data = []
-        if os.path.exists(stats_path):
-            df = pd.read_csv(stats_path)
-            stats_data = df.to_dict('records')
-
-        return {
-            "summary": summary,
-            "statistics": stats_data
-        }
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -292,30 +401,72 @@ async def search_phm_anomalies(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/phm/ingest/{bearing_name}", response_model=Dict)
+async def ingest_phm_acquisition(
+    bearing_name: str,
+    file: UploadFile = File(...),
+    data_format: str = "auto",
+    dtype: str = "float32"
+):
+    """
+    匯入新的擷取資料並即時計算特徵
+
+    data_format: csv（PHM 6 欄或 h,v 2 欄）、binary（交錯的 little-endian h,v）或 auto（依副檔名判斷）
+    """
+    try:
+        content = await file.read()
+
+        if data_format == "auto":
+            data_format = "csv" if (file.filename or "").lower().endswith(".csv") else "binary"
+
+        if data_format == "csv":
+            data = parse_csv_acquisition(content)
+        elif data_format == "binary":
+            data = parse_binary_acquisition(content, dtype)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported data_format: {data_format}")
+
+        ingestor = PHMIngestor()
+        return ingestor.ingest(bearing_name, data)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in ingest_phm_acquisition: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ========================================
 # Algorithm Calculation Endpoints
 # ========================================
 
+FILE_SIGNAL_QUERY = """
+SELECT m.horizontal_acceleration, m.vertical_acceleration
+FROM measurements m
+JOIN measurement_files mf ON m.file_id = mf.file_id
+JOIN bearings b ON mf.bearing_id = b.bearing_id
+WHERE b.bearing_name = ? AND mf.file_number = ?
+"""
+
+
+def load_bearing_file(bearing_name: str, file_number: int) -> pd.DataFrame:
+    """讀取單一檔案的水平/垂直振動數據（使用全域配置的資料庫）"""
+    conn = sqlite3.connect(PHM_DATABASE_PATH)
+    try:
+        return pd.read_sql_query(FILE_SIGNAL_QUERY, conn, params=(bearing_name, file_number))
+    finally:
+        conn.close()
+
+
 @app.get("/api/algorithms/time-domain/{bearing_name}/{file_number}", response_model=Dict)
 async def calculate_time_domain_features(bearing_name: str, file_number: int):
     """計算時域特徵"""
     try:
-        import sqlite3
-
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        # 查詢數據
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -324,32 +475,36 @@ async def calculate_time_domain_features(bearing_name: str, file_number: int):
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        td = TimeDomain()
-
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "data_points": len(df),
-            "horizontal": {
+        with stage("compute"):
+            td = TimeDomain()
+            horiz_features = {
                 "peak": float(td.peak(horiz)),
                 "avg": float(td.avg(horiz)),
                 "rms": float(td.rms(horiz)),
                 "crest_factor": float(td.cf(horiz)),
                 "kurtosis": float(td.kurt(horiz))
-            },
-            "vertical": {
+            }
+            vert_features = {
                 "peak": float(td.peak(vert)),
                 "avg": float(td.avg(vert)),
                 "rms": float(td.rms(vert)),
                 "crest_factor": float(td.cf(vert)),
                 "kurtosis": float(td.kurt(vert))
-            },
-            "signal_data": {
-                "horizontal": horiz[:1000].tolist(),  # 只返回前1000個點用於繪圖
-                "vertical": vert[:1000].tolist(),
-                "time": list(range(min(1000, len(horiz))))
             }
-        }
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "data_points": len(df),
+                "horizontal": horiz_features,
+                "vertical": vert_features,
+                "signal_data": {
+                    "horizontal": horiz[:1000].tolist(),  # 只返回前1000個點用於繪圖
+                    "vertical": vert[:1000].tolist(),
+                    "time": list(range(min(1000, len(horiz))))
+                }
+            }
 
         return features
 
@@ -362,76 +517,19 @@ async def calculate_time_domain_features(bearing_name: str, file_number: int):
 
 @app.get("/api/algorithms/time-domain-trend/{bearing_name}", response_model=Dict)
 async def calculate_time_domain_trend(bearing_name: str, max_files: int = 50):
-    """計算時域特徵趨勢（多個檔案）"""
+    """計算時域特徵趨勢（多個檔案，讀取特徵庫中已計算的數值）"""
     try:
-        import sqlite3
+        store = PHMFeatureStore()
+        with stage("compute"):
+            trend_data = store.get_trend(bearing_name, TREND_FEATURES['time-domain'], max_files)
 
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        # 獲取檔案列表
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT mf.file_number, mf.file_id
-            FROM measurement_files mf
-            JOIN bearings b ON mf.bearing_id = b.bearing_id
-            WHERE b.bearing_name = ?
-            ORDER BY mf.file_number
-            LIMIT ?
-        """, (bearing_name, max_files))
-
-        files = cursor.fetchall()
-
-        if not files:
+        if trend_data is None:
             raise HTTPException(status_code=404, detail="No files found")
 
-        trend_data = {
-            "bearing_name": bearing_name,
-            "file_count": len(files),
-            "horizontal": {
-                "rms": [],
-                "peak": [],
-                "kurtosis": [],
-                "crest_factor": []
-            },
-            "vertical": {
-                "rms": [],
-                "peak": [],
-                "kurtosis": [],
-                "crest_factor": []
-            },
-            "file_numbers": []
-        }
-
-        td = TimeDomain()
-
-        for file_num, file_id in files:
-            # 查詢該檔案的數據
-            query = f"""
-            SELECT horizontal_acceleration, vertical_acceleration
-            FROM measurements
-            WHERE file_id = {file_id}
-            """
-            df = pd.read_sql_query(query, conn)
-
-            if not df.empty:
-                horiz = df['horizontal_acceleration'].values
-                vert = df['vertical_acceleration'].values
-
-                trend_data["file_numbers"].append(file_num)
-                trend_data["horizontal"]["rms"].append(float(td.rms(horiz)))
-                trend_data["horizontal"]["peak"].append(float(td.peak(horiz)))
-                trend_data["horizontal"]["kurtosis"].append(float(td.kurt(horiz)))
-                trend_data["horizontal"]["crest_factor"].append(float(td.cf(horiz)))
-
-                trend_data["vertical"]["rms"].append(float(td.rms(vert)))
-                trend_data["vertical"]["peak"].append(float(td.peak(vert)))
-                trend_data["vertical"]["kurtosis"].append(float(td.kurt(vert)))
-                trend_data["vertical"]["crest_factor"].append(float(td.cf(vert)))
-
-        conn.close()
         return trend_data
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -440,23 +538,11 @@ async def calculate_time_domain_trend(bearing_name: str, max_files: int = 50):
 async def calculate_frequency_domain(bearing_name: str, file_number: int, sampling_rate: int = DEFAULT_SAMPLING_RATE):
     """計算頻域特徵（FFT）"""
     try:
-        import sqlite3
         from scipy import signal as scipy_signal
         from scipy.fft import fft, fftfreq
 
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -464,41 +550,43 @@ async def calculate_frequency_domain(bearing_name: str, file_number: int, sampli
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        # 計算 FFT
-        n = len(horiz)
-        freq = fftfreq(n, 1/sampling_rate)[:n//2]
+        with stage("compute"):
+            # 計算 FFT
+            n = len(horiz)
+            freq = fftfreq(n, 1/sampling_rate)[:n//2]
 
-        horiz_fft = fft(horiz)
-        vert_fft = fft(vert)
+            horiz_fft = fft(horiz)
+            vert_fft = fft(vert)
 
-        horiz_magnitude = 2.0/n * np.abs(horiz_fft[:n//2])
-        vert_magnitude = 2.0/n * np.abs(vert_fft[:n//2])
+            horiz_magnitude = 2.0/n * np.abs(horiz_fft[:n//2])
+            vert_magnitude = 2.0/n * np.abs(vert_fft[:n//2])
 
-        # 找出峰值頻率（前10個）
-        horiz_peaks_idx = np.argsort(horiz_magnitude)[-10:][::-1]
-        vert_peaks_idx = np.argsort(vert_magnitude)[-10:][::-1]
+            # 找出峰值頻率（前10個）
+            horiz_peaks_idx = np.argsort(horiz_magnitude)[-10:][::-1]
+            vert_peaks_idx = np.argsort(vert_magnitude)[-10:][::-1]
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "frequency_resolution": float(freq[1] - freq[0]) if len(freq) > 1 else 0,
-            "horizontal": {
-                "peak_frequencies": [float(freq[i]) for i in horiz_peaks_idx],
-                "peak_magnitudes": [float(horiz_magnitude[i]) for i in horiz_peaks_idx],
-                "total_power": float(np.sum(horiz_magnitude**2))
-            },
-            "vertical": {
-                "peak_frequencies": [float(freq[i]) for i in vert_peaks_idx],
-                "peak_magnitudes": [float(vert_magnitude[i]) for i in vert_peaks_idx],
-                "total_power": float(np.sum(vert_magnitude**2))
-            },
-            "spectrum_data": {
-                "frequency": freq[:1000].tolist(),  # 只返回前1000個點
-                "horizontal_magnitude": horiz_magnitude[:1000].tolist(),
-                "vertical_magnitude": vert_magnitude[:1000].tolist()
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "frequency_resolution": float(freq[1] - freq[0]) if len(freq) > 1 else 0,
+                "horizontal": {
+                    "peak_frequencies": [float(freq[i]) for i in horiz_peaks_idx],
+                    "peak_magnitudes": [float(horiz_magnitude[i]) for i in horiz_peaks_idx],
+                    "total_power": float(np.sum(horiz_magnitude**2))
+                },
+                "vertical": {
+                    "peak_frequencies": [float(freq[i]) for i in vert_peaks_idx],
+                    "peak_magnitudes": [float(vert_magnitude[i]) for i in vert_peaks_idx],
+                    "total_power": float(np.sum(vert_magnitude**2))
+                },
+                "spectrum_data": {
+                    "frequency": freq[:1000].tolist(),  # 只返回前1000個點
+                    "horizontal_magnitude": horiz_magnitude[:1000].tolist(),
+                    "vertical_magnitude": vert_magnitude[:1000].tolist()
+                }
             }
-        }
 
         return features
 
@@ -512,27 +600,19 @@ async def calculate_envelope_spectrum(
     file_number: int,
     sampling_rate: int = DEFAULT_SAMPLING_RATE,
     lowcut: float = 4000,
-    highcut: float = 10000
+    highcut: float = 10000,
+    auto_band: bool = False
 ):
-    """計算包絡頻譜"""
+    """
+    計算包絡頻譜
+    auto_band=true 時以快速峭度圖（兩通道平均峭度最大的頻帶）取代 lowcut/highcut
+    """
     try:
-        import sqlite3
         from scipy import signal as scipy_signal
         from scipy.fft import fft, fftfreq
 
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -540,372 +620,776 @@ async def calculate_envelope_spectrum(
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        # 設計帶通濾波器
-        nyquist = sampling_rate / 2
-        low = lowcut / nyquist
-        high = highcut / nyquist
-        b, a = scipy_signal.butter(4, [low, high], btype='band')
+        kurtogram_band = None
+        if auto_band:
+            with stage("compute"):
+                rows = FastKurtogram(sampling_rate).compute(np.stack([horiz, vert]))
+                kurtogram_band = FastKurtogram.optimal_band(
+                    rows, [row["kurtosis"].mean(axis=0) for row in rows]
+                )
+                lowcut, highcut = envelope_filter_band(kurtogram_band, sampling_rate)
+
+        with stage("compute"):
+            # 設計帶通濾波器
+            nyquist = sampling_rate / 2
+            low = lowcut / nyquist
+            high = highcut / nyquist
+            b, a = scipy_signal.butter(4, [low, high], btype='band')
 
-        # 帶通濾波
-        horiz_filtered = scipy_signal.filtfilt(b, a, horiz)
-        vert_filtered = scipy_signal.filtfilt(b, a, vert)
+            # 帶通濾波
+            horiz_filtered = scipy_signal.filtfilt(b, a, horiz)
+            vert_filtered = scipy_signal.filtfilt(b, a, vert)
 
-        # 希爾伯特轉換提取包絡
-        horiz_envelope = np.abs(scipy_signal.hilbert(horiz_filtered))
-        vert_envelope = np.abs(scipy_signal.hilbert(vert_filtered))
+            # 希爾伯特轉換提取包絡
+            horiz_envelope = np.abs(scipy_signal.hilbert(horiz_filtered))
+            vert_envelope = np.abs(scipy_signal.hilbert(vert_filtered))
 
-        # 對包絡做 FFT
-        n = len(horiz_envelope)
-        freq = fftfreq(n, 1/sampling_rate)[:n//2]
+            # 對包絡做 FFT
+            n = len(horiz_envelope)
+            freq = fftfreq(n, 1/sampling_rate)[:n//2]
 
-        horiz_env_fft = fft(horiz_envelope)
-        vert_env_fft = fft(vert_envelope)
+            horiz_env_fft = fft(horiz_envelope)
+            vert_env_fft = fft(vert_envelope)
 
-        horiz_env_magnitude = 2.0/n * np.abs(horiz_env_fft[:n//2])
-        vert_env_magnitude = 2.0/n * np.abs(vert_env_fft[:n//2])
+            horiz_env_magnitude = 2.0/n * np.abs(horiz_env_fft[:n//2])
+            vert_env_magnitude = 2.0/n * np.abs(vert_env_fft[:n//2])
 
-        # 找出峰值
-        horiz_peaks_idx = np.argsort(horiz_env_magnitude)[-10:][::-1]
-        vert_peaks_idx = np.argsort(vert_env_magnitude)[-10:][::-1]
+            # 找出峰值
+            horiz_peaks_idx = np.argsort(horiz_env_magnitude)[-10:][::-1]
+            vert_peaks_idx = np.argsort(vert_env_magnitude)[-10:][::-1]
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "filter_band": {"lowcut": lowcut, "highcut": highcut},
-            "horizontal": {
-                "peak_frequencies": [float(freq[i]) for i in horiz_peaks_idx if freq[i] > 0],
-                "peak_magnitudes": [float(horiz_env_magnitude[i]) for i in horiz_peaks_idx if freq[i] > 0],
-                "envelope_rms": float(np.sqrt(np.mean(horiz_envelope**2)))
-            },
-            "vertical": {
-                "peak_frequencies": [float(freq[i]) for i in vert_peaks_idx if freq[i] > 0],
-                "peak_magnitudes": [float(vert_env_magnitude[i]) for i in vert_peaks_idx if freq[i] > 0],
-                "envelope_rms": float(np.sqrt(np.mean(vert_envelope**2)))
-            },
-            "envelope_spectrum": {
-                "frequency": freq[:500].tolist(),
-                "horizontal_magnitude": horiz_env_magnitude[:500].tolist(),
-                "vertical_magnitude": vert_env_magnitude[:500].tolist()
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "filter_band": {"lowcut": lowcut, "highcut": highcut},
+                "kurtogram_band": kurtogram_band,
+                "horizontal": {
+                    "peak_frequencies": [float(freq[i]) for i in horiz_peaks_idx if freq[i] > 0],
+                    "peak_magnitudes": [float(horiz_env_magnitude[i]) for i in horiz_peaks_idx if freq[i] > 0],
+                    "envelope_rms": float(np.sqrt(np.mean(horiz_envelope**2)))
+                },
+                "vertical": {
+                    "peak_frequencies": [float(freq[i]) for i in vert_peaks_idx if freq[i] > 0],
+                    "peak_magnitudes": [float(vert_env_magnitude[i]) for i in vert_peaks_idx if freq[i] > 0],
+                    "envelope_rms": float(np.sqrt(np.mean(vert_envelope**2)))
+                },
+                "envelope_spectrum": {
+                    "frequency": freq[:500].tolist(),
+                    "horizontal_magnitude": horiz_env_magnitude[:500].tolist(),
+                    "vertical_magnitude": vert_env_magnitude[:500].tolist()
+                }
             }
-        }
 
         return features
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# ========================================
-# Time-Frequency Analysis Endpoints
-# ========================================
-
-@app.get("/api/algorithms/stft/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_stft(
+@app.get("/api/algorithms/kurtogram/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_kurtogram(
     bearing_name: str,
     file_number: int,
-    sampling_rate: int = DEFAULT_SAMPLING_RATE,
-    window: str = 'hann',
-    nperseg: int = 256
+    levels: Optional[int] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
 ):
-    """計算短時傅立葉轉換（STFT）"""
+    """
+    快速峭度圖（Fast Kurtogram）：各層頻帶的譜峭度與峭度最大的頻帶。
+    optimal_band 的 lowcut/highcut 可直接傳給包絡頻譜端點（或使用其 auto_band=true）。
+    """
     try:
-        import sqlite3
-
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
 
-        horiz = df['horizontal_acceleration'].values
-        vert = df['vertical_acceleration'].values
-
-        tf = TimeFrequency()
-
-        # 計算水平和垂直方向的 STFT
-        horiz_stft = tf.stft_analysis(horiz, fs=sampling_rate, window=window, nperseg=nperseg)
-        vert_stft = tf.stft_analysis(vert, fs=sampling_rate, window=window, nperseg=nperseg)
+        signals = df[['horizontal_acceleration', 'vertical_acceleration']].values.T
 
-        # 限制返回的數據量（用於繪圖）
-        freq_limit = min(100, len(horiz_stft['frequencies']))
-        time_limit = min(100, len(horiz_stft['time']))
+        with stage("compute"):
+            rows = FastKurtogram(sampling_rate, levels).compute(signals)
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "window": window,
-            "nperseg": nperseg,
-            "horizontal": {
-                "np4": horiz_stft['np4'],
-                "max_freq": horiz_stft['max_freq'],
-                "max_time": horiz_stft['max_time'],
-                "max_magnitude": horiz_stft['max_magnitude'],
-                "total_energy": horiz_stft['total_energy']
-            },
-            "vertical": {
-                "np4": vert_stft['np4'],
-                "max_freq": vert_stft['max_freq'],
-                "max_time": vert_stft['max_time'],
-                "max_magnitude": vert_stft['max_magnitude'],
-                "total_energy": vert_stft['total_energy']
-            },
-            "spectrogram_data": {
-                "frequencies": horiz_stft['frequencies'][:freq_limit].tolist(),
-                "time": horiz_stft['time'][:time_limit].tolist(),
-                "horizontal_magnitude": horiz_stft['magnitude'][:freq_limit, :time_limit].tolist(),
-                "vertical_magnitude": vert_stft['magnitude'][:freq_limit, :time_limit].tolist()
+        with stage("serialize"):
+            result = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "levels": [round(float(row["level"]), 1) for row in rows],
+                "bandwidths": [float(row["bandwidth"]) for row in rows],
             }
-        }
+            for index, channel in enumerate(('horizontal', 'vertical')):
+                channel_rows = [{**row, "kurtosis": row["kurtosis"][index]} for row in rows]
+                band = FastKurtogram.optimal_band(channel_rows)
+                lowcut, highcut = envelope_filter_band(band, sampling_rate)
+                result[channel] = {
+                    "kurtogram": [row["kurtosis"].tolist() for row in channel_rows],
+                    "optimal_band": band,
+                    "envelope_filter_band": {"lowcut": lowcut, "highcut": highcut},
+                }
 
-        return features
+        return result
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_stft: {error_detail}")
+        print(f"Error in calculate_kurtogram: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/algorithms/cwt/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_cwt(
+@app.get("/api/algorithms/full/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_full_analysis(
     bearing_name: str,
     file_number: int,
+    outputs: Optional[str] = None,
     sampling_rate: int = DEFAULT_SAMPLING_RATE,
-    wavelet: str = 'morl'
+    segment_count: int = 10,
+    lowcut: float = 4000,
+    highcut: float = 10000,
+    window: str = 'hann',
+    nperseg: int = 256,
+    wavelet: str = 'morl',
+    include_data: bool = True
 ):
-    """計算連續小波轉換（CWT）"""
-    try:
-        import sqlite3
-
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+    """
+    一次計算多個特徵族群（共用 FFT、解析信號、動差等中間結果）
 
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
+    outputs 以逗號分隔（time-domain, frequency, envelope, hilbert, filter,
+    stft, cwt, spectrogram），未指定時計算全部
+    """
+    try:
+        requested = [name.strip() for name in outputs.split(',') if name.strip()] if outputs else list(PIPELINE_OUTPUTS)
 
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
 
-        horiz = df['horizontal_acceleration'].values
-        vert = df['vertical_acceleration'].values
-
-        tf = TimeFrequency()
-
-        # 計算 CWT
-        scales = np.arange(1, 65)
-        horiz_cwt = tf.cwt_analysis(horiz, fs=sampling_rate, wavelet=wavelet, scales=scales)
-        vert_cwt = tf.cwt_analysis(vert, fs=sampling_rate, wavelet=wavelet, scales=scales)
-
-        # 限制返回的數據量
-        scale_limit = min(64, len(scales))
-        time_limit = min(500, horiz_cwt['magnitude'].shape[1])
-
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "wavelet": wavelet,
-            "horizontal": {
-                "np4": horiz_cwt['np4'],
-                "max_scale": horiz_cwt['max_scale'],
-                "max_freq": horiz_cwt['max_freq'],
-                "total_energy": horiz_cwt['total_energy'],
-                "energy_per_scale": horiz_cwt['energy_per_scale'].tolist()
+        # 各階段各自計時（Server-Timing 以階段名稱顯示）
+        result = run_pipeline(
+            {
+                "horizontal": df['horizontal_acceleration'].values,
+                "vertical": df['vertical_acceleration'].values,
             },
-            "vertical": {
-                "np4": vert_cwt['np4'],
-                "max_scale": vert_cwt['max_scale'],
-                "max_freq": vert_cwt['max_freq'],
-                "total_energy": vert_cwt['total_energy'],
-                "energy_per_scale": vert_cwt['energy_per_scale'].tolist()
+            requested,
+            fs=sampling_rate,
+            params={
+                "segment_count": segment_count,
+                "lowcut": lowcut,
+                "highcut": highcut,
+                "window": window,
+                "nperseg": nperseg,
+                "wavelet": wavelet,
             },
-            "cwt_data": {
-                "scales": scales[:scale_limit].tolist(),
-                "frequencies": horiz_cwt['frequencies'][:scale_limit].tolist(),
-                "horizontal_magnitude": horiz_cwt['magnitude'][:scale_limit, :time_limit].tolist(),
-                "vertical_magnitude": vert_cwt['magnitude'][:scale_limit, :time_limit].tolist()
+            include_data=include_data
+        )
+
+        with stage("serialize"):
+            if include_data:
+                result["data"] = {
+                    output: {
+                        key: value.tolist() if isinstance(value, np.ndarray) else value
+                        for key, value in section.items()
+                    }
+                    for output, section in result["data"].items()
+                }
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "data_points": len(df),
+                "sampling_rate": sampling_rate,
+                **result
             }
-        }
 
         return features
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_cwt: {error_detail}")
+        print(f"Error in calculate_full_analysis: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/algorithms/higher-order/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_higher_order_stats(
+# ========================================
+# Time-Frequency Analysis Endpoints
+# ========================================
+
+@app.get("/api/algorithms/waterfall/{bearing_name}", response_model=Dict)
+async def calculate_waterfall(
     bearing_name: str,
-    file_number: int,
-    sampling_rate: int = DEFAULT_SAMPLING_RATE,
-    segment_count: int = 10
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: int = 500,
+    bins: int = 512,
+    f_min: float = 0.0,
+    f_max: Optional[float] = None,
+    reduce: str = 'max',
+    envelope: bool = False,
+    lowcut: float = 4000,
+    highcut: float = 10000,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
 ):
     """
-    計算高階統計特徵 (已整合至進階濾波特徵)
-
-    此端點已整合至 /api/algorithms/filter-features
-    為了向後兼容性保留，內部委託給 FilterProcess
+    全壽命頻譜瀑布圖：所選檔案（start~end，每 stride 個取一個，最多 max_files 個）
+    堆疊後一次 rfft，頻率軸在伺服器端分為 bins 個頻帶（reduce=max 或 mean）。
+    envelope=true 時另外回傳包絡頻譜。
     """
     try:
-        import sqlite3
-
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+        if stride < 1 or max_files < 1:
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
 
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
+        result = PHMBatchSpectra(sampling_rate=sampling_rate).waterfall(
+            bearing_name, start, end, stride, max_files, bins, f_min, f_max, reduce,
+            envelope, lowcut, highcut
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="No files found")
 
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        return result
 
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No data found")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_waterfall: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        horiz = df['horizontal_acceleration'].values
-        vert = df['vertical_acceleration'].values
 
-        # 使用 FilterProcess 的統一實現（更精確）
-        horiz_stats = FilterProcess.calculate_all_features(horiz, sampling_rate, segment_count)
-        vert_stats = FilterProcess.calculate_all_features(vert, sampling_rate, segment_count)
+@app.get("/api/algorithms/band-energy-trend/{bearing_name}", response_model=Dict)
+async def get_band_energy_trend(
+    bearing_name: str,
+    bands: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: Optional[int] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    全壽命頻帶能量趨勢：bands 格式為 "1000-5000,5000-10000"（Hz，預設 BAND_ENERGY_BANDS）。
+    已存於特徵庫的值直接讀取，其餘檔案堆疊後一次 rfft 計算並寫回特徵庫
+    （僅預設取樣率且全部為 BAND_ENERGY_BANDS 時使用特徵庫，自訂頻帶即時計算不寫回）。
+    """
+    try:
+        if stride < 1 or (max_files is not None and max_files < 1):
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "data_points": len(df),
-            "sampling_rate": sampling_rate,
-            "segment_count": segment_count,
-            "horizontal": horiz_stats,
-            "vertical": vert_stats,
-            "_note": "此 API 已整合至 /api/algorithms/filter-features，建議使用該端點"
-        }
+        result = PHMBatchSpectra(sampling_rate=sampling_rate).band_energy_trend(
+            bearing_name, parse_bands(bands), start, end, stride, max_files,
+            persist=sampling_rate == DEFAULT_SAMPLING_RATE
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="No files found")
 
-        return features
+        return result
 
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_higher_order_stats: {error_detail}")
+        print(f"Error in get_band_energy_trend: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/algorithms/spectrogram/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_spectrogram(
+@app.get("/api/algorithms/bearing-defects/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_bearing_defects(
     bearing_name: str,
     file_number: int,
+    speed_rpm: Optional[float] = None,
     sampling_rate: int = DEFAULT_SAMPLING_RATE
 ):
-    """計算頻譜圖"""
+    """
+    軸承故障頻率（BPFO/BPFI/BSF/FTF）與單一檔案包絡頻譜中各諧波的比對結果。
+    轉速預設取自該軸承的操作條件。
+    """
     try:
-        import sqlite3
-
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+        analyzer = BearingDefectAnalyzer.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
 
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
 
-        horiz = df['horizontal_acceleration'].values
-        vert = df['vertical_acceleration'].values
-
-        tf = TimeFrequency()
-
-        # 計算頻譜圖
-        horiz_spec = tf.spectrogram_features(horiz, fs=sampling_rate)
-        vert_spec = tf.spectrogram_features(vert, fs=sampling_rate)
-
-        # 限制返回的數據量
-        freq_limit = min(100, len(horiz_spec['frequencies']))
-        time_limit = min(100, len(horiz_spec['time']))
+        with stage("compute"):
+            report = analyzer.file_report(
+                df['horizontal_acceleration'].values, df['vertical_acceleration'].values
+            )
 
-        features = {
+        return {
             "bearing_name": bearing_name,
             "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "horizontal": {
-                "mean_power": horiz_spec['mean_power'],
-                "max_power": horiz_spec['max_power'],
-                "std_power": horiz_spec['std_power'],
-                "peak_freq": horiz_spec['peak_freq'],
-                "peak_time": horiz_spec['peak_time']
-            },
-            "vertical": {
-                "mean_power": vert_spec['mean_power'],
-                "max_power": vert_spec['max_power'],
-                "std_power": vert_spec['std_power'],
-                "peak_freq": vert_spec['peak_freq'],
-                "peak_time": vert_spec['peak_time']
-            },
-            "spectrogram_data": {
-                "frequencies": horiz_spec['frequencies'][:freq_limit].tolist(),
-                "time": horiz_spec['time'][:time_limit].tolist(),
-                "horizontal_power_db": horiz_spec['power_db'][:freq_limit, :time_limit].tolist(),
-                "vertical_power_db": vert_spec['power_db'][:freq_limit, :time_limit].tolist()
-            }
+            "speed_rpm": analyzer.speed_rpm,
+            "defect_frequencies": analyzer.frequencies,
+            "filter_band": {"lowcut": analyzer.lowcut, "highcut": analyzer.highcut},
+            **report,
         }
 
-        return features
-
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_spectrogram: {error_detail}")
+        print(f"Error in calculate_bearing_defects: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/algorithms/frequency-fft/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_frequency_fft(bearing_name: str, file_number: int, sampling_rate: int = DEFAULT_SAMPLING_RATE):
-    """計算低頻FFT特徵（FM0）"""
+@app.get("/api/algorithms/bearing-defects-trend/{bearing_name}", response_model=Dict)
+async def get_bearing_defect_trend(
+    bearing_name: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: Optional[int] = None,
+    speed_rpm: Optional[float] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    全壽命故障頻率趨勢：各檔案 <defect>_amplitude / <defect>_ratio。
+    已存於特徵庫的值直接讀取，其餘檔案堆疊計算後寫回
+    （僅使用操作條件轉速與預設取樣率時寫回）。
+    """
     try:
-        import sqlite3
-
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+        if stride < 1 or (max_files is not None and max_files < 1):
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
 
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
+        analyzer = BearingDefectAnalyzer.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
+        result = analyzer.trend(
+            bearing_name, start, end, stride, max_files,
+            persist=speed_rpm is None and sampling_rate == DEFAULT_SAMPLING_RATE
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="No files found")
 
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in get_bearing_defect_trend: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/order-spectrum/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_order_spectrum(
+    bearing_name: str,
+    file_number: int,
+    max_order: float = 50,
+    speed_rpm: Optional[float] = None,
+    samples_per_revolution: int = ORDER_SAMPLES_PER_REVOLUTION,
+    order_resolution: float = ORDER_RESOLUTION,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    階次頻譜：依操作條件轉速重取樣至角度域（每轉固定點數），
+    各轉速的軸承共用同一階次軸（解析度 order_resolution）。
+    """
+    try:
+        tracker = OrderTracker.for_bearing(
+            bearing_name, speed_rpm, sampling_rate=sampling_rate,
+            samples_per_revolution=samples_per_revolution, order_resolution=order_resolution
+        )
+
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        signals = df[['horizontal_acceleration', 'vertical_acceleration']].values.T
+
+        with stage("compute"):
+            orders, amplitudes = tracker.order_spectrum(signals)
+            features = tracker.features(signals)
+            shown = orders <= max_order
+
+        with stage("serialize"):
+            return {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "speed_rpm": tracker.speed_rpm,
+                "samples_per_revolution": samples_per_revolution,
+                "order_resolution": order_resolution,
+                "target_orders": tracker.target_orders,
+                "orders": orders[shown].tolist(),
+                "horizontal": {
+                    "amplitudes": amplitudes[0, shown].tolist(),
+                    "features": {name: float(value[0]) for name, value in features.items()},
+                },
+                "vertical": {
+                    "amplitudes": amplitudes[1, shown].tolist(),
+                    "features": {name: float(value[1]) for name, value in features.items()},
+                },
+            }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_order_spectrum: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/order-features", response_model=Dict)
+async def get_order_feature_trends(
+    bearings: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: Optional[int] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    所有軸承（或 bearings 指定者）的階次特徵趨勢，以階次比較不同轉速的軸承。
+    已存於特徵庫的值直接讀取，其餘檔案堆疊計算後寫回（僅預設取樣率時寫回）。
+    """
+    try:
+        if stride < 1 or (max_files is not None and max_files < 1):
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
+
+        names = _split_list(bearings) or PHMBatchSpectra().list_bearings()
+        result = {"bearings": {}, "skipped": []}
+        for bearing_name in names:
+            try:
+                tracker = OrderTracker.for_bearing(bearing_name, sampling_rate=sampling_rate)
+            except ValueError:
+                # 無操作條件（轉速未知）的軸承
+                result["skipped"].append(bearing_name)
+                continue
+            trend = tracker.trend(
+                bearing_name, start, end, stride, max_files,
+                persist=sampling_rate == DEFAULT_SAMPLING_RATE
+            )
+            if trend is None:
+                result["skipped"].append(bearing_name)
+            else:
+                result["bearings"][bearing_name] = trend
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in get_order_feature_trends: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/cross-spectrum/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_cross_spectrum(
+    bearing_name: str,
+    file_number: int,
+    nperseg: int = WELCH_NPERSEG,
+    noverlap: Optional[int] = None,
+    window: str = 'hann',
+    bands: Optional[str] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    水平/垂直通道的 Welch 功率頻譜密度、交叉頻譜與相干性（magnitude-squared coherence）。
+    兩通道共用同一組加窗分段，各分段只做一次 rfft。
+    """
+    try:
+        analyzer = CrossSpectralAnalyzer(sampling_rate, nperseg, noverlap, window)
+        band_list = parse_bands(bands)
+
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        with stage("compute"):
+            result = analyzer.analyze(df['horizontal_acceleration'].values, df['vertical_acceleration'].values)
+            coherence = analyzer.band_coherence(result["frequencies"], result["coherence"], band_list)
+
+        with stage("serialize"):
+            return {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "nperseg": analyzer.nperseg,
+                "noverlap": analyzer.noverlap,
+                "window": window,
+                "frequencies": result["frequencies"].tolist(),
+                "psd_horizontal": result["psd_horizontal"].tolist(),
+                "psd_vertical": result["psd_vertical"].tolist(),
+                "csd_magnitude": np.abs(result["csd"]).tolist(),
+                "csd_phase": np.angle(result["csd"]).tolist(),
+                "coherence": result["coherence"].tolist(),
+                "band_coherence": {
+                    name: float(value) if np.isfinite(value) else None for name, value in coherence.items()
+                },
+            }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_cross_spectrum: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/coherence-trend/{bearing_name}", response_model=Dict)
+async def get_coherence_trend(
+    bearing_name: str,
+    bands: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: Optional[int] = None,
+    nperseg: int = WELCH_NPERSEG,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    全壽命水平-垂直通道相干性趨勢：各檔案的平均相干性與各頻帶平均相干性
+    （bands 格式同 band-energy-trend）。檔案堆疊後兩通道一次分段計算。
+    """
+    try:
+        if stride < 1 or (max_files is not None and max_files < 1):
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
+
+        result = CrossSpectralAnalyzer(sampling_rate, nperseg).coherence_trend(
+            bearing_name, parse_bands(bands), start, end, stride, max_files
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="No files found")
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in get_coherence_trend: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/bispectrum/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_bispectrum(
+    bearing_name: str,
+    file_number: int,
+    nfft: int = BISPECTRUM_NFFT,
+    noverlap: Optional[int] = None,
+    f_min: float = 0.0,
+    f_max: Optional[float] = None,
+    max_bins: int = BISPECTRUM_MAX_BINS,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    分段平均雙頻譜與雙相干性（主區域 f2 <= f1、f1 + f2 <= fs/2）。
+    頻率軸限制於 [f_min, f_max] 並抽取至每軸最多 max_bins 條線，
+    主區域外的格點為 null（矩陣列為 f2、行為 f1）。
+    """
+    try:
+        analyzer = BispectrumAnalyzer(sampling_rate, nfft, noverlap)
+
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        signals = df[['horizontal_acceleration', 'vertical_acceleration']].values.T
+
+        with stage("compute"):
+            result = analyzer.compute(signals, f_min, f_max, max_bins)
+
+        def as_matrix(values):
+            return [[None if np.isnan(value) else value for value in row] for row in values.tolist()]
+
+        with stage("serialize"):
+            response = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "nfft": nfft,
+                "noverlap": analyzer.noverlap,
+                "segments": result["segments"],
+                "frequencies": result["frequencies"].tolist(),
+            }
+            for index, channel in enumerate(('horizontal', 'vertical')):
+                response[channel] = {
+                    "bicoherence": as_matrix(result["bicoherence"][index]),
+                    "bispectrum": as_matrix(result["bispectrum"][index]),
+                    "peak": analyzer.peak(result["frequencies"], result["bicoherence"][index]),
+                }
+            return response
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_bispectrum: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/cepstrum/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_cepstrum(
+    bearing_name: str,
+    file_number: int,
+    kind: str = 'real',
+    max_quefrency: float = 1.0 / CEPSTRUM_MIN_SPACING,
+    lifter_cutoff: Optional[float] = None,
+    lifter_mode: str = 'low',
+    max_families: int = 5,
+    speed_rpm: Optional[float] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    倒頻譜（real / power）與諧波族偵測：倒頻率峰值對應諧波族或邊帶間距（1 / 倒頻率），
+    並與軸頻及 BPFO/BPFI/BSF/FTF 比對。lifter_cutoff（秒）指定時回傳濾波後的對數頻譜
+    （lifter_mode='low' 保留頻譜包絡，'high' 保留諧波結構）。
+    """
+    try:
+        if max_quefrency <= 0 or (lifter_cutoff is not None and lifter_cutoff <= 0):
+            raise HTTPException(status_code=400, detail="max_quefrency and lifter_cutoff must be positive")
+
+        analyzer = BearingDefectAnalyzer.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
+
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        signals = df[['horizontal_acceleration', 'vertical_acceleration']].values.T
+
+        with stage("compute"):
+            real = cepstrum(signals)
+            c = real if kind == 'real' else cepstrum(signals, kind)
+            report = analyzer.cepstrum_report(signals[0], signals[1], max_families)
+            axis = quefrencies(signals.shape[-1], sampling_rate)
+            shown = axis <= max_quefrency
+            if lifter_cutoff is not None:
+                liftered = log_spectrum(lifter(real, sampling_rate, lifter_cutoff, lifter_mode))
+
+        with stage("serialize"):
+            result = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "kind": kind,
+                "speed_rpm": analyzer.speed_rpm,
+                "defect_frequencies": analyzer.frequencies,
+                "quefrencies": axis[shown].tolist(),
+            }
+            for index, channel in enumerate(('horizontal', 'vertical')):
+                result[channel] = {"cepstrum": c[index, :len(axis)][shown].tolist(), **report[channel]}
+            if lifter_cutoff is not None:
+                result["liftered"] = {
+                    "cutoff": lifter_cutoff,
+                    "mode": lifter_mode,
+                    "frequencies": np.fft.rfftfreq(signals.shape[-1], 1.0 / sampling_rate).tolist(),
+                    "horizontal_log_magnitude": liftered[0].tolist(),
+                    "vertical_log_magnitude": liftered[1].tolist(),
+                }
+            return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_cepstrum: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/cepstrum-trend/{bearing_name}", response_model=Dict)
+async def get_cepstrum_trend(
+    bearing_name: str,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    stride: int = 1,
+    max_files: Optional[int] = None,
+    speed_rpm: Optional[float] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """
+    全壽命倒頻譜特徵趨勢：各檔案 cepstrum_<shaft/bpfo/bpfi/bsf> 與主要諧波族
+    （cepstrum_peak / cepstrum_peak_spacing）。已存於特徵庫的值直接讀取，其餘檔案
+    堆疊計算後寫回（僅使用操作條件轉速與預設取樣率時寫回）。
+    """
+    try:
+        if stride < 1 or (max_files is not None and max_files < 1):
+            raise HTTPException(status_code=400, detail="stride and max_files must be positive")
+
+        analyzer = BearingDefectAnalyzer.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
+        result = analyzer.cepstrum_trend(
+            bearing_name, start, end, stride, max_files,
+            persist=speed_rpm is None and sampling_rate == DEFAULT_SAMPLING_RATE
+        )
+        if result is None:
+            raise HTTPException(status_code=404, detail="No files found")
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in get_cepstrum_trend: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/stft/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_stft(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    window: str = 'hann',
+    nperseg: int = 256
+):
+    """計算短時傅立葉轉換（STFT）"""
+    try:
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -913,61 +1397,138 @@ async def calculate_frequency_fft(bearing_name: str, file_number: int, sampling_
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        fd = FrequencyDomain()
+        with stage("compute"):
+            tf = TimeFrequency()
 
-        # 計算低頻FM0特徵
-        horiz_fftoutput, horiz_total_fft_mgs, horiz_total_fft_bi, horiz_low_fm0 = fd.fft_fm0_si(horiz, sampling_rate)
-        vert_fftoutput, vert_total_fft_mgs, vert_total_fft_bi, vert_low_fm0 = fd.fft_fm0_si(vert, sampling_rate)
+            # 計算水平和垂直方向的 STFT
+            horiz_stft = tf.stft_analysis(horiz, fs=sampling_rate, window=window, nperseg=nperseg)
+            vert_stft = tf.stft_analysis(vert, fs=sampling_rate, window=window, nperseg=nperseg)
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "horizontal": {
-                "low_fm0": float(horiz_low_fm0),
-                "total_fft_mgs": float(horiz_total_fft_mgs),
-                "total_fft_bi": float(horiz_total_fft_bi)
-            },
-            "vertical": {
-                "low_fm0": float(vert_low_fm0),
-                "total_fft_mgs": float(vert_total_fft_mgs),
-                "total_fft_bi": float(vert_total_fft_bi)
-            },
-            "fft_spectrum": {
-                "frequencies": horiz_fftoutput['freqs'].tolist()[:500],  # 只返回前500個頻率點
-                "horizontal_magnitude": horiz_fftoutput['abs_fft_n'].tolist()[:500],
-                "vertical_magnitude": vert_fftoutput['abs_fft_n'].tolist()[:500]
+            # 限制返回的數據量（用於繪圖）
+            freq_limit = min(100, len(horiz_stft['frequencies']))
+            time_limit = min(100, len(horiz_stft['time']))
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "window": window,
+                "nperseg": nperseg,
+                "horizontal": {
+                    "np4": horiz_stft['np4'],
+                    "max_freq": horiz_stft['max_freq'],
+                    "max_time": horiz_stft['max_time'],
+                    "max_magnitude": horiz_stft['max_magnitude'],
+                    "total_energy": horiz_stft['total_energy']
+                },
+                "vertical": {
+                    "np4": vert_stft['np4'],
+                    "max_freq": vert_stft['max_freq'],
+                    "max_time": vert_stft['max_time'],
+                    "max_magnitude": vert_stft['max_magnitude'],
+                    "total_energy": vert_stft['total_energy']
+                },
+                "spectrogram_data": {
+                    "frequencies": horiz_stft['frequencies'][:freq_limit].tolist(),
+                    "time": horiz_stft['time'][:time_limit].tolist(),
+                    "horizontal_magnitude": horiz_stft['magnitude'][:freq_limit, :time_limit].tolist(),
+                    "vertical_magnitude": vert_stft['magnitude'][:freq_limit, :time_limit].tolist()
+                }
             }
-        }
 
         return features
 
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_frequency_fft: {error_detail}")
+        print(f"Error in calculate_stft: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/algorithms/frequency-tsa/{bearing_name}/{file_number}", response_model=Dict)
-async def calculate_frequency_tsa(bearing_name: str, file_number: int, sampling_rate: int = DEFAULT_SAMPLING_RATE):
-    """計算TSA高頻FFT特徵（FM0）"""
+@app.get("/api/algorithms/cwt/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_cwt(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    wavelet: str = 'morl'
+):
+    """計算連續小波轉換（CWT）"""
     try:
-        import sqlite3
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
 
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
+        horiz = df['horizontal_acceleration'].values
+        vert = df['vertical_acceleration'].values
 
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("compute"):
+            tf = TimeFrequency()
+
+            # 計算 CWT
+            scales = np.arange(1, 65)
+            horiz_cwt = tf.cwt_analysis(horiz, fs=sampling_rate, wavelet=wavelet, scales=scales)
+            vert_cwt = tf.cwt_analysis(vert, fs=sampling_rate, wavelet=wavelet, scales=scales)
+
+            # 限制返回的數據量
+            scale_limit = min(64, len(scales))
+            time_limit = min(500, horiz_cwt['magnitude'].shape[1])
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "wavelet": wavelet,
+                "horizontal": {
+                    "np4": horiz_cwt['np4'],
+                    "max_scale": horiz_cwt['max_scale'],
+                    "max_freq": horiz_cwt['max_freq'],
+                    "total_energy": horiz_cwt['total_energy'],
+                    "energy_per_scale": horiz_cwt['energy_per_scale'].tolist()
+                },
+                "vertical": {
+                    "np4": vert_cwt['np4'],
+                    "max_scale": vert_cwt['max_scale'],
+                    "max_freq": vert_cwt['max_freq'],
+                    "total_energy": vert_cwt['total_energy'],
+                    "energy_per_scale": vert_cwt['energy_per_scale'].tolist()
+                },
+                "cwt_data": {
+                    "scales": scales[:scale_limit].tolist(),
+                    "frequencies": horiz_cwt['frequencies'][:scale_limit].tolist(),
+                    "horizontal_magnitude": horiz_cwt['magnitude'][:scale_limit, :time_limit].tolist(),
+                    "vertical_magnitude": vert_cwt['magnitude'][:scale_limit, :time_limit].tolist()
+                }
+            }
+
+        return features
+
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_cwt: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/higher-order/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_higher_order_stats(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    segment_count: int = 10
+):
+    """
+    計算高階統計特徵 (已整合至進階濾波特徵)
+
+    此端點已整合至 /api/algorithms/filter-features
+    為了向後兼容性保留，內部委託給 FilterProcess
+    """
+    try:
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -975,41 +1536,284 @@ async def calculate_frequency_tsa(bearing_name: str, file_number: int, sampling_
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        fd = FrequencyDomain()
+        with stage("compute"):
+            # 使用 FilterProcess 的統一實現（更精確）
+            horiz_stats = FilterProcess.calculate_all_features(horiz, sampling_rate, segment_count)
+            vert_stats = FilterProcess.calculate_all_features(vert, sampling_rate, segment_count)
 
-        # 首先計算基本FFT（用於TSA）
-        horiz_fftoutput, _, _, horiz_low_fm0 = fd.fft_fm0_si(horiz, sampling_rate)
-        vert_fftoutput, _, _, vert_low_fm0 = fd.fft_fm0_si(vert, sampling_rate)
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "data_points": len(df),
+                "sampling_rate": sampling_rate,
+                "segment_count": segment_count,
+                "horizontal": horiz_stats,
+                "vertical": vert_stats,
+                "_note": "此 API 已整合至 /api/algorithms/filter-features，建議使用該端點"
+            }
 
-        # 計算TSA高頻特徵
-        horiz_tsa_fftoutput, horiz_total_tsa_fft_mgs, horiz_total_tsa_fft_bi, horiz_high_fm0 = fd.tsa_fft_fm0_slf(horiz, sampling_rate, horiz_fftoutput)
-        vert_tsa_fftoutput, vert_total_tsa_fft_mgs, vert_total_tsa_fft_bi, vert_high_fm0 = fd.tsa_fft_fm0_slf(vert, sampling_rate, vert_fftoutput)
+        return features
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "sampling_rate": sampling_rate,
-            "horizontal": {
-                "low_fm0": float(horiz_low_fm0),
-                "high_fm0": float(horiz_high_fm0),
-                "total_tsa_fft_mgs": float(horiz_total_tsa_fft_mgs),
-                "total_tsa_fft_bi": float(horiz_total_tsa_fft_bi)
-            },
-            "vertical": {
-                "low_fm0": float(vert_low_fm0),
-                "high_fm0": float(vert_high_fm0),
-                "total_tsa_fft_mgs": float(vert_total_tsa_fft_mgs),
-                "total_tsa_fft_bi": float(vert_total_tsa_fft_bi)
-            },
-            "tsa_spectrum": {
-                "frequencies": horiz_tsa_fftoutput['multiply_freqs'].tolist()[:500],  # 只返回前500個頻率點
-                "horizontal_magnitude": horiz_tsa_fftoutput['tsa_abs_fft_n'].tolist()[:500],
-                "vertical_magnitude": vert_tsa_fftoutput['tsa_abs_fft_n'].tolist()[:500]
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_higher_order_stats: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/spectrogram/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_spectrogram(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """計算頻譜圖"""
+    try:
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        horiz = df['horizontal_acceleration'].values
+        vert = df['vertical_acceleration'].values
+
+        with stage("compute"):
+            tf = TimeFrequency()
+
+            # 計算頻譜圖
+            horiz_spec = tf.spectrogram_features(horiz, fs=sampling_rate)
+            vert_spec = tf.spectrogram_features(vert, fs=sampling_rate)
+
+            # 限制返回的數據量
+            freq_limit = min(100, len(horiz_spec['frequencies']))
+            time_limit = min(100, len(horiz_spec['time']))
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "horizontal": {
+                    "mean_power": horiz_spec['mean_power'],
+                    "max_power": horiz_spec['max_power'],
+                    "std_power": horiz_spec['std_power'],
+                    "peak_freq": horiz_spec['peak_freq'],
+                    "peak_time": horiz_spec['peak_time']
+                },
+                "vertical": {
+                    "mean_power": vert_spec['mean_power'],
+                    "max_power": vert_spec['max_power'],
+                    "std_power": vert_spec['std_power'],
+                    "peak_freq": vert_spec['peak_freq'],
+                    "peak_time": vert_spec['peak_time']
+                },
+                "spectrogram_data": {
+                    "frequencies": horiz_spec['frequencies'][:freq_limit].tolist(),
+                    "time": horiz_spec['time'][:time_limit].tolist(),
+                    "horizontal_power_db": horiz_spec['power_db'][:freq_limit, :time_limit].tolist(),
+                    "vertical_power_db": vert_spec['power_db'][:freq_limit, :time_limit].tolist()
+                }
             }
-        }
 
         return features
 
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_spectrogram: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/frequency-fft/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_frequency_fft(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    zoom_resolution: Optional[float] = None,
+    harmonic_search: str = 'loop'
+):
+    """
+    計算低頻FFT特徵（FM0），並以zoom FFT細分mortor gear / belt頻帶（narrowband）
+    harmonic_search='cepstrum' 時以倒頻譜定位諧波族取代逐倍數搜尋
+    """
+    try:
+        if harmonic_search not in HARMONIC_SEARCH_METHODS:
+            raise HTTPException(status_code=400, detail=f"harmonic_search must be one of {HARMONIC_SEARCH_METHODS}")
+        # 解析度過細時 ZoomFFT 點數暴增且留在快取中；過粗時峰值搜尋視窗內沒有格點
+        if zoom_resolution is not None and not NARROWBAND_MIN_RESOLUTION <= zoom_resolution <= NARROWBAND_MAX_RESOLUTION:
+            raise HTTPException(
+                status_code=400,
+                detail=f"zoom_resolution must be between {NARROWBAND_MIN_RESOLUTION} and {NARROWBAND_MAX_RESOLUTION} Hz"
+            )
+
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
+
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        horiz = df['horizontal_acceleration'].values
+        vert = df['vertical_acceleration'].values
+
+        with stage("compute"):
+            fd = FrequencyDomain()
+
+            # 計算低頻FM0特徵
+            horiz_fftoutput, horiz_total_fft_mgs, horiz_total_fft_bi, horiz_low_fm0 = fd.fft_fm0_si(horiz, sampling_rate, harmonic_search)
+            vert_fftoutput, vert_total_fft_mgs, vert_total_fft_bi, vert_low_fm0 = fd.fft_fm0_si(vert, sampling_rate, harmonic_search)
+
+        with stage("narrowband"):
+            narrowband = {}
+            for channel, signal in (("horizontal", horiz), ("vertical", vert)):
+                bands, total_fft_mgs, total_fft_bi, low_fm0 = fd.zoom_fm0_si(signal, sampling_rate, zoom_resolution)
+                narrowband[channel] = {
+                    "low_fm0": float(low_fm0),
+                    "total_fft_mgs": float(total_fft_mgs),
+                    "total_fft_bi": float(total_fft_bi),
+                    "bands": {
+                        name: {
+                            "peak_frequency": band["peak_frequency"],
+                            "peak_amplitude": band["peak_amplitude"],
+                            "frequencies": band["frequencies"].tolist(),
+                            "magnitude": band["amplitudes"].tolist()
+                        }
+                        for name, band in bands.items()
+                    }
+                }
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "harmonic_search": harmonic_search,
+                "horizontal": {
+                    "low_fm0": float(horiz_low_fm0),
+                    "total_fft_mgs": float(horiz_total_fft_mgs),
+                    "total_fft_bi": float(horiz_total_fft_bi)
+                },
+                "vertical": {
+                    "low_fm0": float(vert_low_fm0),
+                    "total_fft_mgs": float(vert_total_fft_mgs),
+                    "total_fft_bi": float(vert_total_fft_bi)
+                },
+                "fft_spectrum": {
+                    "frequencies": horiz_fftoutput['freqs'].tolist()[:500],  # 只返回前500個頻率點
+                    "horizontal_magnitude": horiz_fftoutput['abs_fft_n'].tolist()[:500],
+                    "vertical_magnitude": vert_fftoutput['abs_fft_n'].tolist()[:500]
+                },
+                "narrowband": {
+                    "resolution": zoom_resolution or NARROWBAND_RESOLUTION,
+                    **narrowband
+                }
+            }
+
+        return features
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_frequency_fft: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/algorithms/frequency-tsa/{bearing_name}/{file_number}", response_model=Dict)
+async def calculate_frequency_tsa(
+    bearing_name: str,
+    file_number: int,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    files: int = 1,
+    speed_rpm: Optional[float] = None,
+    harmonic_search: str = 'loop'
+):
+    """
+    計算TSA高頻FFT特徵（FM0）
+    TSA 依操作條件轉速（無操作條件的軸承為 TSA_DEFAULT_SPEED_RPM）做角度域重取樣後逐轉平均；files > 1 時再平均
+    file_number 之前共 files 個檔案（各檔 TSA 先以相關性對齊）以提高訊雜比。
+    harmonic_search='cepstrum' 時以倒頻譜定位諧波族取代逐倍數搜尋。
+    """
+    try:
+        if files < 1:
+            raise HTTPException(status_code=400, detail="files must be positive")
+        if harmonic_search not in HARMONIC_SEARCH_METHODS:
+            raise HTTPException(status_code=400, detail=f"harmonic_search must be one of {HARMONIC_SEARCH_METHODS}")
+
+        averager = TimeSynchronousAverager.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
+
+        with stage("load"):
+            batch = PHMBatchSpectra(sampling_rate=sampling_rate)
+            selected = batch.list_files(bearing_name, file_number - files + 1, file_number)
+            numbers, horiz_files, vert_files = batch.stacked_signals(selected)
+
+        if not numbers or numbers[-1] != file_number:
+            raise HTTPException(status_code=404, detail="No data found")
+
+        horiz = horiz_files[-1]
+        vert = vert_files[-1]
+
+        with stage("compute"):
+            fd = FrequencyDomain()
+
+            # 原始訊號的低頻FM0
+            _, _, _, horiz_low_fm0 = fd.fft_fm0_si(horiz, sampling_rate, harmonic_search)
+            _, _, _, vert_low_fm0 = fd.fft_fm0_si(vert, sampling_rate, harmonic_search)
+
+            # 時域同步平均（TSA），取樣率 tsa_fs 使頻譜直接以 Hz 表示
+            horiz_tsa = averager.average_files(horiz_files, len(numbers), len(numbers))[1][0]
+            vert_tsa = averager.average_files(vert_files, len(numbers), len(numbers))[1][0]
+
+            # 計算TSA高頻特徵
+            horiz_tsa_fftoutput, horiz_total_tsa_fft_mgs, horiz_total_tsa_fft_bi, horiz_high_fm0 = fd.tsa_fft_fm0_slf(
+                horiz_tsa, averager.tsa_fs, harmonic_search=harmonic_search
+            )
+            vert_tsa_fftoutput, vert_total_tsa_fft_mgs, vert_total_tsa_fft_bi, vert_high_fm0 = fd.tsa_fft_fm0_slf(
+                vert_tsa, averager.tsa_fs, harmonic_search=harmonic_search
+            )
+
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "sampling_rate": sampling_rate,
+                "harmonic_search": harmonic_search,
+                "tsa": {
+                    "speed_rpm": averager.speed_rpm,
+                    "samples_per_revolution": averager.samples_per_revolution,
+                    "tsa_fs": averager.tsa_fs,
+                    "revolutions_per_file": int(averager.revolutions(horiz).shape[-2]),
+                    "files": numbers,
+                    "horizontal": horiz_tsa.tolist(),
+                    "vertical": vert_tsa.tolist()
+                },
+                "horizontal": {
+                    "low_fm0": float(horiz_low_fm0),
+                    "high_fm0": float(horiz_high_fm0),
+                    "total_tsa_fft_mgs": float(horiz_total_tsa_fft_mgs),
+                    "total_tsa_fft_bi": float(horiz_total_tsa_fft_bi)
+                },
+                "vertical": {
+                    "low_fm0": float(vert_low_fm0),
+                    "high_fm0": float(vert_high_fm0),
+                    "total_tsa_fft_mgs": float(vert_total_tsa_fft_mgs),
+                    "total_tsa_fft_bi": float(vert_total_tsa_fft_bi)
+                },
+                "tsa_spectrum": {
+                    "frequencies": horiz_tsa_fftoutput['multiply_freqs'].tolist()[:500],  # 只返回前500個頻率點
+                    "horizontal_magnitude": horiz_tsa_fftoutput['tsa_abs_fft_n'].tolist()[:500],
+                    "vertical_magnitude": vert_tsa_fftoutput['tsa_abs_fft_n'].tolist()[:500]
+                }
+            }
+
+        return features
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
@@ -1017,6 +1821,67 @@ async def calculate_frequency_tsa(bearing_name: str, file_number: int, sampling_
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/algorithms/tsa-trend/{bearing_name}", response_model=Dict)
+async def get_tsa_trend(
+    bearing_name: str,
+    window: int = 10,
+    step: int = 5,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE,
+    speed_rpm: Optional[float] = None,
+    harmonic_search: str = 'loop'
+):
+    """
+    全壽命TSA高頻特徵趨勢：每 step 個檔案取一個視窗，平均視窗內 window 個檔案的 TSA
+    （step < window 時視窗重疊），再計算 high_fm0 與 motor gear / belt 邊帶特徵。
+    轉速同 frequency-tsa（speed_rpm、操作條件或 TSA_DEFAULT_SPEED_RPM）。
+    """
+    try:
+        if harmonic_search not in HARMONIC_SEARCH_METHODS:
+            raise HTTPException(status_code=400, detail=f"harmonic_search must be one of {HARMONIC_SEARCH_METHODS}")
+
+        averager = TimeSynchronousAverager.for_bearing(bearing_name, speed_rpm, sampling_rate=sampling_rate)
+
+        with stage("load"):
+            batch = PHMBatchSpectra(sampling_rate=sampling_rate)
+            numbers, horiz_files, vert_files = batch.stacked_signals(batch.list_files(bearing_name, start, end))
+
+        if not numbers:
+            raise HTTPException(status_code=404, detail="No files found")
+
+        with stage("compute"):
+            fd = FrequencyDomain()
+            result = {
+                "bearing_name": bearing_name,
+                "speed_rpm": averager.speed_rpm,
+                "window": window,
+                "step": step,
+                "harmonic_search": harmonic_search,
+            }
+            for channel, signals in (('horizontal', horiz_files), ('vertical', vert_files)):
+                ends, averages = averager.average_files(signals, window, step)
+                values = [fd.tsa_fft_fm0_slf(tsa, averager.tsa_fs, harmonic_search=harmonic_search)[1:] for tsa in averages]
+                result["file_numbers"] = [numbers[i] for i in ends]
+                result[channel] = {
+                    "total_tsa_fft_mgs": [float(v[0]) for v in values],
+                    "total_tsa_fft_bi": [float(v[1]) for v in values],
+                    "high_fm0": [float(v[2]) for v in values],
+                }
+
+        return result
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in get_tsa_trend: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/algorithms/hilbert/{bearing_name}/{file_number}", response_model=Dict)
 async def calculate_hilbert_transform(
     bearing_name: str,
@@ -1025,21 +1890,8 @@ async def calculate_hilbert_transform(
 ):
     """計算希爾伯特轉換特徵（包絡分析與NB4）"""
     try:
-        import sqlite3
-
-        # 連接資料庫（使用全域配置）
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -1047,45 +1899,47 @@ async def calculate_hilbert_transform(
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        ht = HilbertTransform()
+        with stage("compute"):
+            ht = HilbertTransform()
 
-        # 計算水平和垂直方向的希爾伯特轉換
-        horiz_result = ht.analyze_signal(horiz, segment_count)
-        vert_result = ht.analyze_signal(vert, segment_count)
+            # 計算水平和垂直方向的希爾伯特轉換
+            horiz_result = ht.analyze_signal(horiz, segment_count)
+            vert_result = ht.analyze_signal(vert, segment_count)
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "data_points": len(df),
-            "segment_count": segment_count,
-            "horizontal": {
-                "nb4": float(horiz_result['nb4']),
-                "envelope_mean": float(horiz_result['envelope_stats']['mean']),
-                "envelope_std": float(horiz_result['envelope_stats']['std']),
-                "envelope_max": float(horiz_result['envelope_stats']['max']),
-                "envelope_min": float(horiz_result['envelope_stats']['min']),
-                "envelope_rms": float(horiz_result['envelope_stats']['rms']),
-                "envelope_peak_to_peak": float(horiz_result['envelope_stats']['peak_to_peak'])
-            },
-            "vertical": {
-                "nb4": float(vert_result['nb4']),
-                "envelope_mean": float(vert_result['envelope_stats']['mean']),
-                "envelope_std": float(vert_result['envelope_stats']['std']),
-                "envelope_max": float(vert_result['envelope_stats']['max']),
-                "envelope_min": float(vert_result['envelope_stats']['min']),
-                "envelope_rms": float(vert_result['envelope_stats']['rms']),
-                "envelope_peak_to_peak": float(vert_result['envelope_stats']['peak_to_peak'])
-            },
-            "envelope_data": {
-                "horizontal": horiz_result['envelope'][:1000].tolist(),
-                "vertical": vert_result['envelope'][:1000].tolist(),
-                "time": list(range(min(1000, len(horiz_result['envelope']))))
-            },
-            "instantaneous_frequency": {
-                "horizontal": horiz_result['instantaneous_frequency'][:1000].tolist(),
-                "vertical": vert_result['instantaneous_frequency'][:1000].tolist()
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "data_points": len(df),
+                "segment_count": segment_count,
+                "horizontal": {
+                    "nb4": float(horiz_result['nb4']),
+                    "envelope_mean": float(horiz_result['envelope_stats']['mean']),
+                    "envelope_std": float(horiz_result['envelope_stats']['std']),
+                    "envelope_max": float(horiz_result['envelope_stats']['max']),
+                    "envelope_min": float(horiz_result['envelope_stats']['min']),
+                    "envelope_rms": float(horiz_result['envelope_stats']['rms']),
+                    "envelope_peak_to_peak": float(horiz_result['envelope_stats']['peak_to_peak'])
+                },
+                "vertical": {
+                    "nb4": float(vert_result['nb4']),
+                    "envelope_mean": float(vert_result['envelope_stats']['mean']),
+                    "envelope_std": float(vert_result['envelope_stats']['std']),
+                    "envelope_max": float(vert_result['envelope_stats']['max']),
+                    "envelope_min": float(vert_result['envelope_stats']['min']),
+                    "envelope_rms": float(vert_result['envelope_stats']['rms']),
+                    "envelope_peak_to_peak": float(vert_result['envelope_stats']['peak_to_peak'])
+                },
+                "envelope_data": {
+                    "horizontal": horiz_result['envelope'][:1000].tolist(),
+                    "vertical": vert_result['envelope'][:1000].tolist(),
+                    "time": list(range(min(1000, len(horiz_result['envelope']))))
+                },
+                "instantaneous_frequency": {
+                    "horizontal": horiz_result['instantaneous_frequency'][:1000].tolist(),
+                    "vertical": vert_result['instantaneous_frequency'][:1000].tolist()
+                }
             }
-        }
 
         return features
 
@@ -1110,21 +1964,8 @@ async def calculate_filter_features(
 ):
     """計算進階濾波特徵 (NA4, FM4, M6A, M8A, ER)"""
     try:
-        import sqlite3
-
-        # 連接資料庫
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
-
-        query = """
-        SELECT m.horizontal_acceleration, m.vertical_acceleration
-        FROM measurements m
-        JOIN measurement_files mf ON m.file_id = mf.file_id
-        JOIN bearings b ON mf.bearing_id = b.bearing_id
-        WHERE b.bearing_name = ? AND mf.file_number = ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=(bearing_name, file_number))
-        conn.close()
+        with stage("load"):
+            df = load_bearing_file(bearing_name, file_number)
 
         if df.empty:
             raise HTTPException(status_code=404, detail="No data found")
@@ -1132,23 +1973,25 @@ async def calculate_filter_features(
         horiz = df['horizontal_acceleration'].values
         vert = df['vertical_acceleration'].values
 
-        # 計算水平和垂直方向的進階特徵
-        horiz_features = FilterProcess.calculate_all_features(
-            horiz, sampling_rate, segment_count
-        )
-        vert_features = FilterProcess.calculate_all_features(
-            vert, sampling_rate, segment_count
-        )
+        with stage("compute"):
+            # 計算水平和垂直方向的進階特徵
+            horiz_features = FilterProcess.calculate_all_features(
+                horiz, sampling_rate, segment_count
+            )
+            vert_features = FilterProcess.calculate_all_features(
+                vert, sampling_rate, segment_count
+            )
 
-        features = {
-            "bearing_name": bearing_name,
-            "file_number": file_number,
-            "data_points": len(df),
-            "sampling_rate": sampling_rate,
-            "segment_count": segment_count,
-            "horizontal": horiz_features,
-            "vertical": vert_features
-        }
+        with stage("serialize"):
+            features = {
+                "bearing_name": bearing_name,
+                "file_number": file_number,
+                "data_points": len(df),
+                "sampling_rate": sampling_rate,
+                "segment_count": segment_count,
+                "horizontal": horiz_features,
+                "vertical": vert_features
+            }
 
         return features
 
@@ -1165,92 +2008,209 @@ async def calculate_filter_trend(
     max_files: int = 50,
     sampling_rate: int = DEFAULT_SAMPLING_RATE
 ):
-    """計算進階濾波特徵趨勢（多個檔案）"""
+    """計算進階濾波特徵趨勢（多個檔案，讀取特徵庫中已計算的數值）"""
     try:
-        import sqlite3
+        # 特徵庫以預設採樣率計算；其他採樣率只即時計算不寫回
+        store = PHMFeatureStore(sampling_rate=sampling_rate)
+        with stage("compute"):
+            trend_data = store.get_trend(
+                bearing_name,
+                TREND_FEATURES['filter'],
+                max_files,
+                persist=(sampling_rate == DEFAULT_SAMPLING_RATE)
+            )
 
-        # 連接資料庫
-        conn = sqlite3.connect(PHM_DATABASE_PATH)
+        if trend_data is None:
+            raise HTTPException(status_code=404, detail="No files found")
 
-        # 獲取檔案列表
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT mf.file_number, mf.file_id
-            FROM measurement_files mf
-            JOIN bearings b ON mf.bearing_id = b.bearing_id
-            WHERE b.bearing_name = ?
-            ORDER BY mf.file_number
-            LIMIT ?
-        """, (bearing_name, max_files))
+        return trend_data
 
-        files = cursor.fetchall()
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in calculate_filter_trend: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        if not files:
-            raise HTTPException(status_code=404, detail="No files found")
 
-        trend_data = {
-            "bearing_name": bearing_name,
-            "file_count": len(files),
-            "horizontal": {
-                "na4": [],
-                "fm4": [],
-                "m6a": [],
-                "m8a": [],
-                "er": []
-            },
-            "vertical": {
-                "na4": [],
-                "fm4": [],
-                "m6a": [],
-                "m8a": [],
-                "er": []
-            },
-            "file_numbers": []
-        }
+# ==================== Feature Export API Endpoints ====================
 
-        for file_num, file_id in files:
-            # 查詢該檔案的數據
-            query = f"""
-            SELECT horizontal_acceleration, vertical_acceleration
-            FROM measurements
-            WHERE file_id = {file_id}
-            """
-            df = pd.read_sql_query(query, conn)
-
-            if not df.empty:
-                horiz = df['horizontal_acceleration'].values
-                vert = df['vertical_acceleration'].values
-
-                horiz_features = FilterProcess.calculate_all_features(
-                    horiz, sampling_rate
-                )
-                vert_features = FilterProcess.calculate_all_features(
-                    vert, sampling_rate
-                )
+def _split_list(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated query parameter -> list (None when empty)."""
+    items = [item.strip() for item in (value or '').split(',') if item.strip()]
+    return items or None
 
-                trend_data["file_numbers"].append(file_num)
-                trend_data["horizontal"]["na4"].append(horiz_features["na4"])
-                trend_data["horizontal"]["fm4"].append(horiz_features["fm4"])
-                trend_data["horizontal"]["m6a"].append(horiz_features["m6a"])
-                trend_data["horizontal"]["m8a"].append(horiz_features["m8a"])
-                trend_data["horizontal"]["er"].append(horiz_features["er"])
 
-                trend_data["vertical"]["na4"].append(vert_features["na4"])
-                trend_data["vertical"]["fm4"].append(vert_features["fm4"])
-                trend_data["vertical"]["m6a"].append(vert_features["m6a"])
-                trend_data["vertical"]["m8a"].append(vert_features["m8a"])
-                trend_data["vertical"]["er"].append(vert_features["er"])
+@app.post("/api/features/export", response_model=Dict)
+async def export_feature_store(format: str = 'parquet', bearings: Optional[str] = None):
+    """將特徵庫匯出為 Parquet / Arrow 檔（每個檔案一列，<channel>_<feature> 欄位）"""
+    try:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
 
-        conn.close()
-        return trend_data
+        with stage("export"):
+            return PHMFeatureExporter().export(output_format=format, bearings=_split_list(bearings))
 
+    except HTTPException:
+        raise
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"Error in calculate_filter_trend: {error_detail}")
+        print(f"Error in export_feature_store: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/features/query", response_model=Dict)
+async def query_feature_store(
+    format: str = 'parquet',
+    columns: Optional[str] = None,
+    bearings: Optional[str] = None,
+    file_start: Optional[int] = None,
+    file_end: Optional[int] = None
+):
+    """
+    查詢已匯出的特徵檔（只讀取指定欄位，依軸承與檔案範圍過濾）
+
+    回傳欄式 JSON：{"columns": {"bearing_name": [...], "file_number": [...], "horizontal_rms": [...]}}
+    """
+    try:
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+
+        path = export_path(format)
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail="Feature store has not been exported")
+
+        with stage("query"):
+            table = query_features(path, _split_list(columns), _split_list(bearings), file_start, file_end)
+        with stage("serialize"):
+            data = table.to_pydict()
+
+        return {"path": str(path), "rows": table.num_rows, "columns": data}
+
+    except HTTPException:
+        raise
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in query_feature_store: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== Background Jobs API Endpoints ====================
+
+@app.post("/api/jobs", response_model=Dict)
+async def submit_job(request: JobRequest):
+    """提交整個軸承的背景分析工作（cwt / stft / filter / hilbert），相同工作會重複使用"""
+    try:
+        job, created = PHMJobQueue().submit(
+            request.job_type, request.bearing_name, request.params, request.sampling_rate
+        )
+        job["deduplicated"] = not created
+        return job
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in submit_job: {error_detail}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/jobs", response_model=Dict)
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """列出最近的背景工作"""
+    try:
+        return {"jobs": PHMJobQueue().list_jobs(status, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/jobs/{job_id}", response_model=Dict)
+async def get_job(job_id: int, include_results: bool = True):
+    """查詢背景工作進度與各檔案結果"""
+    try:
+        job = PHMJobQueue().get(job_id, include_results)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=Dict)
+async def cancel_job(job_id: int):
+    """取消背景工作（排隊中立即取消，執行中於目前檔案完成後停止）"""
+    try:
+        job = PHMJobQueue().cancel(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        return job
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ==================== Streaming (Server-Sent Events) ====================
+
+@app.get("/api/stream/trend/{bearing_name}")
+async def stream_feature_trend(
+    request: Request,
+    bearing_name: str,
+    family: str = "filter",
+    max_files: int = 50,
+    sampling_rate: int = DEFAULT_SAMPLING_RATE
+):
+    """以 SSE 逐檔推送特徵趨勢（start → point × N → done），可漸進繪圖"""
+    try:
+        if family not in TREND_FEATURES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown feature family: {family} (available: {', '.join(TREND_FEATURES)})"
+            )
+
+        store = PHMFeatureStore(sampling_rate=sampling_rate)
+        files = store.list_trend_files(bearing_name, max_files)
+        if not files:
+            raise HTTPException(status_code=404, detail="No files found")
+
+        stream = trend_event_stream(
+            request, store, bearing_name, family, TREND_FEATURES[family], files,
+            persist=(sampling_rate == DEFAULT_SAMPLING_RATE)
+        )
+        return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        error_detail = f"{str(e)}\n{traceback.format_exc()}"
+        print(f"Error in stream_feature_trend: {error_detail}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/stream/features")
+async def stream_feature_events(request: Request, bearing_name: Optional[str] = None):
+    """以 SSE 推送即時匯入的新特徵點（可依軸承過濾）"""
+    stream = feature_event_stream(request, feature_events, bearing_name)
+    return StreamingResponse(stream, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 # ==================== Temperature Data API Endpoints ====================
 
 # Initialize temperature query instance
@@ -0,0 +1,126 @@
+"""
+Narrowband Spectrum Module
+Evaluates the spectrum only inside narrow frequency bands with the
+chirp-z transform (scipy.signal.ZoomFFT). A 2,560-sample record at
+25.6 kHz has a 10 Hz FFT bin spacing, so the ±1.664 Hz windows around
+`mortor_gear` and `belt_si` contain at most one bin. The zoom transform
+samples the same spectrum on a fine grid (InitParameter.zoom_resolution)
+at a cost of one FFT of about n + m points per band, instead of
+zero-padding the whole record to that resolution. The grid interpolates
+the spectrum of the record; peaks closer than fs / n remain unresolved.
+
+Amplitudes use the `abs_fft_n` scaling of FrequencyDomain.fft_process
+(|X| * 2 / N).
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy.signal import ZoomFFT
+
+try:
+    from backend.initialization import InitParameter
+except ModuleNotFoundError:
+    from initialization import InitParameter
+
+ip = InitParameter()
+
+DEFAULT_RESOLUTION = ip.zoom_resolution  # Hz
+MIN_RESOLUTION = 0.001  # Hz；更細的格點使 ZoomFFT 點數過多（且常駐於快取）
+MAX_RESOLUTION = ip.side_band_range  # Hz；格點須落在 ± side_band_range 的峰值搜尋視窗內
+
+
+@lru_cache(maxsize=256)
+def _zoom_transform(n: int, f_low: float, f_high: float, points: int, fs: float) -> ZoomFFT:
+    """Chirp-z transform of an n-sample record onto `points` frequencies (cached)."""
+    return ZoomFFT(n, [f_low, f_high], m=points, fs=fs, endpoint=True)
+
+
+class NarrowbandSpectrum:
+    """Zoom-FFT amplitude spectra of narrow bands."""
+
+    def __init__(self, fs: float, resolution: float = DEFAULT_RESOLUTION):
+        if not MIN_RESOLUTION <= resolution <= MAX_RESOLUTION:
+            raise ValueError(f"resolution must be between {MIN_RESOLUTION} and {MAX_RESOLUTION} Hz")
+        self.fs = fs
+        self.resolution = resolution
+
+    def _grid(self, f_low: float, f_high: float) -> Tuple[float, float, int]:
+        """Snap a band to the resolution grid so repeated bands share a transform."""
+        low = max(np.floor(f_low / self.resolution) * self.resolution, 0.0)
+        high = min(np.ceil(f_high / self.resolution) * self.resolution, self.fs / 2)
+        points = int(round((high - low) / self.resolution)) + 1
+        return round(low, 9), round(high, 9), max(points, 2)
+
+    def band(self, amp: np.ndarray, f_low: float, f_high: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Amplitude spectrum of one band.
+
+        Args:
+            amp: Signal (n_samples,) or batched (n_signals, n_samples)
+            f_low: Lower band edge (Hz)
+            f_high: Upper band edge (Hz)
+
+        Returns:
+            (frequencies, amplitudes); amplitudes have shape (..., n_points)
+        """
+        amp = np.asarray(amp, dtype=float)
+        n = amp.shape[-1]
+        low, high, points = self._grid(f_low, f_high)
+        spectrum = _zoom_transform(n, low, high, points, float(self.fs))(amp, axis=-1)
+        frequencies = np.linspace(low, high, points)
+        return frequencies, np.abs(spectrum) * 2 / n
+
+    def peak(self, amp: np.ndarray, center: float, half_width: float) -> Tuple[float, float]:
+        """(frequency, amplitude) of the largest component within center ± half_width."""
+        frequencies, amplitudes = self.band(amp, center - half_width, center + half_width)
+        index = int(np.argmax(amplitudes))
+        return float(frequencies[index]), float(amplitudes[index])
+
+    def sideband_mean(self, amp: np.ndarray, center: float, search_range: float, sideband_range: float) -> Dict:
+        """
+        Peak near `center` and the mean amplitude of its sidebands.
+
+        The peak is searched within center ± search_range; the sidebands
+        are the points within ± sideband_range of the peak, excluding the
+        peak itself (the windows of FrequencyDomain.fft_fm0_si).
+
+        Returns:
+            {"peak_frequency", "peak_amplitude", "sideband_mean", "frequencies", "amplitudes"}
+        """
+        half_width = search_range + sideband_range
+        frequencies, amplitudes = self.band(amp, center - half_width, center + half_width)
+
+        search = np.abs(frequencies - center) <= search_range
+        index = int(np.flatnonzero(search)[np.argmax(amplitudes[search])])
+        peak_frequency = frequencies[index]
+
+        sidebands = np.abs(frequencies - peak_frequency) <= sideband_range
+        sidebands[index] = False
+        sideband_mean = float(np.mean(amplitudes[sidebands])) if sidebands.any() else 0.0
+
+        return {
+            "peak_frequency": float(peak_frequency),
+            "peak_amplitude": float(amplitudes[index]),
+            "sideband_mean": sideband_mean,
+            "frequencies": frequencies,
+            "amplitudes": amplitudes,
+        }
+
+    def harmonic_sum(self, amp: np.ndarray) -> float:
+        """
+        Sum of the largest components at 0.25x .. 2.5x the motor peak.
+
+        Narrowband counterpart of HarmonicSildband.Harmonic: the motor peak
+        is searched within mortor ± side_band_range and each multiple
+        within ± harmonic_gmf_range.
+        """
+        motor_frequency, _ = self.peak(amp, ip.mortor, ip.side_band_range)
+        total = 0.0
+        for multiple in np.arange(0.25, 2.75, 0.25):
+            center = motor_frequency * multiple
+            if center + ip.harmonic_gmf_range > self.fs / 2:
+                continue
+            total += self.peak(amp, center, ip.harmonic_gmf_range)[1]
+        return total
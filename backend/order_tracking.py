@@ -0,0 +1,216 @@
+"""
+Order Tracking Module
+Resamples vibration signals from the time domain to the shaft-angle domain
+(a fixed number of samples per revolution), using the speed of each
+bearing's operating condition. In the angle domain a component tied to the
+shaft keeps its order (cycles per revolution) at 1500, 1650 and 1800 rpm,
+so spectra of different bearings share one axis.
+
+The speed is constant per condition, so the interpolation plan (source
+indices and 4-point cubic Lagrange weights) only depends on the signal
+length and speed and is cached; resampling a block of stacked signals is
+one gather and one weighted sum. Order spectra use a fixed FFT length of
+samples_per_revolution / order_resolution (Hann window, zero-padded, or
+averaged over segments for long records), so every speed yields the same
+order bins.
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import DEFAULT_SAMPLING_RATE, ORDER_SAMPLES_PER_REVOLUTION, ORDER_RESOLUTION
+    from backend.bearing_defects import bearing_speed, defect_frequencies
+    from backend.phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra
+except ModuleNotFoundError:
+    from config import DEFAULT_SAMPLING_RATE, ORDER_SAMPLES_PER_REVOLUTION, ORDER_RESOLUTION
+    from bearing_defects import bearing_speed, defect_frequencies
+    from phm_batch_spectra import DEFAULT_BLOCK_SIZE, PHMBatchSpectra
+
+
+ORDER_FEATURES = ['order_1x', 'order_2x', 'order_3x', 'order_bpfo', 'order_bpfi', 'order_bsf']
+
+
+@lru_cache(maxsize=64)
+def resampling_plan(
+    n_samples: int,
+    speed_rpm: float,
+    fs: float,
+    samples_per_revolution: int,
+    full_record: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cubic interpolation plan from time samples to equal shaft angles.
+
+    Angle samples are taken at positions 0, step, 2 step, ... up to the
+    last time sample (n_samples - 1), so no position lies past the record;
+    at the first and last samples the 4-point stencil is clamped to the
+    record edge. This is the plan behind the stored order_* features.
+
+    With `full_record` the positions span the whole record duration
+    n_samples / fs instead (e.g. 3 * 1024 angle samples for 2,560 samples
+    at 1800 rpm, where the plan above stops one sample short). The stencil
+    is then shifted inside the record at both edges, so the final fraction
+    of a sample is extrapolated from the last four samples rather than
+    clamped.
+
+    Returns:
+        (indices (m, 4), weights (m, 4)); the angle-domain signal is
+        (x[..., indices] * weights).sum(-1). Arrays are read-only (shared
+        through the cache).
+    """
+    step = fs * 60.0 / (speed_rpm * samples_per_revolution)  # 每個角度樣本對應的時間樣本數
+    if full_record:
+        m = int(np.floor(n_samples / step + 1e-9))
+    else:
+        m = int(np.floor((n_samples - 1) / step)) + 1
+    position = np.arange(m) * step
+    base = np.floor(position).astype(np.int64)
+    if full_record and n_samples >= 4:
+        # 節點 -1..2 保持在紀錄內（t 可超出 [0, 1)）；末端超過最後樣本的位置為外插
+        base = np.clip(base, 1, n_samples - 3)
+    t = position - base
+
+    indices = np.clip(base[:, None] + np.arange(-1, 3), 0, n_samples - 1)
+    # 4 點 Lagrange 內插權重（節點 -1, 0, 1, 2）
+    weights = np.stack([
+        -t * (t - 1) * (t - 2) / 6,
+        (t + 1) * (t - 1) * (t - 2) / 2,
+        -(t + 1) * t * (t - 2) / 2,
+        (t + 1) * t * (t - 1) / 6,
+    ], axis=1)
+    indices.flags.writeable = False
+    weights.flags.writeable = False
+    return indices, weights
+
+
+@lru_cache(maxsize=16)
+def _anti_alias_filter(speed_rpm: float, fs: float, samples_per_revolution: int) -> Optional[np.ndarray]:
+    """Low-pass SOS below the angle-domain Nyquist order, or None when upsampling."""
+    angular_nyquist = samples_per_revolution / 2 * speed_rpm / 60.0  # Hz
+    if angular_nyquist >= fs / 2:
+        return None
+    return scipy_signal.butter(8, 0.9 * angular_nyquist, fs=fs, output='sos')
+
+
+class OrderTracker:
+    """Angle-domain resampling and order spectra at a constant shaft speed."""
+
+    def __init__(
+        self,
+        speed_rpm: float,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE,
+        samples_per_revolution: int = ORDER_SAMPLES_PER_REVOLUTION,
+        order_resolution: float = ORDER_RESOLUTION
+    ):
+        if speed_rpm <= 0 or samples_per_revolution < 4 or order_resolution <= 0:
+            raise ValueError("speed_rpm, samples_per_revolution and order_resolution must be positive")
+        self.speed_rpm = float(speed_rpm)
+        self.sampling_rate = sampling_rate
+        self.samples_per_revolution = samples_per_revolution
+        self.order_resolution = order_resolution
+        self.n_fft = int(round(samples_per_revolution / order_resolution))
+
+        shaft = self.speed_rpm / 60.0
+        frequencies = defect_frequencies(self.speed_rpm)
+        # 故障階次僅由軸承幾何決定，與轉速無關
+        self.target_orders = {
+            'order_1x': 1.0,
+            'order_2x': 2.0,
+            'order_3x': 3.0,
+            'order_bpfo': frequencies['bpfo'] / shaft,
+            'order_bpfi': frequencies['bpfi'] / shaft,
+            'order_bsf': frequencies['bsf'] / shaft,
+        }
+
+    @classmethod
+    def for_bearing(cls, bearing_name: str, speed_rpm: Optional[float] = None, **kwargs) -> "OrderTracker":
+        """Tracker at the bearing's operating speed (or `speed_rpm`)."""
+        return cls(speed_rpm if speed_rpm is not None else bearing_speed(bearing_name), **kwargs)
+
+    def resample(self, x: np.ndarray, full_record: bool = False) -> np.ndarray:
+        """
+        Angle-domain signal(s).
+
+        Args:
+            x: Signal (n_samples,) or stacked signals (..., n_samples)
+            full_record: Span the whole record duration (see resampling_plan)
+
+        Returns:
+            (..., m) samples at equal shaft angles (samples_per_revolution per revolution)
+        """
+        x = np.asarray(x, dtype=float)
+        sos = _anti_alias_filter(self.speed_rpm, float(self.sampling_rate), self.samples_per_revolution)
+        if sos is not None:
+            x = scipy_signal.sosfiltfilt(sos, x, axis=-1)
+        indices, weights = resampling_plan(
+            x.shape[-1], self.speed_rpm, float(self.sampling_rate), self.samples_per_revolution, full_record
+        )
+        return np.einsum('...mk,mk->...m', x[..., indices], weights)
+
+    def order_spectrum(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Amplitude order spectrum.
+
+        Records shorter than n_fft angle samples are zero-padded; longer
+        records are split into n_fft segments whose spectra are averaged.
+
+        Returns:
+            (orders (n_fft // 2 + 1,), amplitudes (..., n_fft // 2 + 1))
+        """
+        angular = self.resample(x)
+        m = angular.shape[-1]
+        if m <= self.n_fft:
+            segments = angular[..., None, :]
+        else:
+            count = m // self.n_fft
+            segments = angular[..., :count * self.n_fft].reshape(angular.shape[:-1] + (count, self.n_fft))
+        length = segments.shape[-1]
+        window = np.hanning(length)
+        spectrum = np.fft.rfft(segments * window, n=self.n_fft, axis=-1)
+        amplitudes = (np.abs(spectrum) * 2 / window.sum()).mean(axis=-2)
+        orders = np.arange(self.n_fft // 2 + 1) * self.samples_per_revolution / self.n_fft
+        return orders, amplitudes
+
+    def features(self, x: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Largest order-spectrum amplitude within ± order_resolution of each target order.
+
+        Returns:
+            {name: (n_signals,) array} for every name in ORDER_FEATURES
+        """
+        orders, amplitudes = self.order_spectrum(x)
+        features = {}
+        for name, order in self.target_orders.items():
+            window = np.abs(orders - order) <= self.order_resolution
+            features[name] = amplitudes[..., window].max(axis=-1)
+        return features
+
+    def trend(
+        self,
+        bearing_name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        persist: bool = True,
+        db_path: str = None,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Order features of every selected file, read from the feature store
+        where present and otherwise computed in stacked blocks (see
+        PHMBatchSpectra.stored_feature_trend).
+        """
+        spectra = PHMBatchSpectra(db_path, sampling_rate=self.sampling_rate)
+        trend = spectra.stored_feature_trend(
+            bearing_name, ORDER_FEATURES, self.features,
+            start, end, stride, max_files, persist, block_size
+        )
+        if trend is not None:
+            trend["speed_rpm"] = self.speed_rpm
+            trend["target_orders"] = self.target_orders
+        return trend
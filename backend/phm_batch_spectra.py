@@ -0,0 +1,578 @@
+"""
+PHM Batch Spectra Module
+Spectra of many acquisitions of one bearing at once. The selected files
+are loaded from the measurements table into stacked (n_files, n_samples)
+arrays per channel and transformed with one rfft along the last axis,
+block by block to bound memory. Spectra are reduced to frequency bins on
+the server (np.maximum.reduceat / np.add.reduceat), so a run-to-failure
+waterfall is one response instead of one request per file.
+
+Amplitudes use the scaling of the single-file endpoints: 2/n * |FFT| over
+the first n // 2 bins. Band energies are the band's share of the mean
+square of the signal (one-sided Parseval), computed for all bands of all
+files with one rfft and one np.add.reduceat, and stored in the feature
+store as `band_energy_<low>_<high>`.
+"""
+
+import math
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, ENVELOPE_FILTER_LOWCUT, ENVELOPE_FILTER_HIGHCUT,
+        BAND_ENERGY_BANDS
+    )
+    from backend.phm_metrics import metrics, stage
+    from backend.phm_feature_store import CHANNELS, PHMFeatureStore
+except ModuleNotFoundError:
+    from config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, ENVELOPE_FILTER_LOWCUT, ENVELOPE_FILTER_HIGHCUT,
+        BAND_ENERGY_BANDS
+    )
+    from phm_metrics import metrics, stage
+    from phm_feature_store import CHANNELS, PHMFeatureStore
+
+
+BIN_REDUCERS = {'max': np.maximum, 'mean': np.add}
+DEFAULT_BLOCK_SIZE = 256  # 每次堆疊轉換的檔案數
+
+
+def amplitude_spectra(x: np.ndarray, fs: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-sided amplitude spectra of stacked signals.
+
+    Args:
+        x: (n_files, n_samples) array
+        fs: Sampling frequency
+
+    Returns:
+        (frequencies (n // 2,), magnitudes (n_files, n // 2))
+    """
+    n = x.shape[-1]
+    magnitude = np.abs(np.fft.rfft(x, axis=-1)[..., :n // 2])
+    magnitude *= 2.0 / n
+    return np.arange(n // 2) * fs / n, magnitude
+
+
+def envelope_spectra(
+    x: np.ndarray,
+    fs: int,
+    lowcut: float = ENVELOPE_FILTER_LOWCUT,
+    highcut: float = ENVELOPE_FILTER_HIGHCUT
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Envelope spectra of stacked signals (4th-order Butterworth band-pass,
+    zero phase, Hilbert envelope), as /api/algorithms/envelope per file.
+
+    Returns:
+        (frequencies (n // 2,), magnitudes (n_files, n // 2))
+    """
+    nyquist = fs / 2
+    if not 0 < lowcut < highcut < nyquist:
+        raise ValueError(f"Band {lowcut}-{highcut} Hz must lie within 0-{nyquist} Hz")
+    b, a = scipy_signal.butter(4, [lowcut / nyquist, highcut / nyquist], btype='band')
+    envelope = np.abs(scipy_signal.hilbert(scipy_signal.filtfilt(b, a, x, axis=-1), axis=-1))
+    return amplitude_spectra(envelope, fs)
+
+
+def frequency_bins(
+    frequencies: np.ndarray,
+    n_bins: int,
+    f_min: float = 0.0,
+    f_max: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray, slice]:
+    """
+    Split the frequency axis within [f_min, f_max] into at most n_bins bins.
+
+    Returns:
+        (bin start offsets for reduceat, bin center frequencies, slice of
+        the frequency axis covered by the bins)
+
+    Raises:
+        ValueError: If the range contains no frequency
+    """
+    f_max = frequencies[-1] if f_max is None else f_max
+    lo = int(np.searchsorted(frequencies, f_min, side='left'))
+    hi = int(np.searchsorted(frequencies, f_max, side='right'))
+    if hi <= lo:
+        raise ValueError(f"No frequencies within {f_min}-{f_max} Hz")
+
+    count = hi - lo
+    starts = np.unique(np.linspace(0, count, min(n_bins, count) + 1).astype(int)[:-1])
+    ends = np.append(starts[1:], count)
+    centers = (frequencies[lo + starts] + frequencies[lo + ends - 1]) / 2
+    return starts, centers, slice(lo, hi)
+
+
+def bin_spectra(magnitude: np.ndarray, starts: np.ndarray, band: slice, reduce: str = 'max') -> np.ndarray:
+    """Reduce (n_files, n_freqs) spectra to (n_files, n_bins) with max or mean per bin."""
+    if reduce not in BIN_REDUCERS:
+        raise ValueError(f"Unknown bin reduction: {reduce}")
+    values = magnitude[:, band]
+    binned = BIN_REDUCERS[reduce].reduceat(values, starts, axis=1)
+    if reduce == 'mean':
+        binned /= np.diff(np.append(starts, values.shape[1]))
+    return binned
+
+
+Band = Tuple[float, float]
+
+
+def band_feature_name(band: Band) -> str:
+    """Feature store name of a band, e.g. band_energy_1000_5000."""
+    return f"band_energy_{band[0]:g}_{band[1]:g}"
+
+
+def band_energies(x: np.ndarray, fs: int, bands: Sequence[Band]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Energy of each band [low, high) for stacked signals.
+
+    All band edges are merged into one sorted set of bin indices, the power
+    spectrum is summed between consecutive edges with one np.add.reduceat,
+    and each band adds up the intervals it covers, so bands may overlap.
+
+    Args:
+        x: (n_files, n_samples) array
+        fs: Sampling frequency
+        bands: (low, high) pairs in Hz
+
+    Returns:
+        (energies (n_files, n_bands), total mean square (n_files,)); a
+        band's energy is its contribution to mean(x ** 2)
+    """
+    n = x.shape[-1]
+    power = np.abs(np.fft.rfft(x, axis=-1)) ** 2
+    # 單邊頻譜：除 DC 與 Nyquist 外乘 2，總和即為 mean(x ** 2)
+    power[..., 1:(n + 1) // 2] *= 2
+    power /= n * n
+
+    frequencies = np.arange(power.shape[-1]) * fs / n
+    lows = np.searchsorted(frequencies, [low for low, _ in bands], side='left')
+    highs = np.searchsorted(frequencies, [high for _, high in bands], side='left')
+    edges = np.unique(np.concatenate([lows, highs]))
+
+    energies = np.zeros(x.shape[:-1] + (len(bands),))
+    if len(edges) > 1:
+        intervals = np.add.reduceat(power[..., :edges[-1]], edges[:-1], axis=-1)
+        covers = (lows[None, :] <= edges[:-1, None]) & (edges[1:, None] <= highs[None, :])
+        energies = intervals @ covers.astype(float)
+    return energies, power.sum(axis=-1)
+
+
+def parse_bands(value: Optional[str]) -> List[Band]:
+    """
+    Parse "low-high,low-high" (Hz) into bands (default: BAND_ENERGY_BANDS).
+
+    Raises:
+        ValueError: If a band is malformed or low >= high
+    """
+    if not value:
+        return [tuple(band) for band in BAND_ENERGY_BANDS]
+    bands = []
+    for item in value.split(','):
+        low, sep, high = item.strip().partition('-')
+        try:
+            band = (float(low), float(high))
+        except ValueError:
+            raise ValueError(f"Invalid band '{item}', expected low-high in Hz")
+        if not sep or not 0 <= band[0] < band[1]:
+            raise ValueError(f"Invalid band '{item}', expected 0 <= low < high")
+        bands.append(band)
+    return bands
+
+
+class PHMBatchSpectra:
+    """Stacked multi-file spectra of one bearing from the PHM database."""
+
+    def __init__(self, db_path: str = None, sampling_rate: int = DEFAULT_SAMPLING_RATE):
+        if db_path is None:
+            self.db_path = Path(PHM_DATABASE_PATH)
+        else:
+            self.db_path = Path(db_path)
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {self.db_path}")
+
+        self.sampling_rate = sampling_rate
+
+    def _get_connection(self):
+        """Get database connection."""
+        return sqlite3.connect(str(self.db_path))
+
+    def list_bearings(self) -> List[str]:
+        """Names of all bearings in the database."""
+        conn = self._get_connection()
+        try:
+            return [row[0] for row in conn.execute("SELECT bearing_name FROM bearings ORDER BY bearing_name")]
+        finally:
+            conn.close()
+
+    def list_files(
+        self,
+        bearing_name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None
+    ) -> List[Tuple[int, int, int]]:
+        """
+        (file_number, file_id, record_count) of a bearing's files in order.
+
+        Args:
+            start: Smallest file_number (inclusive)
+            end: Largest file_number (inclusive)
+            stride: Keep every stride-th file
+            max_files: Further decimate evenly to at most this many files
+        """
+        query = """
+            SELECT mf.file_number, mf.file_id, mf.record_count
+            FROM measurement_files mf
+            JOIN bearings b ON mf.bearing_id = b.bearing_id
+            WHERE b.bearing_name = ?
+        """
+        params: list = [bearing_name]
+        if start is not None:
+            query += " AND mf.file_number >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND mf.file_number <= ?"
+            params.append(end)
+        query += " ORDER BY mf.file_number"
+
+        conn = self._get_connection()
+        try:
+            files = [tuple(row) for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
+
+        files = files[::max(stride, 1)]
+        if max_files and len(files) > max_files:
+            keep = np.unique(np.linspace(0, len(files) - 1, max_files).round().astype(int))
+            files = [files[i] for i in keep]
+        return files
+
+    def iter_stacked_signals(
+        self,
+        files: List[Tuple[int, int, int]],
+        n_samples: int,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Iterator[Tuple[List[int], np.ndarray, np.ndarray]]:
+        """
+        Yield (file_numbers, horizontal, vertical) blocks of stacked signals.
+
+        Each file is truncated to `n_samples`; files with fewer samples are
+        skipped.
+
+        Yields:
+            file numbers of the block and two (len(block), n_samples) arrays
+        """
+        conn = self._get_connection()
+        try:
+            for begin in range(0, len(files), block_size):
+                block = files[begin:begin + block_size]
+                file_ids = [file_id for _, file_id, _ in block]
+                rows = conn.execute(f"""
+                    SELECT file_id, horizontal_acceleration, vertical_acceleration
+                    FROM measurements
+                    WHERE file_id IN ({','.join('?' * len(file_ids))})
+                    ORDER BY file_id, measurement_id
+                """, file_ids).fetchall()
+                if not rows:
+                    continue
+
+                data = np.asarray(rows, dtype=np.float64)
+                ids = data[:, 0].astype(np.int64)
+                boundaries = np.flatnonzero(np.diff(ids)) + 1
+                offsets = dict(zip(ids[np.r_[0, boundaries]], np.r_[0, boundaries]))
+                counts = dict(zip(ids[np.r_[0, boundaries]], np.diff(np.r_[0, boundaries, len(ids)])))
+
+                numbers, index = [], []
+                for file_number, file_id, _ in block:
+                    if counts.get(file_id, 0) >= n_samples:
+                        numbers.append(file_number)
+                        index.append(offsets[file_id])
+                if not numbers:
+                    continue
+
+                # 以起始列加上 0..n_samples-1 一次取出整個區塊
+                rows_index = np.asarray(index)[:, None] + np.arange(n_samples)
+                yield numbers, data[rows_index, 1], data[rows_index, 2]
+        finally:
+            conn.close()
+
+    def stacked_signals(
+        self,
+        files: List[Tuple[int, int, int]],
+        n_samples: Optional[int] = None
+    ) -> Tuple[List[int], np.ndarray, np.ndarray]:
+        """
+        All selected files as one (file_numbers, horizontal, vertical) stack,
+        truncated to `n_samples` (default: the shortest file).
+        """
+        if n_samples is None:
+            n_samples = min((count for _, _, count in files if count), default=0)
+        numbers, horizontal, vertical = [], [], []
+        if n_samples:
+            for block_numbers, horiz, vert in self.iter_stacked_signals(files, n_samples):
+                numbers.extend(block_numbers)
+                horizontal.append(horiz)
+                vertical.append(vert)
+        if not numbers:
+            return [], np.empty((0, n_samples)), np.empty((0, n_samples))
+        return numbers, np.concatenate(horizontal), np.concatenate(vertical)
+
+    def waterfall(
+        self,
+        bearing_name: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = 500,
+        n_bins: int = 512,
+        f_min: float = 0.0,
+        f_max: Optional[float] = None,
+        reduce: str = 'max',
+        envelope: bool = False,
+        lowcut: float = ENVELOPE_FILTER_LOWCUT,
+        highcut: float = ENVELOPE_FILTER_HIGHCUT,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Binned magnitude (and optionally envelope) spectra of every selected file.
+
+        Returns:
+            {"file_numbers", "n_samples", "spectrum": {"frequencies",
+            "horizontal": [[...] per file], "vertical"}, "envelope": {...}},
+            or None if the bearing has no selected files
+        """
+        if reduce not in BIN_REDUCERS:
+            raise ValueError(f"Unknown bin reduction: {reduce}")
+        if n_bins < 1:
+            raise ValueError("n_bins must be positive")
+
+        with stage("load"):
+            files = self.list_files(bearing_name, start, end, stride, max_files)
+        counts = [count for _, _, count in files if count]
+        if not files or not counts:
+            return None
+        n_samples = min(counts)
+        fs = self.sampling_rate
+
+        # 頻率軸只取決於 n_samples，先切好頻帶（範圍無效時不必載入資料）
+        starts, centers, band = frequency_bins(np.arange(n_samples // 2) * fs / n_samples, n_bins, f_min, f_max)
+
+        kinds = {'spectrum': amplitude_spectra}
+        if envelope:
+            kinds['envelope'] = lambda x, fs: envelope_spectra(x, fs, lowcut, highcut)
+
+        file_numbers: List[int] = []
+        rows: Dict[str, Dict[str, List[np.ndarray]]] = {kind: {'horizontal': [], 'vertical': []} for kind in kinds}
+
+        blocks = self.iter_stacked_signals(files, n_samples, block_size)
+        try:
+            while True:
+                with stage("load"):
+                    block = next(blocks, None)
+                if block is None:
+                    break
+                numbers, horiz, vert = block
+                file_numbers.extend(numbers)
+
+                with stage("compute"):
+                    for kind, transform in kinds.items():
+                        for channel, x in (('horizontal', horiz), ('vertical', vert)):
+                            _, magnitude = transform(x, fs)
+                            rows[kind][channel].append(bin_spectra(magnitude, starts, band, reduce))
+        finally:
+            blocks.close()
+
+        if not file_numbers:
+            return None
+
+        result = {
+            "bearing_name": bearing_name,
+            "sampling_rate": fs,
+            "n_samples": n_samples,
+            "file_count": len(file_numbers),
+            "file_numbers": file_numbers,
+            "reduce": reduce,
+        }
+        with stage("serialize"):
+            for kind in kinds:
+                result[kind] = {
+                    "frequencies": centers.tolist(),
+                    "horizontal": np.vstack(rows[kind]['horizontal']).tolist(),
+                    "vertical": np.vstack(rows[kind]['vertical']).tolist(),
+                }
+            if envelope:
+                result["envelope"].update({"lowcut": lowcut, "highcut": highcut})
+        return result
+
+    def stored_feature_trend(
+        self,
+        bearing_name: str,
+        feature_names: Sequence[str],
+        compute: Callable[[np.ndarray], Dict[str, np.ndarray]],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        persist: bool = True,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Trend of on-demand features backed by the feature store.
+
+        Stored values are read from file_features; files missing any of
+        `feature_names` are loaded block by block, computed together and,
+        with `persist`, written back.
+
+        Args:
+            feature_names: Feature store names returned by `compute`
+            compute: Maps stacked signals (n_files, n_samples) of one
+                channel to {name: (n_files,) array}
+
+        Returns:
+            {"bearing_name", "sampling_rate", "file_numbers", "file_count",
+            "horizontal": {name: [...]}, "vertical": {...}}, or None if the
+            bearing has no selected files
+        """
+        names = list(feature_names)
+
+        with stage("load"):
+            files = self.list_files(bearing_name, start, end, stride, max_files)
+        if not files:
+            return None
+
+        values: Dict[int, Dict[str, Dict[str, Optional[float]]]] = {}
+        conn = self._get_connection()
+        try:
+            PHMFeatureStore.ensure_schema(conn)
+            if persist:
+                with stage("load"):
+                    file_ids = [file_id for _, file_id, _ in files]
+                    for begin in range(0, len(file_ids), 500):
+                        batch = file_ids[begin:begin + 500]
+                        rows = conn.execute(f"""
+                            SELECT file_id, channel, feature_name, value
+                            FROM file_features
+                            WHERE file_id IN ({','.join('?' * len(batch))})
+                            AND feature_name IN ({','.join('?' * len(names))})
+                        """, batch + names).fetchall()
+                        for file_id, channel, feature_name, value in rows:
+                            values.setdefault(file_id, {}).setdefault(channel, {})[feature_name] = value
+
+            missing = []
+            for file in files:
+                stored = values.get(file[1], {})
+                cached = all(name in stored.get(channel, {}) for channel in CHANNELS for name in names)
+                if persist:
+                    metrics.record_cache('feature_store', cached)
+                if not cached:
+                    missing.append(file)
+
+            # 未儲存的檔案依長度分組，同長度者一起堆疊計算
+            by_length: Dict[int, List[Tuple[int, int, int]]] = {}
+            for file in missing:
+                if file[2]:
+                    by_length.setdefault(file[2], []).append(file)
+            numbers_to_ids = {file_number: file_id for file_number, file_id, _ in files}
+            for n_samples, group in by_length.items():
+                blocks = self.iter_stacked_signals(group, n_samples, block_size)
+                try:
+                    while True:
+                        with stage("load"):
+                            block = next(blocks, None)
+                        if block is None:
+                            break
+                        numbers, horiz, vert = block
+                        with stage("compute"):
+                            computed = {'horizontal': compute(horiz), 'vertical': compute(vert)}
+                        for i, file_number in enumerate(numbers):
+                            file_id = numbers_to_ids[file_number]
+                            features = {
+                                channel: {name: float(result[name][i]) for name in names}
+                                for channel, result in computed.items()
+                            }
+                            values[file_id] = features
+                            if persist:
+                                PHMFeatureStore.save_file_features(conn, file_id, features)
+                        if persist:
+                            conn.commit()
+                finally:
+                    blocks.close()
+        finally:
+            conn.close()
+
+        trend = {
+            "bearing_name": bearing_name,
+            "sampling_rate": self.sampling_rate,
+            "file_numbers": [],
+            "horizontal": {name: [] for name in names},
+            "vertical": {name: [] for name in names},
+        }
+        for file_number, file_id, _ in files:
+            file_values = values.get(file_id)
+            if not file_values or any(channel not in file_values for channel in CHANNELS):
+                continue
+            trend["file_numbers"].append(file_number)
+            for channel in CHANNELS:
+                for name in names:
+                    trend[channel][name].append(_finite(file_values[channel].get(name)))
+        trend["file_count"] = len(trend["file_numbers"])
+        return trend
+
+    def band_energy_trend(
+        self,
+        bearing_name: str,
+        bands: Sequence[Band],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        stride: int = 1,
+        max_files: Optional[int] = None,
+        persist: bool = True,
+        block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Optional[Dict]:
+        """
+        Band energies of every selected file of a bearing (see
+        stored_feature_trend; one batched rfft per block).
+
+        Only the configured BAND_ENERGY_BANDS go through the feature store;
+        a request with any other band is computed without reading or
+        writing stored values, so ad-hoc bands do not add file_features
+        rows.
+
+        Returns:
+            {"file_numbers", "bands": {name: [low, high]}, "horizontal":
+            {name: [...]}, "vertical": {...}, "total": {channel: [...]}},
+            or None if the bearing has no selected files
+        """
+        bands = [(float(low), float(high)) for low, high in bands]
+        if not bands:
+            raise ValueError("At least one band is required")
+        names = [band_feature_name(band) for band in bands]
+        configured = {(float(low), float(high)) for low, high in BAND_ENERGY_BANDS}
+        persist = persist and all(band in configured for band in bands)
+
+        def compute(x: np.ndarray) -> Dict[str, np.ndarray]:
+            energies, total = band_energies(x, self.sampling_rate, bands)
+            return {**{name: energies[:, j] for j, name in enumerate(names)}, 'band_energy_total': total}
+
+        trend = self.stored_feature_trend(
+            bearing_name, names + ['band_energy_total'], compute,
+            start, end, stride, max_files, persist, block_size
+        )
+        if trend is None:
+            return None
+        trend["bands"] = {name: [low, high] for name, (low, high) in zip(names, bands)}
+        trend["total"] = {channel: trend[channel].pop('band_energy_total') for channel in CHANNELS}
+        return trend
+
+
+def _finite(value: Optional[float]) -> Optional[float]:
+    return value if value is not None and math.isfinite(value) else None
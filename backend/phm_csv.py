@@ -0,0 +1,140 @@
+"""
+PHM CSV Reader Module
+Fast reader for PHM 2012 acquisition files with the fixed 6-column layout
+`hour,minute,second,microsecond,horizontal_acceleration,vertical_acceleration`.
+Files are parsed by numpy's C tokenizer (or pyarrow's multi-threaded CSV
+reader when installed) directly into float64 arrays; microseconds written
+in scientific notation (e.g. `1.0547e+05`) parse like any other float.
+Several files of one bearing can be read into one preallocated
+(n_files, n_samples, n_columns) array.
+"""
+
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+PHM_CSV_COLUMNS = (
+    'hour', 'minute', 'second', 'microsecond',
+    'horizontal_acceleration', 'vertical_acceleration'
+)
+TIME_COLUMNS = (0, 1, 2, 3)
+SIGNAL_COLUMNS = (4, 5)
+
+PathLike = Union[str, Path]
+
+
+def detect_delimiter(path: PathLike) -> str:
+    """',' or ';' (some PHM bearings use semicolons), from the first line."""
+    with open(path, 'r') as f:
+        return ';' if ';' in f.readline() else ','
+
+
+def _read_numpy(path: PathLike, delimiter: str, columns: Optional[Sequence[int]]) -> np.ndarray:
+    return np.loadtxt(path, delimiter=delimiter, dtype=np.float64, usecols=columns, ndmin=2)
+
+
+def _read_pyarrow(path: PathLike, delimiter: str, columns: Optional[Sequence[int]]) -> np.ndarray:
+    indices = list(columns) if columns is not None else list(range(len(PHM_CSV_COLUMNS)))
+    names = [f"f{i}" for i in indices]
+    table = pa_csv.read_csv(
+        str(path),
+        read_options=pa_csv.ReadOptions(autogenerate_column_names=True),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=names,
+            column_types={name: pa.float64() for name in names}
+        )
+    )
+    out = np.empty((table.num_rows, len(names)), dtype=np.float64)
+    for j, name in enumerate(names):
+        out[:, j] = table.column(name).to_numpy()
+    return out
+
+
+def read_phm_csv(
+    path: PathLike,
+    columns: Optional[Sequence[int]] = None,
+    engine: str = 'auto'
+) -> np.ndarray:
+    """
+    Read one PHM acquisition.
+
+    Args:
+        path: CSV file
+        columns: Column indices to keep (default: all six; SIGNAL_COLUMNS
+            for horizontal / vertical only)
+        engine: 'numpy', 'pyarrow' or 'auto' (pyarrow when installed)
+
+    Returns:
+        float64 array of shape (n_samples, len(columns))
+
+    Raises:
+        ValueError: If the file does not have the 6-column layout
+    """
+    delimiter = detect_delimiter(path)
+    if engine == 'auto':
+        engine = 'pyarrow' if pa_csv is not None else 'numpy'
+    if engine == 'pyarrow':
+        if pa_csv is None:
+            raise RuntimeError("engine='pyarrow' requires pyarrow")
+        data = _read_pyarrow(path, delimiter, columns)
+    elif engine == 'numpy':
+        data = _read_numpy(path, delimiter, columns)
+    else:
+        raise ValueError(f"Unknown engine: {engine}")
+
+    if columns is None and data.shape[1] != len(PHM_CSV_COLUMNS):
+        raise ValueError(f"{path}: expected {len(PHM_CSV_COLUMNS)} columns, got {data.shape[1]}")
+    return data
+
+
+def read_phm_signals(path: PathLike, engine: str = 'auto') -> np.ndarray:
+    """Horizontal / vertical columns of one acquisition, shape (n_samples, 2)."""
+    return read_phm_csv(path, SIGNAL_COLUMNS, engine)
+
+
+def read_phm_csv_files(
+    paths: Sequence[PathLike],
+    columns: Optional[Sequence[int]] = None,
+    out: Optional[np.ndarray] = None,
+    engine: str = 'auto'
+) -> np.ndarray:
+    """
+    Read many acquisitions of equal length into one stacked array.
+
+    Args:
+        paths: CSV files (e.g. all acc_*.csv of a bearing, in order)
+        columns: Column indices to keep (default: all six)
+        out: Optional preallocated float64 array of shape
+            (len(paths), n_samples, len(columns))
+        engine: See read_phm_csv()
+
+    Returns:
+        float64 array of shape (len(paths), n_samples, len(columns))
+
+    Raises:
+        ValueError: If the files differ in length or `out` has the wrong shape
+    """
+    paths = list(paths)
+    if not paths:
+        width = len(columns) if columns is not None else len(PHM_CSV_COLUMNS)
+        return np.empty((0, 0, width)) if out is None else out
+
+    for i, path in enumerate(paths):
+        data = read_phm_csv(path, columns, engine)
+        if out is None:
+            out = np.empty((len(paths),) + data.shape, dtype=np.float64)
+        if out.shape[0] != len(paths) or out.shape[1:] != data.shape:
+            raise ValueError(
+                f"{path}: shape {data.shape} does not match stacked shape {out.shape[1:]}"
+            )
+        out[i] = data
+    return out
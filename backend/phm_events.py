@@ -0,0 +1,77 @@
+"""
+PHM Event Broker Module
+In-process publish/subscribe hub used to push newly computed feature points
+to subscribed clients. Publishing is thread-safe so that the directory
+watcher thread and request handlers can both emit events.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class FeatureEventBroker:
+    """Fan-out of feature events to asyncio subscriber queues."""
+
+    def __init__(self, max_queue_size: int = 1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, bearing_name: Optional[str] = None) -> asyncio.Queue:
+        """
+        Register a subscriber on the running event loop.
+
+        Args:
+            bearing_name: Only receive events of this bearing (None = all)
+
+        Returns:
+            asyncio.Queue that receives event dicts
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        subscriber = {
+            'queue': queue,
+            'loop': asyncio.get_running_loop(),
+            'bearing_name': bearing_name,
+        }
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s['queue'] is not queue]
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+        # 慢速訂閱者的佇列滿時丟棄最舊的事件
+        if queue.full():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(event)
+
+    def publish(self, event: Dict[str, Any]):
+        """Deliver an event to every matching subscriber (callable from any thread)."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            wanted = subscriber['bearing_name']
+            if wanted is not None and wanted != event.get('bearing_name'):
+                continue
+            loop = subscriber['loop']
+            if loop.is_closed():
+                continue
+            loop.call_soon_threadsafe(self._offer, subscriber['queue'], event)
+
+
+# 全域事件中心
+feature_events = FeatureEventBroker()
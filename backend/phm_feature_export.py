@@ -0,0 +1,269 @@
+"""
+PHM Feature Export Module
+Exports the feature store (file_features) to columnar files and queries
+them without the database.
+
+Files hold one row per acquisition: bearing_name, file_number, file_id and
+one `<channel>_<feature>` column per stored feature (the layout of
+scripts/extract_features.py). Parquet files are sorted by bearing and file
+number and written in small row groups, so bearing / file-range filters
+skip row groups from their min/max statistics and only the requested
+columns are decoded. Arrow IPC files (.arrow) are uncompressed and read
+through a memory map, so scans do not copy the column buffers.
+
+pyarrow is listed in requirements.txt; export and query raise RuntimeError when
+it is not installed.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    pa_ipc = None
+    pq = None
+
+try:
+    from backend.config import PHM_DATABASE_PATH, PHM_FEATURE_EXPORT_DIR
+    from backend.phm_feature_store import CHANNELS, STORED_FEATURES, PHMFeatureStore
+except ModuleNotFoundError:
+    from config import PHM_DATABASE_PATH, PHM_FEATURE_EXPORT_DIR
+    from phm_feature_store import CHANNELS, STORED_FEATURES, PHMFeatureStore
+
+
+KEY_COLUMNS = ('bearing_name', 'file_number', 'file_id')
+EXPORT_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+# Parquet row group / Arrow record batch 的列數；越小則檔案範圍過濾可略過越多資料
+DEFAULT_ROW_GROUP_SIZE = 1024
+
+
+def feature_columns(feature_names: Optional[Sequence[str]] = None) -> List[str]:
+    """Feature columns after the key columns: <channel>_<feature>."""
+    names = STORED_FEATURES if feature_names is None else feature_names
+    return [f"{channel}_{name}" for channel in CHANNELS for name in names]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Feature export requires pyarrow (pip install pyarrow)")
+
+
+def export_path(output_format: str = 'parquet', export_dir: str = PHM_FEATURE_EXPORT_DIR) -> Path:
+    """Default export file of the feature store in `export_dir`."""
+    return Path(export_dir) / f"feature_store{EXPORT_FORMATS[output_format]}"
+
+
+class PHMFeatureExporter:
+    """Writes the feature store of the PHM database to Parquet / Arrow files."""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            self.db_path = Path(PHM_DATABASE_PATH)
+        else:
+            self.db_path = Path(db_path)
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {self.db_path}")
+
+    def _get_connection(self):
+        """Get database connection."""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def load_table(self, bearings: Optional[Sequence[str]] = None) -> "pa.Table":
+        """
+        Pivot stored features into one row per file.
+
+        Files without any stored feature are left out; missing or NULL
+        values become nulls.
+
+        Args:
+            bearings: Only these bearings (default: all)
+
+        Returns:
+            pyarrow Table sorted by bearing_name, file_number
+        """
+        _require_pyarrow()
+        columns = feature_columns()
+        column_index = {name: i for i, name in enumerate(columns)}
+
+        conn = self._get_connection()
+        try:
+            PHMFeatureStore.ensure_schema(conn)
+            query = """
+                SELECT b.bearing_name, mf.file_number, mf.file_id
+                FROM measurement_files mf
+                JOIN bearings b ON mf.bearing_id = b.bearing_id
+                WHERE EXISTS (SELECT 1 FROM file_features ff WHERE ff.file_id = mf.file_id)
+            """
+            params: tuple = ()
+            if bearings:
+                query += f" AND b.bearing_name IN ({','.join('?' * len(bearings))})"
+                params = tuple(bearings)
+            query += " ORDER BY b.bearing_name, mf.file_number"
+            files = conn.execute(query, params).fetchall()
+
+            row_index = {row['file_id']: i for i, row in enumerate(files)}
+            values = np.full((len(files), len(columns)), np.nan)
+            cursor = conn.execute("SELECT file_id, channel, feature_name, value FROM file_features")
+            # 以批次讀取，避免一次把整個特徵表載入為 Python 物件
+            while True:
+                batch = cursor.fetchmany(50000)
+                if not batch:
+                    break
+                for file_id, channel, feature_name, value in batch:
+                    i = row_index.get(file_id)
+                    j = column_index.get(f"{channel}_{feature_name}")
+                    if i is not None and j is not None and value is not None:
+                        values[i, j] = value
+        finally:
+            conn.close()
+
+        arrays = {
+            'bearing_name': pa.array([row['bearing_name'] for row in files], pa.string()),
+            'file_number': pa.array([row['file_number'] for row in files], pa.int32()),
+            'file_id': pa.array([row['file_id'] for row in files], pa.int64()),
+        }
+        for j, name in enumerate(columns):
+            column = values[:, j]
+            arrays[name] = pa.array(column, pa.float64(), mask=np.isnan(column))
+        return pa.table(arrays)
+
+    def export(
+        self,
+        path: Optional[str] = None,
+        output_format: str = 'parquet',
+        bearings: Optional[Sequence[str]] = None,
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE
+    ) -> Dict:
+        """
+        Export the feature store to a Parquet or Arrow IPC file.
+
+        The file is written to a temporary name and then replaced, so
+        readers never see a partial export.
+
+        Args:
+            path: Output file (default: export_path(output_format))
+            output_format: 'parquet' or 'arrow'
+            bearings: Only these bearings (default: all)
+            row_group_size: Rows per Parquet row group / Arrow record batch
+
+        Returns:
+            Summary dict (path, format, rows, columns, bytes)
+        """
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {output_format}")
+        table = self.load_table(bearings)
+
+        path = Path(path) if path else export_path(output_format)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        if output_format == 'parquet':
+            pq.write_table(table, tmp, row_group_size=row_group_size, write_statistics=True)
+        else:
+            with pa.OSFile(str(tmp), 'wb') as sink:
+                with pa_ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table, max_chunksize=row_group_size)
+        os.replace(tmp, path)
+
+        return {
+            "path": str(path),
+            "format": output_format,
+            "rows": table.num_rows,
+            "columns": table.num_columns,
+            "bytes": path.stat().st_size,
+        }
+
+
+def _filter_expression(
+    bearings: Optional[Sequence[str]],
+    file_start: Optional[int],
+    file_end: Optional[int]
+):
+    """Dataset filter on bearing_name / file_number, or None."""
+    expression = None
+    conditions = []
+    if bearings:
+        conditions.append(pc.field('bearing_name').isin(list(bearings)))
+    if file_start is not None:
+        conditions.append(pc.field('file_number') >= file_start)
+    if file_end is not None:
+        conditions.append(pc.field('file_number') <= file_end)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def query_features(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    bearings: Optional[Sequence[str]] = None,
+    file_start: Optional[int] = None,
+    file_end: Optional[int] = None,
+    memory_map: bool = True
+) -> "pa.Table":
+    """
+    Read rows of an exported feature file.
+
+    Only the requested columns are read, and the bearing / file-number
+    filters are pushed down to Parquet row-group statistics. Arrow IPC
+    files are memory-mapped; filtering selects rows without copying
+    unaffected buffers.
+
+    Args:
+        path: .parquet or .arrow file written by PHMFeatureExporter.export()
+        columns: Feature columns (e.g. 'horizontal_rms'); key columns are
+            always included (default: all columns)
+        bearings: Only these bearings
+        file_start: Smallest file_number (inclusive)
+        file_end: Largest file_number (inclusive)
+        memory_map: Memory-map the file instead of reading it into memory
+
+    Returns:
+        pyarrow Table sorted as written (bearing_name, file_number)
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        KeyError: If a requested column is not in the file
+    """
+    _require_pyarrow()
+    path = Path(path)
+    if not path.is_file():
+        raise FileNotFoundError(f"Feature export not found: {path}")
+
+    if path.suffix == '.parquet':
+        schema = pq.read_schema(path, memory_map=memory_map)
+    else:
+        source = pa.memory_map(str(path), 'r') if memory_map else pa.OSFile(str(path), 'rb')
+        reader = pa_ipc.open_file(source)
+        schema = reader.schema
+
+    selected = None
+    if columns is not None:
+        missing = [name for name in columns if name not in schema.names]
+        if missing:
+            raise KeyError(f"Unknown feature columns: {', '.join(missing)}")
+        selected = list(KEY_COLUMNS) + [name for name in columns if name not in KEY_COLUMNS]
+
+    expression = _filter_expression(bearings, file_start, file_end)
+    if path.suffix == '.parquet':
+        return pq.read_table(path, columns=selected, filters=expression, memory_map=memory_map)
+
+    table = reader.read_all()
+    if selected is not None:
+        table = table.select(selected)
+    if expression is not None:
+        table = table.filter(expression)
+    return table
+
@@ -0,0 +1,373 @@
+"""
+PHM Feature Store Module
+Persists per-file vibration features in the PHM SQLite database so that
+trend queries can read precomputed values instead of re-running the DSP
+kernels on every request.
+"""
+
+import math
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from backend.config import PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE
+    from backend.phm_metrics import metrics
+    from backend.phm_pipeline import FEATURES, compute_features
+except ModuleNotFoundError:
+    from config import PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE
+    from phm_metrics import metrics
+    from phm_pipeline import FEATURES, compute_features
+
+
+CHANNELS = ('horizontal', 'vertical')
+
+# 趨勢端點使用的特徵族群
+TREND_FEATURES = {
+    'time-domain': ['rms', 'peak', 'kurtosis', 'crest_factor'],
+    'filter': ['na4', 'fm4', 'm6a', 'm8a', 'er'],
+    'hilbert': ['nb4', 'envelope_rms', 'envelope_max', 'envelope_peak_to_peak'],
+}
+
+# 特徵庫為每個檔案儲存的完整特徵集合
+STORED_FEATURES = FEATURES.names()
+
+
+def compute_signal_features(
+    signal: np.ndarray,
+    fs: int = DEFAULT_SAMPLING_RATE,
+    segment_count: int = 10,
+    feature_names: Optional[List[str]] = None
+) -> Dict[str, float]:
+    """
+    Compute TimeDomain / FilterProcess / Hilbert features of one channel.
+
+    Only the intermediates the requested features depend on are computed
+    (see phm_pipeline.FEATURES), each at most once.
+
+    Args:
+        signal: Input signal array
+        fs: Sampling frequency
+        segment_count: Number of segments for NA4 / NB4
+        feature_names: Features to compute (default: STORED_FEATURES)
+
+    Returns:
+        Dictionary of feature name -> value
+    """
+    return compute_features(
+        signal,
+        STORED_FEATURES if feature_names is None else feature_names,
+        fs,
+        {'segment_count': segment_count}
+    )
+
+
+def finite_features(features: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, Optional[float]]]:
+    """Replace NaN / inf feature values with None (JSON-safe, matches stored NULL)."""
+    return {
+        channel: {
+            name: (float(value) if math.isfinite(float(value)) else None)
+            for name, value in values.items()
+        }
+        for channel, values in features.items()
+    }
+
+
+class PHMFeatureStore:
+    """Per-file feature storage backed by the PHM database."""
+
+    def __init__(
+        self,
+        db_path: str = None,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE,
+        segment_count: int = 10
+    ):
+        if db_path is None:
+            self.db_path = Path(PHM_DATABASE_PATH)
+        else:
+            self.db_path = Path(db_path)
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {self.db_path}")
+
+        self.sampling_rate = sampling_rate
+        self.segment_count = segment_count
+
+    def _get_connection(self):
+        """Get database connection."""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def ensure_schema(conn: sqlite3.Connection):
+        """Create the file_features table if it does not exist."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_features (
+                file_id INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                feature_name TEXT NOT NULL,
+                value REAL,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (file_id, channel, feature_name),
+                FOREIGN KEY (file_id) REFERENCES measurement_files(file_id)
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_file_features_name
+            ON file_features(feature_name)
+        """)
+        conn.commit()
+
+    @staticmethod
+    def load_file_signals(
+        conn: sqlite3.Connection,
+        file_id: int
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Load (horizontal, vertical) arrays of one file, or None if empty."""
+        rows = conn.execute("""
+            SELECT horizontal_acceleration, vertical_acceleration
+            FROM measurements
+            WHERE file_id = ?
+            ORDER BY measurement_id
+        """, (file_id,)).fetchall()
+
+        if not rows:
+            return None
+
+        data = np.asarray(rows, dtype=np.float64)
+        return data[:, 0], data[:, 1]
+
+    def compute_features(
+        self,
+        horiz: np.ndarray,
+        vert: np.ndarray,
+        feature_names: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Compute the stored feature set (or only `feature_names`) for both channels."""
+        return {
+            'horizontal': compute_signal_features(horiz, self.sampling_rate, self.segment_count, feature_names),
+            'vertical': compute_signal_features(vert, self.sampling_rate, self.segment_count, feature_names),
+        }
+
+    @staticmethod
+    def save_file_features(
+        conn: sqlite3.Connection,
+        file_id: int,
+        features: Dict[str, Dict[str, float]]
+    ):
+        """Upsert the features of one file (caller commits)."""
+        rows = []
+        for channel, values in features.items():
+            for name, value in values.items():
+                value = float(value)
+                # NaN / inf 以 NULL 儲存
+                rows.append((file_id, channel, name, value if math.isfinite(value) else None))
+
+        conn.executemany("""
+            INSERT OR REPLACE INTO file_features
+            (file_id, channel, feature_name, value, computed_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """, rows)
+
+    def recompute_files(self, file_ids: Iterable[int]) -> int:
+        """
+        Recompute and store features for the given files.
+
+        Returns:
+            Number of files whose features were written
+        """
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+            count = 0
+            for file_id in file_ids:
+                signals = self.load_file_signals(conn, file_id)
+                if signals is None:
+                    continue
+                features = self.compute_features(*signals)
+                conn.execute("DELETE FROM file_features WHERE file_id = ?", (file_id,))
+                self.save_file_features(conn, file_id, features)
+                conn.commit()
+                count += 1
+            return count
+        finally:
+            conn.close()
+
+    def invalidate_files(self, file_ids: Iterable[int]):
+        """Drop stored features of the given files."""
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+            conn.executemany(
+                "DELETE FROM file_features WHERE file_id = ?",
+                [(file_id,) for file_id in file_ids]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_file_features(self, file_id: int) -> Dict[str, Dict[str, Optional[float]]]:
+        """Get stored features of one file grouped by channel."""
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+            rows = conn.execute("""
+                SELECT channel, feature_name, value
+                FROM file_features
+                WHERE file_id = ?
+            """, (file_id,)).fetchall()
+
+            result: Dict[str, Dict[str, Optional[float]]] = {}
+            for row in rows:
+                result.setdefault(row['channel'], {})[row['feature_name']] = row['value']
+            return result
+        finally:
+            conn.close()
+
+    def list_trend_files(self, bearing_name: str, max_files: int = 50) -> List[Tuple[int, int]]:
+        """List (file_number, file_id) of the first `max_files` files of a bearing."""
+        conn = self._get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT mf.file_number, mf.file_id
+                FROM measurement_files mf
+                JOIN bearings b ON mf.bearing_id = b.bearing_id
+                WHERE b.bearing_name = ?
+                ORDER BY mf.file_number
+                LIMIT ?
+            """, (bearing_name, max_files)).fetchall()
+            return [(row[0], row[1]) for row in rows]
+        finally:
+            conn.close()
+
+    def iter_trend_points(
+        self,
+        files: List[Tuple[int, int]],
+        feature_names: List[str],
+        persist: bool = True
+    ) -> Iterator[Dict]:
+        """
+        Yield one trend point per file, in the order of `files`.
+
+        Stored values are used when complete; other files are computed and,
+        when `persist` is set, written back (the full stored feature set) so
+        later calls read them directly. Without `persist` only the requested
+        features and their dependencies are computed.
+
+        Args:
+            files: (file_number, file_id) pairs, e.g. from list_trend_files()
+            feature_names: Feature names to return per channel
+            persist: Read from / write to the feature store
+
+        Yields:
+            {"file_number", "file_id", "cached", "horizontal": {...}, "vertical": {...}}
+        """
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+
+            stored: Dict[int, Dict[str, Dict[str, Optional[float]]]] = {}
+            if persist and files:
+                file_ids = [file_id for _, file_id in files]
+                # 分批查詢，避免超過 SQLite 參數上限
+                for start in range(0, len(file_ids), 500):
+                    batch = file_ids[start:start + 500]
+                    rows = conn.execute(f"""
+                        SELECT file_id, channel, feature_name, value
+                        FROM file_features
+                        WHERE file_id IN ({','.join('?' * len(batch))})
+                    """, batch).fetchall()
+                    for row in rows:
+                        channel_values = stored.setdefault(row['file_id'], {}).setdefault(row['channel'], {})
+                        channel_values[row['feature_name']] = row['value']
+
+            for file_number, file_id in files:
+                values = stored.pop(file_id, {})
+                cached = all(
+                    name in values.get(channel, {})
+                    for channel in CHANNELS for name in feature_names
+                )
+                if persist:
+                    metrics.record_cache('feature_store', cached)
+
+                if not cached:
+                    signals = self.load_file_signals(conn, file_id)
+                    if signals is None:
+                        continue
+                    features = self.compute_features(*signals, None if persist else feature_names)
+                    if persist:
+                        self.save_file_features(conn, file_id, features)
+                        conn.commit()
+                    values = finite_features(features)
+
+                point = {"file_number": file_number, "file_id": file_id, "cached": cached}
+                for channel in CHANNELS:
+                    point[channel] = {name: values[channel].get(name) for name in feature_names}
+                yield point
+        finally:
+            conn.close()
+
+    def get_trend(
+        self,
+        bearing_name: str,
+        feature_names: List[str],
+        max_files: int = 50,
+        persist: bool = True
+    ) -> Optional[Dict]:
+        """
+        Get feature trends of a bearing from stored features.
+
+        Returns:
+            Trend dict (file_numbers + per-channel lists), or None if the
+            bearing has no files
+        """
+        files = self.list_trend_files(bearing_name, max_files)
+        if not files:
+            return None
+
+        trend = {
+            "bearing_name": bearing_name,
+            "file_count": len(files),
+            "horizontal": {name: [] for name in feature_names},
+            "vertical": {name: [] for name in feature_names},
+            "file_numbers": []
+        }
+
+        for point in self.iter_trend_points(files, feature_names, persist):
+            trend["file_numbers"].append(point["file_number"])
+            for channel in CHANNELS:
+                for name in feature_names:
+                    trend[channel][name].append(point[channel][name])
+
+        return trend
+
+    def get_stale_file_ids(self, bearing_name: Optional[str] = None) -> List[int]:
+        """
+        List files that have measurements but no stored features.
+
+        Only STORED_FEATURES count; rows of on-demand features (e.g. band
+        energies) do not make a file current.
+        """
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+            query = f"""
+                SELECT mf.file_id
+                FROM measurement_files mf
+                JOIN bearings b ON mf.bearing_id = b.bearing_id
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM file_features ff WHERE ff.file_id = mf.file_id
+                    AND ff.feature_name IN ({','.join('?' * len(STORED_FEATURES))})
+                )
+            """
+            params: tuple = tuple(STORED_FEATURES)
+            if bearing_name is not None:
+                query += " AND b.bearing_name = ?"
+                params += (bearing_name,)
+            query += " ORDER BY mf.file_id"
+            return [row[0] for row in conn.execute(query, params).fetchall()]
+        finally:
+            conn.close()
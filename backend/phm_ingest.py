@@ -0,0 +1,394 @@
+"""
+PHM Live Ingest Module
+Appends new accelerometer acquisitions to the PHM database, computes their
+features once at ingest time and publishes the new feature point to
+subscribed clients. Also provides a polling directory watcher that ingests
+acquisitions dropped into `<watch_dir>/<bearing_name>/`.
+"""
+
+import argparse
+import io
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from backend.config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, PHM_ACQUISITION_SAMPLES,
+        PHM_INGEST_POLL_INTERVAL
+    )
+    from backend.phm_schema import create_measurement_schema
+    from backend.phm_manifest import ImportManifest, ACTION_SKIP
+    from backend.phm_feature_store import PHMFeatureStore, finite_features
+    from backend.phm_events import FeatureEventBroker, feature_events
+except ModuleNotFoundError:
+    from config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, PHM_ACQUISITION_SAMPLES,
+        PHM_INGEST_POLL_INTERVAL
+    )
+    from phm_schema import create_measurement_schema
+    from phm_manifest import ImportManifest, ACTION_SKIP
+    from phm_feature_store import PHMFeatureStore, finite_features
+    from phm_events import FeatureEventBroker, feature_events
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = ('.csv', '.bin')
+FILE_NUMBER_PATTERN = re.compile(r'(\d+)')
+
+
+def parse_csv_acquisition(content: bytes) -> np.ndarray:
+    """
+    Parse a CSV acquisition.
+
+    Accepts the PHM 6-column layout `hour,minute,second,microsecond,h,v`
+    or a 2-column `h,v` layout.
+
+    Returns:
+        float array of shape (n, 6) or (n, 2)
+    """
+    data = np.loadtxt(io.StringIO(content.decode('utf-8')), delimiter=',', ndmin=2)
+    if data.shape[1] not in (2, 6):
+        raise ValueError(f"Expected 2 or 6 CSV columns, got {data.shape[1]}")
+    return data
+
+
+def parse_binary_acquisition(content: bytes, dtype: str = 'float32') -> np.ndarray:
+    """
+    Parse a binary acquisition of interleaved little-endian (h, v) samples.
+
+    Returns:
+        float array of shape (n, 2)
+    """
+    if dtype not in ('float32', 'float64'):
+        raise ValueError(f"Unsupported binary dtype: {dtype}")
+    values = np.frombuffer(content, dtype=np.dtype(dtype).newbyteorder('<'))
+    if values.size % 2 != 0:
+        raise ValueError("Binary acquisition must contain interleaved (h, v) pairs")
+    return values.reshape(-1, 2).astype(np.float64)
+
+
+def acquisition_time_columns(n: int, fs: int, start: Optional[datetime] = None) -> np.ndarray:
+    """Build PHM (hour, minute, second, microsecond) columns for n samples starting at `start`."""
+    start = start or datetime.now()
+    start_us = ((start.hour * 60 + start.minute) * 60 + start.second) * 1_000_000 + start.microsecond
+    total_us = start_us + np.round(np.arange(n) * 1e6 / fs).astype(np.int64)
+
+    hour = (total_us // 3_600_000_000) % 24
+    minute = (total_us // 60_000_000) % 60
+    second = (total_us // 1_000_000) % 60
+    microsecond = total_us % 1_000_000
+    return np.column_stack([hour, minute, second, microsecond])
+
+
+class PHMIngestor:
+    """Append acquisitions to the PHM database with features computed once."""
+
+    def __init__(
+        self,
+        db_path: str = None,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE,
+        expected_samples: Optional[int] = PHM_ACQUISITION_SAMPLES,
+        broker: FeatureEventBroker = feature_events
+    ):
+        self.db_path = Path(db_path) if db_path is not None else Path(PHM_DATABASE_PATH)
+        self.sampling_rate = sampling_rate
+        self.expected_samples = expected_samples
+        self.broker = broker
+        self._schema_ready = False
+
+    def _get_connection(self):
+        """Get database connection, creating the schema on first use."""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        if not self._schema_ready:
+            create_measurement_schema(conn)
+            ImportManifest(conn).ensure_schema()
+            PHMFeatureStore.ensure_schema(conn)
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _get_or_create_bearing(conn: sqlite3.Connection, bearing_name: str) -> int:
+        row = conn.execute(
+            "SELECT bearing_id FROM bearings WHERE bearing_name = ?", (bearing_name,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        cursor = conn.execute(
+            "INSERT INTO bearings (bearing_name) VALUES (?)", (bearing_name,)
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def _assign_file(
+        conn: sqlite3.Connection,
+        bearing_id: int,
+        file_number: Optional[int],
+        file_name: Optional[str]
+    ) -> Tuple[int, str]:
+        """(file_number, file_name) of a new file; taken numbers and names are never reused."""
+        def taken(column: str, value) -> bool:
+            return value is not None and conn.execute(
+                f"SELECT 1 FROM measurement_files WHERE bearing_id = ? AND {column} = ?",
+                (bearing_id, value)
+            ).fetchone() is not None
+
+        name_taken = taken('file_name', file_name)
+        if file_number is None or name_taken or taken('file_number', file_number):
+            row = conn.execute(
+                "SELECT COALESCE(MAX(file_number), 0) FROM measurement_files WHERE bearing_id = ?",
+                (bearing_id,)
+            ).fetchone()
+            file_number = int(row[0]) + 1
+
+        if file_name is None:
+            file_name = f"acc_{file_number:05d}.csv"
+            name_taken = taken('file_name', file_name)
+        if name_taken:
+            # 同名的歷史擷取檔保留原資料，新擷取檔改名附加在最後
+            path = Path(file_name)
+            file_name = f"{path.stem}_{file_number:05d}{path.suffix}"
+        return file_number, file_name
+
+    def ingest(
+        self,
+        bearing_name: str,
+        data: np.ndarray,
+        file_name: Optional[str] = None,
+        file_number: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Store one acquisition and its features, then publish the feature point.
+
+        Existing measurements are never overwritten: an acquisition whose
+        file name or file number is already taken by the bearing is appended
+        after its last file, under `<stem>_<file_number><suffix>` if needed.
+        Numbers are assigned inside the insert transaction, so concurrent
+        ingests of one bearing get distinct file numbers.
+
+        Args:
+            bearing_name: Target bearing (created if unknown)
+            data: (n, 6) PHM rows or (n, 2) horizontal/vertical samples
+            file_name: Stored file name (default: acc_<file_number>.csv)
+            file_number: Position in the bearing history (default: next number)
+
+        Returns:
+            The published feature event
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[1] not in (2, 6):
+            raise ValueError("Acquisition must have 2 (h, v) or 6 (PHM) columns")
+        n = data.shape[0]
+        if n == 0:
+            raise ValueError("Acquisition is empty")
+        if self.expected_samples and n != self.expected_samples:
+            raise ValueError(f"Expected {self.expected_samples} samples, got {n}")
+
+        if data.shape[1] == 2:
+            time_columns = acquisition_time_columns(n, self.sampling_rate)
+            horiz, vert = data[:, 0], data[:, 1]
+        else:
+            time_columns = data[:, :4].astype(np.int64)
+            horiz, vert = data[:, 4], data[:, 5]
+
+        conn = self._get_connection()
+        try:
+            store = PHMFeatureStore(self.db_path, self.sampling_rate)
+            features = store.compute_features(horiz, vert)
+
+            # 寫入鎖：檔案編號的分配與插入在同一交易內，避免並行匯入取得相同編號
+            conn.execute("BEGIN IMMEDIATE")
+            bearing_id = self._get_or_create_bearing(conn, bearing_name)
+            file_number, file_name = self._assign_file(conn, bearing_id, file_number, file_name)
+            cursor = conn.execute("""
+                INSERT INTO measurement_files (bearing_id, file_name, file_number, record_count)
+                VALUES (?, ?, ?, ?)
+            """, (bearing_id, file_name, file_number, n))
+            file_id = cursor.lastrowid
+
+            conn.executemany("""
+                INSERT INTO measurements
+                (file_id, hour, minute, second, microsecond, horizontal_acceleration, vertical_acceleration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                (file_id, int(t[0]), int(t[1]), int(t[2]), int(t[3]), float(h), float(v))
+                for t, h, v in zip(time_columns, horiz, vert)
+            ))
+            store.save_file_features(conn, file_id, features)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        event = {
+            'type': 'feature_point',
+            'bearing_name': bearing_name,
+            'file_id': file_id,
+            'file_number': file_number,
+            'file_name': file_name,
+            'record_count': n,
+            'ingested_at': datetime.now().isoformat(),
+            'features': finite_features(features),
+        }
+        if self.broker is not None:
+            self.broker.publish(event)
+        return event
+
+    def ingest_file(self, bearing_name: str, path: Path, binary_dtype: str = 'float32') -> Dict[str, Any]:
+        """Ingest a .csv or .bin acquisition file, keeping its file name."""
+        path = Path(path)
+        content = path.read_bytes()
+        if path.suffix.lower() == '.csv':
+            data = parse_csv_acquisition(content)
+        else:
+            data = parse_binary_acquisition(content, binary_dtype)
+
+        match = FILE_NUMBER_PATTERN.search(path.stem)
+        file_number = int(match.group(1)) if match else None
+        return self.ingest(bearing_name, data, file_name=path.name, file_number=file_number)
+
+
+class PHMDirectoryWatcher:
+    """
+    Poll `<watch_dir>/<bearing_name>/` for new acquisition files.
+
+    Files are ingested once their mtime has been stable for `settle_time`
+    seconds; the import manifest records what has already been ingested so
+    restarts do not re-ingest unchanged files. Files that cannot be parsed
+    are recorded as failed and skipped until their content changes; a
+    modified file is ingested as a new acquisition.
+    """
+
+    def __init__(
+        self,
+        watch_dir: str,
+        ingestor: PHMIngestor,
+        poll_interval: float = PHM_INGEST_POLL_INTERVAL,
+        settle_time: float = 1.0,
+        binary_dtype: str = 'float32'
+    ):
+        self.watch_dir = Path(watch_dir)
+        self.ingestor = ingestor
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.binary_dtype = binary_dtype
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan_once(self) -> List[Dict[str, Any]]:
+        """Ingest every new or modified acquisition file; returns the published events."""
+        events = []
+        if not self.watch_dir.is_dir():
+            return events
+
+        conn = self.ingestor._get_connection()
+        try:
+            manifest = ImportManifest(conn)
+            now = time.time()
+            for bearing_dir in sorted(d for d in self.watch_dir.iterdir() if d.is_dir()):
+                for path in sorted(bearing_dir.iterdir()):
+                    if path.suffix.lower() not in SUPPORTED_SUFFIXES or not path.is_file():
+                        continue
+                    # 檔案仍在寫入中
+                    if now - path.stat().st_mtime < self.settle_time:
+                        continue
+
+                    check = manifest.check(bearing_dir.name, path)
+                    if check['action'] == ACTION_SKIP:
+                        continue
+
+                    manifest.mark_importing(
+                        bearing_dir.name, path.name,
+                        check['file_size'], check['file_mtime'], check['content_hash']
+                    )
+                    conn.commit()
+                    try:
+                        event = self.ingestor.ingest_file(bearing_dir.name, path, self.binary_dtype)
+                    except ValueError as e:
+                        # 內容無法解析：記錄失敗，檔案變更前不再重試
+                        manifest.mark_failed(bearing_dir.name, path.name)
+                        conn.commit()
+                        logger.error(f"Failed to ingest {path}, skipped until it changes: {e}")
+                        continue
+                    except Exception as e:
+                        logger.error(f"Failed to ingest {path}: {e}")
+                        continue
+                    manifest.mark_complete(bearing_dir.name, path.name, event['file_id'], event['record_count'])
+                    conn.commit()
+                    logger.info(f"Ingested {bearing_dir.name}/{path.name} as file {event['file_number']}")
+                    events.append(event)
+        finally:
+            conn.close()
+        return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scan_once()
+            except Exception as e:
+                logger.error(f"Directory watcher scan failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Start polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='phm-ingest-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the polling thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main():
+    """Command-line entry point: ingest files once or watch a directory."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Ingest PHM acquisitions into the database")
+    parser.add_argument('--db', default=None, help="PHM database path (default: config)")
+    parser.add_argument('--dtype', default='float32', choices=['float32', 'float64'],
+                        help="sample type of .bin acquisitions")
+    parser.add_argument('--watch', metavar='DIR', help="poll DIR/<bearing_name>/ for new acquisitions")
+    parser.add_argument('--interval', type=float, default=PHM_INGEST_POLL_INTERVAL,
+                        help="polling interval in seconds")
+    parser.add_argument('--bearing', help="bearing name for explicitly listed files")
+    parser.add_argument('files', nargs='*', help="acquisition files to ingest")
+    args = parser.parse_args()
+
+    ingestor = PHMIngestor(args.db)
+
+    if args.watch:
+        watcher = PHMDirectoryWatcher(args.watch, ingestor, args.interval, binary_dtype=args.dtype)
+        logger.info(f"Watching {args.watch} every {args.interval}s (Ctrl+C to stop)")
+        try:
+            while True:
+                watcher.scan_once()
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if not args.bearing or not args.files:
+        parser.error("either --watch DIR or --bearing NAME FILE... is required")
+
+    for file_path in args.files:
+        event = ingestor.ingest_file(args.bearing, Path(file_path), args.dtype)
+        logger.info(f"Ingested {file_path} as {args.bearing} file {event['file_number']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,761 @@
+"""
+PHM Background Job Module
+SQLite-backed job queue and worker process pool for bearing-wide analyses
+(CWT / STFT normalized energy, filter features, Hilbert features of every
+file of a bearing) that are too slow to run inside an HTTP request.
+
+Jobs are stored next to the measurement tables, identical submissions are
+deduplicated, per-file results are persisted as they finish so interrupted
+jobs resume where they stopped, and running jobs can be cancelled.
+
+A claimed job is leased to one worker, which renews the lease with a
+heartbeat; only jobs whose lease expired are taken over by another worker,
+so several workers (in the API and standalone) can share one queue.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from backend.config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, PHM_JOB_WORKERS, PHM_JOB_POLL_INTERVAL,
+        PHM_JOB_LEASE_TIMEOUT
+    )
+    from backend.filterprocess import FilterProcess
+    from backend.hilberttransform import HilbertTransform
+    from backend.phm_feature_store import CHANNELS, PHMFeatureStore
+    from backend.timefrequency import TimeFrequency
+except ModuleNotFoundError:
+    from config import (
+        PHM_DATABASE_PATH, DEFAULT_SAMPLING_RATE, PHM_JOB_WORKERS, PHM_JOB_POLL_INTERVAL,
+        PHM_JOB_LEASE_TIMEOUT
+    )
+    from filterprocess import FilterProcess
+    from hilberttransform import HilbertTransform
+    from phm_feature_store import CHANNELS, PHMFeatureStore
+    from timefrequency import TimeFrequency
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+# 可重複使用結果的狀態（去重用）
+REUSABLE_STATUSES = (JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED)
+
+
+# ==================== Per-file analysis tasks ====================
+
+def _freq_range(params: Dict[str, Any], default=None):
+    value = params.get('freq_range', default)
+    return tuple(value) if value is not None else None
+
+
+def _normalized_energy(magnitude, frequencies, time_axis, params: Dict[str, Any]) -> List[Dict]:
+    ne = TimeFrequency.normalized_energy_analysis(
+        magnitude, frequencies, time_axis,
+        freq_range=_freq_range(params, (800, 2500)),
+        time_segment_duration=params.get('time_segment_duration', 0.5)
+    )
+    return ne.to_dict('records')
+
+
+def cwt_task(x: np.ndarray, fs: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """CWT features and normalized energy (NE) of one channel."""
+    scales = np.arange(1, int(params.get('max_scale', 64)) + 1)
+    result = TimeFrequency.cwt_analysis(
+        x, fs=fs, wavelet=params.get('wavelet', 'morl'), scales=scales,
+        freq_range=_freq_range(params)
+    )
+    features = {key: result[key] for key in ('np4', 'max_scale', 'max_freq', 'total_energy')}
+    if params.get('normalized_energy', True):
+        time_axis = np.arange(len(x)) / fs
+        features['normalized_energy'] = _normalized_energy(
+            result['magnitude'], result['frequencies'], time_axis, params
+        )
+    return features
+
+
+def stft_task(x: np.ndarray, fs: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """STFT features and normalized energy (NE) of one channel."""
+    result = TimeFrequency.stft_analysis(
+        x, fs=fs, window=params.get('window', 'hann'),
+        nperseg=int(params.get('nperseg', 256)), freq_range=_freq_range(params)
+    )
+    features = {
+        key: result[key]
+        for key in ('np4', 'max_freq', 'max_time', 'max_magnitude', 'total_energy')
+    }
+    if params.get('normalized_energy', True):
+        features['normalized_energy'] = _normalized_energy(
+            result['magnitude'], result['frequencies'], result['time'], params
+        )
+    return features
+
+
+def filter_task(x: np.ndarray, fs: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """FilterProcess features (NA4, FM4, M6A, M8A, ER) of one channel."""
+    features = FilterProcess.calculate_all_features(x, fs, int(params.get('segment_count', 10)))
+    features.pop('segment_count', None)
+    return features
+
+
+def hilbert_task(x: np.ndarray, fs: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Hilbert envelope features (NB4, envelope statistics) of one channel."""
+    result = HilbertTransform().analyze_signal(x, int(params.get('segment_count', 10)))
+    return {'nb4': result['nb4'], 'envelope_stats': result['envelope_stats']}
+
+
+JOB_TYPES: Dict[str, Callable[[np.ndarray, int, Dict[str, Any]], Dict[str, Any]]] = {
+    'cwt': cwt_task,
+    'stft': stft_task,
+    'filter': filter_task,
+    'hilbert': hilbert_task,
+}
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert numpy values to JSON-safe builtins (NaN / inf -> None)."""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _to_builtin(value.tolist())
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+
+def run_file_task(db_path: str, job_type: str, file_id: int, fs: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one job type on both channels of one file (executed in a worker process)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        signals = PHMFeatureStore.load_file_signals(conn, file_id)
+    finally:
+        conn.close()
+
+    if signals is None:
+        return {}
+
+    task = JOB_TYPES[job_type]
+    return _to_builtin({
+        channel: task(signal, fs, params)
+        for channel, signal in zip(CHANNELS, signals)
+    })
+
+
+def _lower_priority():
+    # 背景工作降低優先權，避免與互動請求搶 CPU
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+# ==================== Queue ====================
+
+class PHMJobQueue:
+    """Job queue stored in the PHM database."""
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            self.db_path = Path(PHM_DATABASE_PATH)
+        else:
+            self.db_path = Path(db_path)
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database not found: {self.db_path}")
+
+        conn = self._get_connection()
+        try:
+            self.ensure_schema(conn)
+        finally:
+            conn.close()
+
+    def _get_connection(self):
+        """Get database connection."""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def ensure_schema(conn: sqlite3.Connection):
+        """Create the job tables if they do not exist."""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_type TEXT NOT NULL,
+                bearing_name TEXT NOT NULL,
+                sampling_rate INTEGER NOT NULL,
+                params TEXT NOT NULL,
+                job_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress_done INTEGER DEFAULT 0,
+                progress_total INTEGER DEFAULT 0,
+                cancel_requested INTEGER DEFAULT 0,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                worker_id TEXT,
+                heartbeat_at TIMESTAMP
+            )
+        """)
+        # 舊資料庫補上租約欄位
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(analysis_jobs)").fetchall()}
+        for column in ('worker_id TEXT', 'heartbeat_at TIMESTAMP'):
+            if column.split()[0] not in columns:
+                conn.execute(f"ALTER TABLE analysis_jobs ADD COLUMN {column}")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_key
+            ON analysis_jobs(job_key)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status
+            ON analysis_jobs(status)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_job_results (
+                job_id INTEGER NOT NULL,
+                file_id INTEGER NOT NULL,
+                file_number INTEGER,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, file_id),
+                FOREIGN KEY (job_id) REFERENCES analysis_jobs(job_id)
+            )
+        """)
+        conn.commit()
+
+    @staticmethod
+    def job_key(
+        job_type: str,
+        bearing_name: str,
+        sampling_rate: int,
+        params: Dict[str, Any],
+        data_version: str = ''
+    ) -> str:
+        """Deduplication key of a job (order-independent params, bearing data version)."""
+        canonical = json.dumps(
+            [job_type, bearing_name, int(sampling_rate), params, data_version],
+            sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def data_version(conn: sqlite3.Connection, bearing_name: str) -> Tuple[int, str]:
+        """
+        (file count, version) of a bearing's measurements.
+
+        The version hashes every file id with its newest measurement id;
+        measurement ids are never reused, so adding, removing or re-importing
+        any file changes it.
+        """
+        rows = conn.execute("""
+            SELECT mf.file_id,
+                   (SELECT MAX(m.measurement_id) FROM measurements m WHERE m.file_id = mf.file_id)
+            FROM measurement_files mf
+            JOIN bearings b ON mf.bearing_id = b.bearing_id
+            WHERE b.bearing_name = ?
+            ORDER BY mf.file_id
+        """, (bearing_name,)).fetchall()
+        digest = hashlib.sha256(json.dumps([list(row) for row in rows]).encode('utf-8'))
+        return len(rows), digest.hexdigest()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        job.pop('job_key', None)
+        total = job['progress_total'] or 0
+        job['progress'] = round(100.0 * job['progress_done'] / total, 1) if total else 0.0
+        return job
+
+    @staticmethod
+    def _bearing_files(conn: sqlite3.Connection, bearing_name: str) -> List[Tuple[int, int]]:
+        rows = conn.execute("""
+            SELECT mf.file_number, mf.file_id
+            FROM measurement_files mf
+            JOIN bearings b ON mf.bearing_id = b.bearing_id
+            WHERE b.bearing_name = ?
+            ORDER BY mf.file_number
+        """, (bearing_name,)).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def submit(
+        self,
+        job_type: str,
+        bearing_name: str,
+        params: Optional[Dict[str, Any]] = None,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a bearing-wide job, or return the identical job already known.
+
+        A queued, running or completed job with the same type, bearing,
+        sampling rate and params is reused only while the bearing's data is
+        unchanged (see data_version).
+
+        Returns:
+            (job dict, created) - created is False for a deduplicated job
+
+        Raises:
+            ValueError: Unknown job type
+            LookupError: Bearing has no files
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type} (available: {', '.join(JOB_TYPES)})")
+
+        params = params or {}
+
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            file_count, data_version = self.data_version(conn, bearing_name)
+            if file_count == 0:
+                conn.rollback()
+                raise LookupError(f"No files found for bearing: {bearing_name}")
+
+            key = self.job_key(job_type, bearing_name, sampling_rate, params, data_version)
+
+            placeholders = ','.join('?' * len(REUSABLE_STATUSES))
+            existing = conn.execute(f"""
+                SELECT * FROM analysis_jobs
+                WHERE job_key = ? AND status IN ({placeholders})
+                ORDER BY job_id DESC
+                LIMIT 1
+            """, (key, *REUSABLE_STATUSES)).fetchone()
+
+            if existing is not None:
+                conn.rollback()
+                return self._row_to_job(existing), False
+
+            cursor = conn.execute("""
+                INSERT INTO analysis_jobs
+                (job_type, bearing_name, sampling_rate, params, job_key, status, progress_total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (job_type, bearing_name, int(sampling_rate), json.dumps(params),
+                  key, JOB_QUEUED, file_count))
+            conn.commit()
+            return self.get(cursor.lastrowid), True
+        finally:
+            conn.close()
+
+    def get(self, job_id: int, include_results: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a job (and optionally its per-file results ordered by file number)."""
+        conn = self._get_connection()
+        try:
+            row = conn.execute("SELECT * FROM analysis_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+
+            job = self._row_to_job(row)
+            if include_results:
+                rows = conn.execute("""
+                    SELECT file_number, result
+                    FROM analysis_job_results
+                    WHERE job_id = ?
+                    ORDER BY file_number
+                """, (job_id,)).fetchall()
+                job['results'] = [
+                    {'file_number': r['file_number'], **json.loads(r['result'])}
+                    for r in rows
+                ]
+            return job
+        finally:
+            conn.close()
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """List the most recent jobs, optionally filtered by status."""
+        conn = self._get_connection()
+        try:
+            query = "SELECT * FROM analysis_jobs"
+            params: tuple = ()
+            if status is not None:
+                query += " WHERE status = ?"
+                params = (status,)
+            query += " ORDER BY job_id DESC LIMIT ?"
+            rows = conn.execute(query, (*params, limit)).fetchall()
+            return [self._row_to_job(row) for row in rows]
+        finally:
+            conn.close()
+
+    def cancel(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job: queued jobs are cancelled immediately, running jobs
+        stop after their in-flight files. Finished jobs are left unchanged.
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                UPDATE analysis_jobs
+                SET status = ?, cancel_requested = 1, finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ? AND status = ?
+            """, (JOB_CANCELLED, job_id, JOB_QUEUED))
+            conn.execute("""
+                UPDATE analysis_jobs SET cancel_requested = 1
+                WHERE job_id = ? AND status = ?
+            """, (job_id, JOB_RUNNING))
+            conn.commit()
+        finally:
+            conn.close()
+        return self.get(job_id)
+
+    @staticmethod
+    def _expire_leases(conn: sqlite3.Connection, lease_timeout: float) -> int:
+        # 租約過期的執行中工作：要求取消者結束，其餘重新排入佇列
+        expired = "status = ? AND (heartbeat_at IS NULL OR heartbeat_at < datetime('now', ?))"
+        age = f"-{float(lease_timeout)} seconds"
+        conn.execute(f"""
+            UPDATE analysis_jobs SET status = ?, worker_id = NULL, finished_at = CURRENT_TIMESTAMP
+            WHERE {expired} AND cancel_requested = 1
+        """, (JOB_CANCELLED, JOB_RUNNING, age))
+        cursor = conn.execute(f"""
+            UPDATE analysis_jobs SET status = ?, worker_id = NULL
+            WHERE {expired} AND cancel_requested = 0
+        """, (JOB_QUEUED, JOB_RUNNING, age))
+        return cursor.rowcount
+
+    def claim_next(
+        self,
+        worker_id: Optional[str] = None,
+        lease_timeout: float = PHM_JOB_LEASE_TIMEOUT
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Atomically lease the oldest queued job to a worker and return it.
+
+        Running jobs whose lease expired (their worker stopped sending
+        heartbeats) are put back in the queue first.
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._expire_leases(conn, lease_timeout)
+            row = conn.execute("""
+                SELECT job_id FROM analysis_jobs
+                WHERE status = ?
+                ORDER BY job_id
+                LIMIT 1
+            """, (JOB_QUEUED,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+
+            conn.execute("""
+                UPDATE analysis_jobs
+                SET status = ?, worker_id = ?, heartbeat_at = CURRENT_TIMESTAMP,
+                    started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+                WHERE job_id = ?
+            """, (JOB_RUNNING, worker_id, row['job_id']))
+            conn.commit()
+        finally:
+            conn.close()
+        return self.get(row['job_id'])
+
+    def heartbeat(self, job_id: int, worker_id: Optional[str]) -> bool:
+        """Renew a worker's lease on a running job; False if the lease was lost."""
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute("""
+                UPDATE analysis_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+                WHERE job_id = ? AND status = ? AND worker_id IS ?
+            """, (job_id, JOB_RUNNING, worker_id))
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def release(self, job_id: int, worker_id: Optional[str]):
+        """Give a running job back to the queue (worker shutting down)."""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                UPDATE analysis_jobs SET status = ?, worker_id = NULL
+                WHERE job_id = ? AND status = ? AND worker_id IS ?
+            """, (JOB_QUEUED, job_id, JOB_RUNNING, worker_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def requeue_interrupted(self, lease_timeout: float = PHM_JOB_LEASE_TIMEOUT) -> int:
+        """
+        Put jobs left running by a stopped worker back in the queue.
+
+        Only jobs whose lease expired are requeued; jobs still held by a live
+        worker (another process sharing the database) are left alone.
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            count = self._expire_leases(conn, lease_timeout)
+            conn.commit()
+            return count
+        finally:
+            conn.close()
+
+    def pending_files(self, job: Dict[str, Any]) -> List[Tuple[int, int]]:
+        """(file_number, file_id) of the job's bearing that have no result yet."""
+        conn = self._get_connection()
+        try:
+            done = {
+                row[0] for row in conn.execute(
+                    "SELECT file_id FROM analysis_job_results WHERE job_id = ?", (job['job_id'],)
+                ).fetchall()
+            }
+            return [f for f in self._bearing_files(conn, job['bearing_name']) if f[1] not in done]
+        finally:
+            conn.close()
+
+    def status_counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        conn = self._get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status"
+            ).fetchall()
+            return {row[0]: row[1] for row in rows}
+        finally:
+            conn.close()
+
+    def is_cancel_requested(self, job_id: int) -> bool:
+        conn = self._get_connection()
+        try:
+            row = conn.execute(
+                "SELECT cancel_requested FROM analysis_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            return bool(row and row[0])
+        finally:
+            conn.close()
+
+    def record_result(self, job_id: int, file_number: int, file_id: int, result: Dict[str, Any]):
+        """Store the result of one file and advance the job progress."""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO analysis_job_results (job_id, file_id, file_number, result)
+                VALUES (?, ?, ?, ?)
+            """, (job_id, file_id, file_number, json.dumps(result)))
+            conn.execute("""
+                UPDATE analysis_jobs
+                SET progress_done = (
+                    SELECT COUNT(*) FROM analysis_job_results WHERE job_id = ?
+                )
+                WHERE job_id = ?
+            """, (job_id, job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def finish(self, job_id: int, status: str, error: Optional[str] = None):
+        """Mark a job completed / failed / cancelled."""
+        conn = self._get_connection()
+        try:
+            conn.execute("""
+                UPDATE analysis_jobs
+                SET status = ?, error = ?, finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ?
+            """, (status, error, job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+# ==================== Worker ====================
+
+class PHMJobWorker:
+    """Runs queued jobs one at a time, spreading their files over a process pool."""
+
+    def __init__(
+        self,
+        queue: PHMJobQueue,
+        max_workers: int = PHM_JOB_WORKERS,
+        poll_interval: float = PHM_JOB_POLL_INTERVAL,
+        broker=None,
+        lease_timeout: float = PHM_JOB_LEASE_TIMEOUT
+    ):
+        self.queue = queue
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.broker = broker
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.inflight = 0
+
+    def _get_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn：避免在多執行緒的 API 行程中 fork
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_lower_priority
+            )
+        return self._executor
+
+    def _publish(self, job: Dict[str, Any], event_type: str, **extra):
+        if self.broker is None:
+            return
+        self.broker.publish({
+            'type': event_type,
+            'job_id': job['job_id'],
+            'job_type': job['job_type'],
+            'bearing_name': job['bearing_name'],
+            **extra
+        })
+
+    def run_job(self, job: Dict[str, Any]) -> str:
+        """Run one claimed job to completion, failure or cancellation; returns the final status."""
+        job_id = job['job_id']
+        pending = self.queue.pending_files(job)
+        executor = self._get_executor()
+        in_flight: Dict[concurrent.futures.Future, Tuple[int, int]] = {}
+        window = self.max_workers * 2
+        done_count = job['progress_total'] - len(pending)
+        last_heartbeat = time.monotonic()
+
+        try:
+            while pending or in_flight:
+                if time.monotonic() - last_heartbeat >= self.lease_timeout / 4:
+                    last_heartbeat = time.monotonic()
+                    if not self.queue.heartbeat(job_id, self.worker_id):
+                        # 租約已過期並由其他工作程序接手，放棄本次執行
+                        for future in in_flight:
+                            future.cancel()
+                        return JOB_QUEUED
+
+                if self._stop.is_set() or self.queue.is_cancel_requested(job_id):
+                    for future in in_flight:
+                        future.cancel()
+                    if self._stop.is_set():
+                        # 停止時交還佇列，由下一個工作程序從未完成的檔案續跑
+                        self.queue.release(job_id, self.worker_id)
+                        return JOB_QUEUED
+                    self.queue.finish(job_id, JOB_CANCELLED)
+                    self._publish(job, 'job_finished', status=JOB_CANCELLED)
+                    return JOB_CANCELLED
+
+                while pending and len(in_flight) < window:
+                    file_number, file_id = pending.pop(0)
+                    future = executor.submit(
+                        run_file_task, str(self.queue.db_path), job['job_type'], file_id,
+                        job['sampling_rate'], job['params']
+                    )
+                    in_flight[future] = (file_number, file_id)
+
+                self.inflight = len(in_flight)
+                finished, _ = concurrent.futures.wait(
+                    in_flight, timeout=self.poll_interval,
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    file_number, file_id = in_flight.pop(future)
+                    self.queue.record_result(job_id, file_number, file_id, future.result())
+                    done_count += 1
+                    self._publish(job, 'job_progress', file_number=file_number,
+                                  progress_done=done_count, progress_total=job['progress_total'])
+
+        except Exception as e:
+            for future in in_flight:
+                future.cancel()
+            if isinstance(e, concurrent.futures.process.BrokenProcessPool):
+                # 工作行程異常結束，下一個工作重新建立行程池
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            self.queue.finish(job_id, JOB_FAILED, str(e))
+            self._publish(job, 'job_finished', status=JOB_FAILED, error=str(e))
+            return JOB_FAILED
+
+        self.queue.finish(job_id, JOB_COMPLETED)
+        self._publish(job, 'job_finished', status=JOB_COMPLETED)
+        return JOB_COMPLETED
+
+    def run_once(self) -> Optional[int]:
+        """Claim and run the next queued job; returns its id, or None if the queue is empty."""
+        job = self.queue.claim_next(self.worker_id, self.lease_timeout)
+        if job is None:
+            return None
+        try:
+            self.run_job(job)
+        finally:
+            self.inflight = 0
+        return job['job_id']
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once() is None:
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Requeue jobs with expired leases and start the worker thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.queue.requeue_interrupted(self.lease_timeout)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='phm-job-worker', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker thread and the process pool."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def main():
+    """Run a standalone job worker (the API runs none unless PHM_JOB_WORKERS > 0)."""
+    parser = argparse.ArgumentParser(description='PHM background job worker')
+    parser.add_argument('--db', default=None, help='PHM database path')
+    parser.add_argument('--workers', type=int,
+                        default=PHM_JOB_WORKERS or max(1, (os.cpu_count() or 2) // 2),
+                        help='Number of worker processes')
+    args = parser.parse_args()
+
+    worker = PHMJobWorker(PHMJobQueue(args.db), args.workers)
+    worker.queue.requeue_interrupted(worker.lease_timeout)
+    print(f"Job worker started with {worker.max_workers} processes (Ctrl+C to stop)")
+    try:
+        while True:
+            job_id = worker.run_once()
+            if job_id is None:
+                time.sleep(worker.poll_interval)
+            else:
+                job = worker.queue.get(job_id)
+                print(f"Job {job_id} ({job['job_type']} {job['bearing_name']}): {job['status']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+
+
+if __name__ == '__main__':
+    main()
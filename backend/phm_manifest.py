@@ -0,0 +1,153 @@
+"""
+PHM Import Manifest Module
+Tracks the size, mtime, content hash and import status of every source
+CSV file so that re-imports can skip unchanged files without reading them,
+resume after a crash, re-ingest only modified files and skip files that
+failed to parse until their content changes.
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+STATUS_IMPORTING = 'importing'
+STATUS_COMPLETE = 'complete'
+STATUS_FAILED = 'failed'
+
+# 內容未變更時不需重新匯入的狀態
+SETTLED_STATUSES = (STATUS_COMPLETE, STATUS_FAILED)
+
+# check() 的判斷結果
+ACTION_SKIP = 'skip'
+ACTION_IMPORT = 'import'
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImportManifest:
+    """Import manifest stored next to the measurement tables."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def ensure_schema(self):
+        """Create the import_manifest table if it does not exist."""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS import_manifest (
+                bearing_name TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                file_size INTEGER NOT NULL,
+                file_mtime REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                file_id INTEGER,
+                record_count INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (bearing_name, file_name)
+            )
+        """)
+        self.conn.commit()
+
+    def lookup(self, bearing_name: str, file_name: str) -> Optional[Dict[str, Any]]:
+        """Get the manifest entry of a source file."""
+        cursor = self.conn.execute("""
+            SELECT file_size, file_mtime, content_hash, status, file_id, record_count
+            FROM import_manifest
+            WHERE bearing_name = ? AND file_name = ?
+        """, (bearing_name, file_name))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        keys = ('file_size', 'file_mtime', 'content_hash', 'status', 'file_id', 'record_count')
+        return dict(zip(keys, row))
+
+    def check(self, bearing_name: str, path: Path) -> Dict[str, Any]:
+        """
+        Decide whether a source file has to be (re-)imported.
+
+        Unchanged size and mtime of a completed or failed entry skip the
+        file without reading it. Otherwise the content hash decides: a
+        matching hash only refreshes the stat fields, anything else (new
+        file, modified file or an interrupted import) is returned as
+        ACTION_IMPORT.
+
+        Returns:
+            dict with 'action', 'reason', 'file_size', 'file_mtime', 'content_hash'
+        """
+        stat = path.stat()
+        entry = self.lookup(bearing_name, path.name)
+        result = {
+            'file_size': stat.st_size,
+            'file_mtime': stat.st_mtime,
+            'content_hash': None,
+        }
+
+        if (entry is not None and entry['status'] in SETTLED_STATUSES
+                and entry['file_size'] == stat.st_size
+                and entry['file_mtime'] == stat.st_mtime):
+            # 失敗的檔案在內容變更前不再重試
+            reason = 'failed' if entry['status'] == STATUS_FAILED else 'unchanged'
+            result.update(action=ACTION_SKIP, reason=reason)
+            return result
+
+        content_hash = file_sha256(path)
+        result['content_hash'] = content_hash
+
+        if entry is None:
+            result.update(action=ACTION_IMPORT, reason='new')
+        elif entry['status'] not in SETTLED_STATUSES:
+            result.update(action=ACTION_IMPORT, reason='incomplete')
+        elif entry['content_hash'] != content_hash:
+            result.update(action=ACTION_IMPORT, reason='modified')
+        else:
+            # 內容相同，只更新 stat 資訊
+            self.conn.execute("""
+                UPDATE import_manifest
+                SET file_size = ?, file_mtime = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE bearing_name = ? AND file_name = ?
+            """, (stat.st_size, stat.st_mtime, bearing_name, path.name))
+            self.conn.commit()
+            reason = 'failed' if entry['status'] == STATUS_FAILED else 'touched'
+            result.update(action=ACTION_SKIP, reason=reason)
+
+        return result
+
+    def mark_importing(
+        self,
+        bearing_name: str,
+        file_name: str,
+        file_size: int,
+        file_mtime: float,
+        content_hash: str
+    ):
+        """Record that a file import has started (caller commits)."""
+        self.conn.execute("""
+            INSERT OR REPLACE INTO import_manifest
+            (bearing_name, file_name, file_size, file_mtime, content_hash,
+             status, file_id, record_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, CURRENT_TIMESTAMP)
+        """, (bearing_name, file_name, file_size, file_mtime, content_hash, STATUS_IMPORTING))
+
+    def mark_complete(self, bearing_name: str, file_name: str, file_id: int, record_count: int):
+        """Record that a file import has finished (caller commits)."""
+        self.conn.execute("""
+            UPDATE import_manifest
+            SET status = ?, file_id = ?, record_count = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE bearing_name = ? AND file_name = ?
+        """, (STATUS_COMPLETE, file_id, record_count, bearing_name, file_name))
+
+    def mark_failed(self, bearing_name: str, file_name: str):
+        """Record that a file could not be imported; skipped until its content changes (caller commits)."""
+        self.conn.execute("""
+            UPDATE import_manifest
+            SET status = ?, file_id = NULL, record_count = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE bearing_name = ? AND file_name = ?
+        """, (STATUS_FAILED, bearing_name, file_name))
@@ -0,0 +1,273 @@
+"""
+PHM Metrics Module
+Lightweight request instrumentation: per-request stage timers (load /
+compute / serialize, plus the remaining response encoding time) exposed as
+Server-Timing headers, and Prometheus text-format metrics (latency
+histograms per endpoint and stage, cache hit ratios, queue depth gauges)
+served by /metrics.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# 秒；與 Prometheus client 預設值相近
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (
+        f'{k}="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in items
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            # [各 bucket 計數..., +Inf 計數, 總和]
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {count}")
+            count = values[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {values[-1]!r}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label set."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def items(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self.items():
+            lines.append(f"{self.name}{_format_labels(key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics served by /metrics."""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            'phm_request_duration_seconds', 'HTTP request latency by endpoint.'
+        )
+        self.stage_duration = Histogram(
+            'phm_stage_duration_seconds', 'Handler stage latency (load, compute, serialize, encode) by endpoint.'
+        )
+        self.requests = Counter('phm_requests_total', 'HTTP requests by endpoint and status.')
+        self.cache_requests = Counter('phm_cache_requests_total', 'Cache lookups by cache and result.')
+        # name -> (help, callback returning {labels tuple: value})
+        self._gauges: Dict[str, Tuple[str, Callable[[], Dict[LabelKey, float]]]] = {}
+
+    def record_cache(self, cache: str, hit: bool):
+        """Count one lookup of a named cache."""
+        self.cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
+
+    def register_gauge(self, name: str, help_text: str, callback: Callable[[], object]):
+        """
+        Register a gauge evaluated at scrape time.
+
+        The callback returns a number, or a dict mapping label dicts
+        (given as tuples of (name, value) pairs) to numbers.
+        """
+        def collect() -> Dict[LabelKey, float]:
+            value = callback()
+            if isinstance(value, dict):
+                return {_label_key(dict(labels)): v for labels, v in value.items()}
+            return {(): value}
+
+        self._gauges[name] = (help_text, collect)
+
+    def _cache_ratio_lines(self) -> List[str]:
+        totals: Dict[str, Dict[str, float]] = {}
+        for key, value in self.cache_requests.items():
+            labels = dict(key)
+            totals.setdefault(labels['cache'], {})[labels['result']] = value
+        lines = [
+            "# HELP phm_cache_hit_ratio Cache hit ratio since process start.",
+            "# TYPE phm_cache_hit_ratio gauge",
+        ]
+        for cache, counts in sorted(totals.items()):
+            total = counts.get('hit', 0.0) + counts.get('miss', 0.0)
+            ratio = counts.get('hit', 0.0) / total if total else 0.0
+            lines.append(f"phm_cache_hit_ratio{_format_labels(_label_key({'cache': cache}))} {ratio!r}")
+        return lines
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        lines += self.request_duration.render()
+        lines += self.requests.render()
+        lines += self.stage_duration.render()
+        lines += self.cache_requests.render()
+        lines += self._cache_ratio_lines()
+        for name, (help_text, collect) in sorted(self._gauges.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            try:
+                values = collect()
+            except Exception as e:
+                lines.append(f"# {name} unavailable: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 全域指標
+metrics = MetricsRegistry()
+
+
+# ==================== Stage timers ====================
+
+class StageTimer:
+    """Accumulates stage durations of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage_name: str, seconds: float):
+        self.stages[stage_name] = self.stages.get(stage_name, 0.0) + seconds
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Server-Timing header value, durations in milliseconds."""
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current_timer: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar(
+    'phm_stage_timer', default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one stage of the current request (no-op outside requests)."""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency, stage timings and the
+    Server-Timing header. Endpoints are labelled by route template so
+    path parameters do not create new series.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    @staticmethod
+    def _route_template(scope) -> str:
+        from starlette.routing import Match
+
+        router = scope.get('app').router if scope.get('app') is not None else None
+        if router is not None:
+            for route in router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    return getattr(route, 'path', scope['path'])
+        return 'unmatched'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._route_template(scope)
+        timer = StageTimer()
+        token = _current_timer.set(timer)
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+                if timer.stages:
+                    total = time.perf_counter() - timer.started
+                    # 其餘時間主要是 FastAPI 的回應驗證與 JSON 編碼
+                    timer.add('encode', max(0.0, total - sum(timer.stages.values())))
+                    header = timer.server_timing(total)
+                    message = dict(message)
+                    message['headers'] = list(message.get('headers', [])) + [
+                        (b'server-timing', header.encode('latin-1'))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_timer.reset(token)
+            elapsed = time.perf_counter() - timer.started
+            method = scope.get('method', 'GET')
+            self.registry.request_duration.observe(elapsed, endpoint=endpoint, method=method)
+            self.registry.requests.inc(endpoint=endpoint, method=method, status=str(status['code']))
+            for stage_name, seconds in timer.stages.items():
+                self.registry.stage_duration.observe(seconds, endpoint=endpoint, stage=stage_name)
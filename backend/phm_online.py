@@ -0,0 +1,405 @@
+"""
+PHM Online Feature Module
+Incremental feature estimators for continuous monitoring. Signals are fed
+chunk by chunk and every estimator keeps constant state, so long or
+unbounded recordings can be processed without holding them in memory:
+
+- StreamingMoments: count, mean, extremes and central moment sums up to
+  order 8, merged chunk by chunk (RMS, peak, crest factor, kurtosis, FM4,
+  M6A, M8A)
+- SegmentedVariance: running per-segment variances for NA4 / NB4
+- SlidingEnvelope: block-wise Hilbert envelope with overlap margins
+- SlidingSTFT: STFT frames emitted as soon as enough samples arrive
+- OnlineFeatureExtractor: all of the above for one channel
+"""
+
+from math import comb
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import DEFAULT_SAMPLING_RATE
+except ModuleNotFoundError:
+    from config import DEFAULT_SAMPLING_RATE
+
+MAX_ORDER = 8
+
+
+class StreamingMoments:
+    """
+    Mergeable central moments of a stream.
+
+    Central moment sums M_p = Σ(x-μ)^p (p <= 8) are combined with the
+    pairwise update of Pébay (2008), so chunks can arrive in any size and
+    partial results from several workers can be merged.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        # M[p] = Σ(x-μ)^p；M[0] = n、M[1] = 0
+        self.M = np.zeros(MAX_ORDER + 1)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @classmethod
+    def from_array(cls, x: np.ndarray) -> 'StreamingMoments':
+        """Moments of one in-memory chunk."""
+        x = np.asarray(x, dtype=float).ravel()
+        moments = cls()
+        if x.size == 0:
+            return moments
+        moments.n = x.size
+        moments.mean = float(np.mean(x))
+        moments.min = float(np.min(x))
+        moments.max = float(np.max(x))
+        centered = x - moments.mean
+        power = centered * centered
+        moments.M[0] = x.size
+        for p in range(2, MAX_ORDER + 1):
+            moments.M[p] = float(np.sum(power))
+            power = power * centered
+        return moments
+
+    def update(self, chunk: np.ndarray) -> 'StreamingMoments':
+        """Add a chunk of samples."""
+        return self.merge(StreamingMoments.from_array(chunk))
+
+    def merge(self, other: 'StreamingMoments') -> 'StreamingMoments':
+        """Combine another partial result into this one."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.M = other.n, other.mean, other.M.copy()
+            self.min, self.max = other.min, other.max
+            return self
+
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        Ma, Mb = self.M, other.M
+        M = np.zeros(MAX_ORDER + 1)
+        M[0] = n
+        for p in range(2, MAX_ORDER + 1):
+            total = Ma[p] + Mb[p]
+            for k in range(1, p - 1):
+                total += comb(p, k) * delta ** k * (
+                    (-nb / n) ** k * Ma[p - k] + (na / n) ** k * Mb[p - k]
+                )
+            total += (na * nb * delta / n) ** p * (1.0 / nb ** (p - 1) - (-1.0 / na) ** (p - 1))
+            M[p] = total
+
+        self.n = n
+        self.mean = self.mean + delta * nb / n
+        self.M = M
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _ratio(self, order: int) -> float:
+        """N^(k-1)·M_2k / M_2^k (FM4: k=2, M6A: k=3, M8A: k=4)."""
+        denominator = self.M[2] ** order
+        return float(self.n ** (order - 1) * self.M[2 * order] / denominator) if denominator != 0 else float('nan')
+
+    @property
+    def variance(self) -> float:
+        return float(self.M[2] / self.n) if self.n else float('nan')
+
+    @property
+    def rms(self) -> float:
+        return float(np.sqrt(self.variance + self.mean ** 2)) if self.n else float('nan')
+
+    @property
+    def peak(self) -> float:
+        return float(self.max - self.min) if self.n else float('nan')
+
+    @property
+    def crest_factor(self) -> float:
+        rms = self.rms
+        return self.peak / rms if rms else float('nan')
+
+    @property
+    def kurtosis(self) -> float:
+        """Bias-corrected Pearson kurtosis, as TimeDomain.kurt."""
+        n = self.n
+        if n < 4 or self.M[2] == 0:
+            return float('nan')
+        g2 = (self.M[4] / n) / (self.M[2] / n) ** 2 - 3.0
+        return float(((n + 1) * g2 + 6.0) * (n - 1) / ((n - 2) * (n - 3)) + 3.0)
+
+    @property
+    def fm4(self) -> float:
+        return self._ratio(2)
+
+    @property
+    def m6a(self) -> float:
+        return self._ratio(3)
+
+    @property
+    def m8a(self) -> float:
+        return self._ratio(4)
+
+
+class SegmentedVariance:
+    """
+    Overall moments plus running sums over fixed-length segments.
+
+    NA4 / NB4 normalize the 4th moment by the mean segment variance. Only
+    the running sums of the closed segments and the open segment are kept;
+    the open (partial) segment counts as one more segment, so for a signal
+    of exactly m * segment_length samples the result equals the batch value
+    with m segments.
+    """
+
+    def __init__(self, segment_length: int = 256):
+        if segment_length < 2:
+            raise ValueError("segment_length must be at least 2")
+        self.segment_length = segment_length
+        self.total = StreamingMoments()
+        self._segment = StreamingMoments()
+        self.closed_segments = 0
+        self._sum_ss = 0.0
+        self._sum_var = 0.0
+
+    def update(self, chunk: np.ndarray) -> 'SegmentedVariance':
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        self.total.update(chunk)
+        pos = 0
+        while pos < chunk.size:
+            take = min(self.segment_length - self._segment.n, chunk.size - pos)
+            self._segment.update(chunk[pos:pos + take])
+            pos += take
+            if self._segment.n == self.segment_length:
+                self._sum_ss += self._segment.M[2]
+                self._sum_var += self._segment.M[2] / self._segment.n
+                self.closed_segments += 1
+                self._segment = StreamingMoments()
+        return self
+
+    def _segment_sums(self) -> Tuple[int, float, float]:
+        count, sum_ss, sum_var = self.closed_segments, self._sum_ss, self._sum_var
+        if self._segment.n:
+            count += 1
+            sum_ss += self._segment.M[2]
+            sum_var += self._segment.M[2] / self._segment.n
+        return count, sum_ss, sum_var
+
+    @property
+    def na4(self) -> float:
+        """N·Σ(x-μ)⁴ / (mean segment sum of squares)², as FilterProcess.NA4."""
+        count, sum_ss, _ = self._segment_sums()
+        division = (sum_ss / count) ** 2 if count else 0.0
+        return float(self.total.M[4] * self.total.n / division) if division != 0 else float('nan')
+
+    @property
+    def nb4(self) -> float:
+        """(Σ(x-μ)⁴ / N) / (mean segment variance)², as HilbertTransform.calculate_nb4."""
+        count, _, sum_var = self._segment_sums()
+        if not count or sum_var == 0:
+            return 0.0
+        return float((self.total.M[4] / self.total.n) / (sum_var / count) ** 2)
+
+
+class SlidingEnvelope:
+    """
+    Hilbert envelope of a stream, computed block by block.
+
+    Each block is transformed together with `margin` samples of context on
+    both sides and only its centre is emitted, which keeps block-edge
+    artifacts out of the output; the envelope therefore lags the input by
+    `margin` samples until flush(). An optional band-pass is applied
+    causally with carried filter state (unlike the zero-phase filtfilt of
+    the batch envelope analysis).
+    """
+
+    def __init__(
+        self,
+        fs: int = DEFAULT_SAMPLING_RATE,
+        band: Optional[Tuple[float, float]] = None,
+        block: int = 2048,
+        margin: int = 256,
+        order: int = 4
+    ):
+        self.fs = fs
+        self.block = block
+        self.margin = margin
+        self.sos = None
+        self._zi = None
+        if band is not None:
+            self.sos = scipy_signal.butter(order, band, btype='band', fs=fs, output='sos')
+            self._zi = np.zeros((self.sos.shape[0], 2))
+        # 起始處以零填補左側邊界
+        self._buffer = np.zeros(margin)
+
+    def update(self, chunk: np.ndarray) -> np.ndarray:
+        """Add samples; returns the envelope samples that became available."""
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if self.sos is not None:
+            chunk, self._zi = scipy_signal.sosfilt(self.sos, chunk, zi=self._zi)
+        self._buffer = np.concatenate([self._buffer, chunk])
+
+        span = self.block + 2 * self.margin
+        output = []
+        while self._buffer.size >= span:
+            envelope = np.abs(scipy_signal.hilbert(self._buffer[:span]))
+            output.append(envelope[self.margin:self.margin + self.block])
+            self._buffer = self._buffer[self.block:]
+        return np.concatenate(output) if output else np.empty(0)
+
+    def flush(self) -> np.ndarray:
+        """Emit the envelope of the remaining samples (end of stream)."""
+        remaining = self._buffer.size - self.margin
+        if remaining <= 0:
+            return np.empty(0)
+        padded = np.concatenate([self._buffer, np.zeros(self.margin)])
+        envelope = np.abs(scipy_signal.hilbert(padded))[self.margin:self.margin + remaining]
+        self._buffer = np.zeros(self.margin)
+        return envelope
+
+
+class SlidingSTFT:
+    """
+    STFT of a stream. Frames are emitted as soon as `nperseg` samples are
+    available; only the samples of the next, incomplete frame are kept.
+    Magnitudes equal scipy.signal.stft(..., boundary=None, padded=False).
+    Running magnitude moments give the NP4 / total energy of all frames.
+    """
+
+    def __init__(
+        self,
+        fs: int = DEFAULT_SAMPLING_RATE,
+        nperseg: int = 256,
+        noverlap: Optional[int] = None,
+        window: str = 'hann'
+    ):
+        if noverlap is None:
+            noverlap = int(nperseg * 0.95)
+        if not 0 <= noverlap < nperseg:
+            raise ValueError("noverlap must be in [0, nperseg)")
+        self.fs = fs
+        self.nperseg = nperseg
+        self.hop = nperseg - noverlap
+        self.window = scipy_signal.get_window(window, nperseg)
+        self.scale = 1.0 / self.window.sum()
+        self.frequencies = np.fft.rfftfreq(nperseg, 1.0 / fs)
+        self.frames = 0
+        self.magnitude_moments = StreamingMoments()
+        self._buffer = np.empty(0)
+
+    def update(self, chunk: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Add samples.
+
+        Returns:
+            (times, magnitude) of the new frames; magnitude has shape
+            (len(frequencies), new_frames)
+        """
+        self._buffer = np.concatenate([self._buffer, np.asarray(chunk, dtype=float).ravel()])
+        if self._buffer.size < self.nperseg:
+            return np.empty(0), np.empty((self.frequencies.size, 0))
+
+        count = (self._buffer.size - self.nperseg) // self.hop + 1
+        segments = np.lib.stride_tricks.sliding_window_view(self._buffer, self.nperseg)[::self.hop][:count]
+        magnitude = (np.abs(np.fft.rfft(segments * self.window, axis=1)) * self.scale).T
+        times = ((self.frames + np.arange(count)) * self.hop + self.nperseg / 2) / self.fs
+
+        self._buffer = self._buffer[count * self.hop:]
+        self.frames += count
+        self.magnitude_moments.update(magnitude)
+        return times, magnitude
+
+    @property
+    def np4(self) -> float:
+        """NP4 of all frames so far (FM4 of the magnitudes), as TimeFrequency._calculate_np4."""
+        value = self.magnitude_moments.fm4
+        return value if np.isfinite(value) else 0.0
+
+    @property
+    def total_energy(self) -> float:
+        m = self.magnitude_moments
+        return float(m.M[2] + m.n * m.mean ** 2)
+
+
+class OnlineFeatureExtractor:
+    """
+    Streaming counterpart of the stored feature set for one channel.
+
+    Args:
+        fs: Sampling frequency
+        segment_length: NA4 / NB4 segment length in samples (256 gives the
+            batch definition with 10 segments for a PHM acquisition)
+        band: Optional (low, high) band-pass of the envelope; None uses the
+            full-band envelope of the batch Hilbert features
+        stft: Also maintain a SlidingSTFT
+        nperseg: STFT segment length
+        block: Envelope block length
+        margin: Envelope context margin
+    """
+
+    def __init__(
+        self,
+        fs: int = DEFAULT_SAMPLING_RATE,
+        segment_length: int = 256,
+        band: Optional[Tuple[float, float]] = None,
+        stft: bool = False,
+        nperseg: int = 256,
+        block: int = 2048,
+        margin: int = 256
+    ):
+        self.fs = fs
+        self.signal = SegmentedVariance(segment_length)
+        self.envelope = SlidingEnvelope(fs, band, block, margin)
+        self.envelope_stats = SegmentedVariance(segment_length)
+        self.stft = SlidingSTFT(fs, nperseg) if stft else None
+
+    def update(self, chunk: np.ndarray) -> Dict:
+        """
+        Add a chunk of samples.
+
+        Returns:
+            {"envelope": new envelope samples, "stft": (times, magnitude) or None}
+        """
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        self.signal.update(chunk)
+        envelope = self.envelope.update(chunk)
+        if envelope.size:
+            self.envelope_stats.update(envelope)
+        frames = self.stft.update(chunk) if self.stft is not None else None
+        return {"envelope": envelope, "stft": frames}
+
+    def flush(self) -> Dict:
+        """End of stream: emit and account the pending envelope samples."""
+        envelope = self.envelope.flush()
+        if envelope.size:
+            self.envelope_stats.update(envelope)
+        return {"envelope": envelope, "stft": None}
+
+    def features(self) -> Dict[str, float]:
+        """Current feature values (names as in the feature store)."""
+        m = self.signal.total
+        e = self.envelope_stats.total
+        features = {
+            'samples': m.n,
+            'rms': m.rms,
+            'peak': m.peak,
+            'avg': m.mean if m.n else float('nan'),
+            'crest_factor': m.crest_factor,
+            'kurtosis': m.kurtosis,
+            'fm4': m.fm4,
+            'm6a': m.m6a,
+            'm8a': m.m8a,
+            'na4': self.signal.na4,
+            'nb4': self.envelope_stats.nb4,
+            'envelope_mean': e.mean if e.n else float('nan'),
+            'envelope_std': float(np.sqrt(e.variance)) if e.n else float('nan'),
+            'envelope_max': e.max if e.n else float('nan'),
+            'envelope_min': e.min if e.n else float('nan'),
+            'envelope_rms': e.rms,
+            'envelope_peak_to_peak': e.peak,
+        }
+        if self.stft is not None:
+            features['stft_np4'] = self.stft.np4
+            features['stft_total_energy'] = self.stft.total_energy
+        return features
@@ -0,0 +1,558 @@
+"""
+PHM Analysis Pipeline Module
+Computes several feature families of one signal in a single pass. Work is
+split into stages (detrend, moments, spectrum, analytic signal, band
+envelope, time-frequency maps) with declared dependencies; a stage runs at
+most once per signal and only the stages needed by the requested outputs
+are executed. Scalar features (rms, fm4, er, nb4, ...) are registered in
+FEATURES with their own dependencies, so a feature set resolves to the
+minimal stages it needs. Outputs reproduce the per-family /api/algorithms
+endpoints.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import signal as scipy_signal
+
+try:
+    from backend.config import DEFAULT_SAMPLING_RATE
+    from backend.filterprocess import FilterProcess
+    from backend.hilberttransform import HilbertTransform
+    from backend.phm_metrics import stage
+    from backend.timefrequency import TimeFrequency
+except ModuleNotFoundError:
+    from config import DEFAULT_SAMPLING_RATE
+    from filterprocess import FilterProcess
+    from hilberttransform import HilbertTransform
+    from phm_metrics import stage
+    from timefrequency import TimeFrequency
+
+
+# 與各別端點相同的預設參數
+DEFAULT_PARAMS = {
+    'segment_count': 10,
+    'lowcut': 4000.0,
+    'highcut': 10000.0,
+    'er_low_freq': 1000.0,
+    'er_high_freq': 5000.0,
+    'window': 'hann',
+    'nperseg': 256,
+    'wavelet': 'morl',
+}
+
+
+# ==================== Stages ====================
+
+def _stage_detrend(x, fs, params, deps):
+    """Mean-removed signal."""
+    mean = float(np.mean(x))
+    return {'mean': mean, 'centered': x - mean}
+
+
+def _stage_moments(x, fs, params, deps):
+    """Extremes and sums of centered powers (2, 4, 6, 8)."""
+    centered = deps['detrend']['centered']
+    d2 = centered * centered
+    d4 = d2 * d2
+    return {
+        'n': len(x),
+        'mean': deps['detrend']['mean'],
+        'min': float(np.min(x)),
+        'max': float(np.max(x)),
+        's2': float(np.sum(d2)),
+        's4': float(np.sum(d4)),
+        's6': float(np.sum(d4 * d2)),
+        's8': float(np.sum(d4 * d4)),
+    }
+
+
+def _stage_segments(x, fs, params, deps):
+    """Sum of squared deviations of each NA4 segment (last segment takes the remainder)."""
+    return FilterProcess.segment_sum_of_squares(deps['detrend']['centered'], params['segment_count'])[0]
+
+
+def _stage_spectrum(x, fs, params, deps):
+    """One-sided FFT of the raw signal."""
+    n = len(x)
+    return {'n': n, 'fft': np.fft.rfft(x), 'frequency': np.arange(n // 2 + 1) * fs / n}
+
+
+def _stage_analytic(x, fs, params, deps):
+    """Analytic signal built from the shared one-sided FFT (same as scipy.signal.hilbert)."""
+    n = deps['spectrum']['n']
+    half = deps['spectrum']['fft']
+    full = np.zeros(n, dtype=complex)
+    full[0] = half[0]
+    if n % 2 == 0:
+        full[1:n // 2] = 2 * half[1:n // 2]
+        full[n // 2] = half[n // 2]
+    else:
+        full[1:(n + 1) // 2] = 2 * half[1:(n + 1) // 2]
+    return np.fft.ifft(full)
+
+
+def _stage_envelope(x, fs, params, deps):
+    """Amplitude envelope of the analytic signal."""
+    return np.abs(deps['analytic'])
+
+
+def _stage_band_envelope(x, fs, params, deps):
+    """Envelope of the band-passed signal (4th-order Butterworth, zero phase)."""
+    nyquist = fs / 2
+    b, a = scipy_signal.butter(4, [params['lowcut'] / nyquist, params['highcut'] / nyquist], btype='band')
+    return np.abs(scipy_signal.hilbert(scipy_signal.filtfilt(b, a, x)))
+
+
+def _stage_envelope_spectrum(x, fs, params, deps):
+    """Single-sided amplitude spectrum of the band envelope."""
+    envelope = deps['band_envelope']
+    n = len(envelope)
+    return {
+        'frequency': np.arange(n // 2) * fs / n,
+        'magnitude': 2.0 / n * np.abs(np.fft.rfft(envelope)[:n // 2]),
+    }
+
+
+def _stage_stft(x, fs, params, deps):
+    return TimeFrequency.stft_analysis(x, fs=fs, window=params['window'], nperseg=params['nperseg'])
+
+
+def _stage_cwt(x, fs, params, deps):
+    return TimeFrequency.cwt_analysis(x, fs=fs, wavelet=params['wavelet'], scales=np.arange(1, 65))
+
+
+def _stage_spectrogram(x, fs, params, deps):
+    return TimeFrequency.spectrogram_features(x, fs=fs)
+
+
+# 階段名稱 -> (相依階段, 計算函式)
+PIPELINE_STAGES: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'detrend': ((), _stage_detrend),
+    'moments': (('detrend',), _stage_moments),
+    'segments': (('detrend',), _stage_segments),
+    'spectrum': ((), _stage_spectrum),
+    'analytic': (('spectrum',), _stage_analytic),
+    'envelope': (('analytic',), _stage_envelope),
+    'band_envelope': ((), _stage_band_envelope),
+    'envelope_spectrum': (('band_envelope',), _stage_envelope_spectrum),
+    'stft': ((), _stage_stft),
+    'cwt': ((), _stage_cwt),
+    'spectrogram': ((), _stage_spectrogram),
+}
+
+
+# ==================== Features ====================
+
+class FeatureRegistry:
+    """
+    Named scalar features with declared dependencies.
+
+    A dependency is either a pipeline stage or another registered feature;
+    the feature function receives their values as `deps`.
+    """
+
+    def __init__(self):
+        self._features: Dict[str, Tuple[Tuple[str, ...], Callable]] = {}
+
+    def register(self, name: str, requires: Tuple[str, ...] = ()):
+        """Decorator registering `func(params, deps) -> float` as feature `name`."""
+        def decorator(func):
+            for dependency in requires:
+                if dependency not in PIPELINE_STAGES and dependency not in self._features:
+                    raise ValueError(f"Feature {name} depends on unknown {dependency}")
+            self._features[name] = (tuple(requires), func)
+            return func
+        return decorator
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._features
+
+    def names(self) -> List[str]:
+        return list(self._features)
+
+    def requires(self, name: str) -> Tuple[str, ...]:
+        return self._features[name][0]
+
+    def function(self, name: str) -> Callable:
+        return self._features[name][1]
+
+    def resolve(self, names: Iterable[str]) -> List[str]:
+        """
+        Stages needed by a set of features, in dependency order.
+
+        Raises:
+            ValueError: If a feature name is unknown
+        """
+        ordered: List[str] = []
+        seen: set = set()
+        for name in names:
+            if name not in self._features:
+                raise ValueError(f"Unknown feature: {name}")
+            _visit(name, ordered, seen)
+        return ordered
+
+
+FEATURES = FeatureRegistry()
+
+
+def _kurtosis(n, s2, s4):
+    """Bias-corrected Pearson kurtosis (scipy.stats.kurtosis(fisher=False, bias=False))."""
+    if n < 4 or s2 == 0:
+        return float('nan')
+    m2, m4 = s2 / n, s4 / n
+    g2 = m4 / m2 ** 2 - 3.0
+    return ((n + 1) * g2 + 6.0) * (n - 1) / ((n - 2) * (n - 3)) + 3.0
+
+
+def _moment_ratio(m, order):
+    """N^(k-1)·Σ(x-μ)^(2k) / [Σ(x-μ)²]^k for FM4 (k=2), M6A (k=3), M8A (k=4)."""
+    denominator = m['s2'] ** order
+    return float(m['n'] ** (order - 1) * m[f's{2 * order}'] / denominator) if denominator != 0 else float('nan')
+
+
+@FEATURES.register('peak', requires=('moments',))
+def _feature_peak(params, deps):
+    return float(deps['moments']['max'] - deps['moments']['min'])
+
+
+@FEATURES.register('avg', requires=('moments',))
+def _feature_avg(params, deps):
+    return float(deps['moments']['mean'])
+
+
+@FEATURES.register('rms', requires=('moments',))
+def _feature_rms(params, deps):
+    m = deps['moments']
+    return float(np.sqrt(m['s2'] / m['n'] + m['mean'] ** 2))
+
+
+@FEATURES.register('crest_factor', requires=('peak', 'rms'))
+def _feature_crest_factor(params, deps):
+    return float(deps['peak'] / deps['rms']) if deps['rms'] != 0 else float('nan')
+
+
+@FEATURES.register('kurtosis', requires=('moments',))
+def _feature_kurtosis(params, deps):
+    m = deps['moments']
+    return float(_kurtosis(m['n'], m['s2'], m['s4']))
+
+
+@FEATURES.register('na4', requires=('moments', 'segments'))
+def _feature_na4(params, deps):
+    m = deps['moments']
+    division = (float(np.sum(deps['segments'])) / params['segment_count']) ** 2
+    return float(m['s4'] * m['n'] / division) if division != 0 else float('nan')
+
+
+@FEATURES.register('fm4', requires=('moments',))
+def _feature_fm4(params, deps):
+    return _moment_ratio(deps['moments'], 2)
+
+
+@FEATURES.register('m6a', requires=('moments',))
+def _feature_m6a(params, deps):
+    return _moment_ratio(deps['moments'], 3)
+
+
+@FEATURES.register('m8a', requires=('moments',))
+def _feature_m8a(params, deps):
+    return _moment_ratio(deps['moments'], 4)
+
+
+@FEATURES.register('er', requires=('spectrum',))
+def _feature_er(params, deps):
+    # 正頻率（不含 DC 與 Nyquist）中指定頻帶的能量比
+    n = deps['spectrum']['n']
+    positive = slice(1, (n - 1) // 2 + 1)
+    power = np.abs(deps['spectrum']['fft'][positive]) ** 2
+    frequency = deps['spectrum']['frequency'][positive]
+    band = (frequency >= params['er_low_freq']) & (frequency <= params['er_high_freq'])
+    total_energy = float(np.sum(power))
+    return float(np.sqrt(np.sum(power[band]) / total_energy)) if band.any() and total_energy > 0 else 0.0
+
+
+@FEATURES.register('nb4', requires=('envelope',))
+def _feature_nb4(params, deps):
+    return HilbertTransform().calculate_nb4(deps['envelope'], params['segment_count'])
+
+
+@FEATURES.register('envelope_mean', requires=('envelope',))
+def _feature_envelope_mean(params, deps):
+    return float(np.mean(deps['envelope']))
+
+
+@FEATURES.register('envelope_std', requires=('envelope',))
+def _feature_envelope_std(params, deps):
+    return float(np.std(deps['envelope']))
+
+
+@FEATURES.register('envelope_max', requires=('envelope',))
+def _feature_envelope_max(params, deps):
+    return float(np.max(deps['envelope']))
+
+
+@FEATURES.register('envelope_min', requires=('envelope',))
+def _feature_envelope_min(params, deps):
+    return float(np.min(deps['envelope']))
+
+
+@FEATURES.register('envelope_rms', requires=('envelope',))
+def _feature_envelope_rms(params, deps):
+    return float(np.sqrt(np.mean(deps['envelope'] ** 2)))
+
+
+@FEATURES.register('envelope_peak_to_peak', requires=('envelope_max', 'envelope_min'))
+def _feature_envelope_peak_to_peak(params, deps):
+    return float(deps['envelope_max'] - deps['envelope_min'])
+
+
+def _visit(name: str, ordered: List[str], seen: set):
+    """Depth-first walk adding the stages under a stage / feature name to `ordered`."""
+    if name in seen:
+        return
+    seen.add(name)
+    if name in PIPELINE_STAGES:
+        dependencies = PIPELINE_STAGES[name][0]
+    else:
+        dependencies = FEATURES.requires(name)
+    for dependency in dependencies:
+        _visit(dependency, ordered, seen)
+    if name in PIPELINE_STAGES and name not in ordered:
+        ordered.append(name)
+
+
+# ==================== Outputs ====================
+# 每個輸出回傳 (features, series, axes)：特徵值、各通道資料序列、共用座標軸
+
+def _top_peaks(frequency, magnitude, count=10, positive_only=False):
+    idx = np.argsort(magnitude)[-count:][::-1]
+    if positive_only:
+        idx = [i for i in idx if frequency[i] > 0]
+    return [float(frequency[i]) for i in idx], [float(magnitude[i]) for i in idx]
+
+
+TIME_DOMAIN_FEATURES = ('peak', 'avg', 'rms', 'crest_factor', 'kurtosis')
+FILTER_FEATURES = ('na4', 'fm4', 'm6a', 'm8a', 'er', 'kurtosis', 'peak', 'rms')
+HILBERT_FEATURES = (
+    'nb4', 'envelope_mean', 'envelope_std', 'envelope_max', 'envelope_min',
+    'envelope_rms', 'envelope_peak_to_peak'
+)
+
+
+def _output_time_domain(pipeline):
+    x = pipeline.signal
+    limit = min(1000, len(x))
+    return pipeline.features(TIME_DOMAIN_FEATURES), {'signal': x[:limit]}, {'time': np.arange(limit)}
+
+
+def _output_frequency(pipeline):
+    spectrum = pipeline.get('spectrum')
+    n = spectrum['n']
+    frequency = spectrum['frequency'][:n // 2]
+    magnitude = 2.0 / n * np.abs(spectrum['fft'][:n // 2])
+    peak_freqs, peak_mags = _top_peaks(frequency, magnitude)
+    features = {
+        'peak_frequencies': peak_freqs,
+        'peak_magnitudes': peak_mags,
+        'total_power': float(np.sum(magnitude ** 2)),
+    }
+    return features, {'magnitude': magnitude[:1000]}, {'frequency': frequency[:1000]}
+
+
+def _output_envelope(pipeline):
+    envelope = pipeline.get('band_envelope')
+    frequency = pipeline.get('envelope_spectrum')['frequency']
+    magnitude = pipeline.get('envelope_spectrum')['magnitude']
+    peak_freqs, peak_mags = _top_peaks(frequency, magnitude, positive_only=True)
+    features = {
+        'peak_frequencies': peak_freqs,
+        'peak_magnitudes': peak_mags,
+        'envelope_rms': float(np.sqrt(np.mean(envelope ** 2))),
+    }
+    return features, {'magnitude': magnitude[:500]}, {'frequency': frequency[:500]}
+
+
+def _output_hilbert(pipeline):
+    envelope = pipeline.get('envelope')
+    instantaneous_frequency = np.diff(np.unwrap(np.angle(pipeline.get('analytic')))) / (2.0 * np.pi)
+    limit = min(1000, len(envelope))
+    series = {'envelope': envelope[:limit], 'instantaneous_frequency': instantaneous_frequency[:1000]}
+    return pipeline.features(HILBERT_FEATURES), series, {'time': np.arange(limit)}
+
+
+def _output_filter(pipeline):
+    return pipeline.features(FILTER_FEATURES), {}, {}
+
+
+def _output_stft(pipeline):
+    result = pipeline.get('stft')
+    freq_limit = min(100, len(result['frequencies']))
+    time_limit = min(100, len(result['time']))
+    features = {key: result[key] for key in ('np4', 'max_freq', 'max_time', 'max_magnitude', 'total_energy')}
+    series = {'magnitude': result['magnitude'][:freq_limit, :time_limit]}
+    axes = {'frequencies': result['frequencies'][:freq_limit], 'time': result['time'][:time_limit]}
+    return features, series, axes
+
+
+def _output_cwt(pipeline):
+    result = pipeline.get('cwt')
+    time_limit = min(500, result['magnitude'].shape[1])
+    features = {key: result[key] for key in ('np4', 'max_scale', 'max_freq', 'total_energy')}
+    features['energy_per_scale'] = result['energy_per_scale'].tolist()
+    series = {'magnitude': result['magnitude'][:, :time_limit]}
+    axes = {'scales': result['scales'], 'frequencies': result['frequencies']}
+    return features, series, axes
+
+
+def _output_spectrogram(pipeline):
+    result = pipeline.get('spectrogram')
+    freq_limit = min(100, len(result['frequencies']))
+    time_limit = min(100, len(result['time']))
+    features = {key: result[key] for key in ('mean_power', 'max_power', 'std_power', 'peak_freq', 'peak_time')}
+    series = {'power_db': result['power_db'][:freq_limit, :time_limit]}
+    axes = {'frequencies': result['frequencies'][:freq_limit], 'time': result['time'][:time_limit]}
+    return features, series, axes
+
+
+# 輸出名稱 -> (需要的階段或特徵, 組裝函式)
+PIPELINE_OUTPUTS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'time-domain': (TIME_DOMAIN_FEATURES, _output_time_domain),
+    'frequency': (('spectrum',), _output_frequency),
+    'envelope': (('band_envelope', 'envelope_spectrum'), _output_envelope),
+    'hilbert': (('analytic',) + HILBERT_FEATURES, _output_hilbert),
+    'filter': (FILTER_FEATURES, _output_filter),
+    'stft': (('stft',), _output_stft),
+    'cwt': (('cwt',), _output_cwt),
+    'spectrogram': (('spectrogram',), _output_spectrogram),
+}
+
+
+def resolve_stages(outputs: Iterable[str]) -> List[str]:
+    """
+    Stages needed by a set of outputs, in dependency order.
+
+    Raises:
+        ValueError: If an output name is unknown
+    """
+    ordered: List[str] = []
+    seen: set = set()
+    for output in outputs:
+        if output not in PIPELINE_OUTPUTS:
+            raise ValueError(f"Unknown output: {output}. Available: {', '.join(PIPELINE_OUTPUTS)}")
+        for name in PIPELINE_OUTPUTS[output][0]:
+            _visit(name, ordered, seen)
+    return ordered
+
+
+class SignalPipeline:
+    """Memoized stage results and feature values of one channel."""
+
+    def __init__(self, signal: np.ndarray, fs: int = DEFAULT_SAMPLING_RATE, params: Optional[Dict] = None):
+        self.signal = np.asarray(signal, dtype=float)
+        self.fs = fs
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.results: Dict[str, object] = {}
+        self.values: Dict[str, float] = {}
+
+    def get(self, name: str):
+        """Result of a stage, computing it and its dependencies on first use."""
+        if name not in self.results:
+            dependencies, func = PIPELINE_STAGES[name]
+            deps = {dependency: self.get(dependency) for dependency in dependencies}
+            with stage(name):
+                self.results[name] = func(self.signal, self.fs, self.params, deps)
+        return self.results[name]
+
+    def feature(self, name: str) -> float:
+        """Value of a registered feature, computing only what it depends on."""
+        if name not in self.values:
+            deps = {
+                dependency: self.get(dependency) if dependency in PIPELINE_STAGES else self.feature(dependency)
+                for dependency in FEATURES.requires(name)
+            }
+            self.values[name] = FEATURES.function(name)(self.params, deps)
+        return self.values[name]
+
+    def features(self, names: Iterable[str]) -> Dict[str, float]:
+        """Values of several registered features."""
+        return {name: self.feature(name) for name in names}
+
+    def output(self, name: str):
+        """(features, series, axes) of one output."""
+        return PIPELINE_OUTPUTS[name][1](self)
+
+
+def compute_features(
+    signal: np.ndarray,
+    names: Optional[Iterable[str]] = None,
+    fs: int = DEFAULT_SAMPLING_RATE,
+    params: Optional[Dict] = None
+) -> Dict[str, float]:
+    """
+    Compute registered features of one signal.
+
+    Args:
+        signal: Input signal array
+        names: Feature names (default: every registered feature)
+        fs: Sampling frequency
+        params: Overrides of DEFAULT_PARAMS
+
+    Returns:
+        Dictionary of feature name -> value
+
+    Raises:
+        ValueError: If a feature name is unknown
+    """
+    names = FEATURES.names() if names is None else list(names)
+    FEATURES.resolve(names)
+    return SignalPipeline(signal, fs, params).features(names)
+
+
+def run_pipeline(
+    channels: Dict[str, np.ndarray],
+    outputs: Iterable[str],
+    fs: int = DEFAULT_SAMPLING_RATE,
+    params: Optional[Dict] = None,
+    include_data: bool = True
+) -> Dict:
+    """
+    Run the requested outputs on every channel, sharing intermediates.
+
+    Args:
+        channels: Channel name -> signal (e.g. horizontal / vertical)
+        outputs: Output names (keys of PIPELINE_OUTPUTS)
+        fs: Sampling frequency
+        params: Overrides of DEFAULT_PARAMS
+        include_data: Also return plotting series
+
+    Returns:
+        {"outputs", "stages", "params", <channel>: {output: features}, "data": {output: {...}}}
+    """
+    outputs = list(dict.fromkeys(outputs))
+    stages = resolve_stages(outputs)
+    pipelines = {channel: SignalPipeline(x, fs, params) for channel, x in channels.items()}
+
+    result = {
+        'outputs': outputs,
+        'stages': stages,
+        'params': {**DEFAULT_PARAMS, **(params or {})},
+    }
+    data: Dict[str, Dict] = {}
+    for channel in channels:
+        result[channel] = {}
+    for output in outputs:
+        section = {}
+        for channel, pipeline in pipelines.items():
+            features, series, axes = pipeline.output(output)
+            result[channel][output] = features
+            for key, value in axes.items():
+                section.setdefault(key, value)
+            for key, value in series.items():
+                section[f"{channel}_{key}"] = value
+        if section:
+            data[output] = section
+
+    if include_data:
+        result['data'] = data
+    return result
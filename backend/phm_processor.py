@@ -8,6 +8,11 @@ import pandas as pd
 from typing import Dict, List, Tuple
 from pathlib import Path
 
+try:
+    from backend.phm_csv import read_phm_signals
+except ModuleNotFoundError:
+    from phm_csv import read_phm_signals
+
 
 class PHMDataProcessor:
     """PHM 數據處理器"""
@@ -53,13 +58,9 @@ class PHMDataProcessor:
         Returns:
             (horiz_vibration, vert_vibration)
         """
-        df = pd.read_csv(file_path, header=None)
-
         # 格式: hour, minute, second, microsecond, horiz_vibration, vert_vibration
-        horiz_vib = df.iloc[:, 4].values
-        vert_vib = df.iloc[:, 5].values
-
-        return horiz_vib, vert_vib
+        signals = read_phm_signals(file_path)
+        return signals[:, 0], signals[:, 1]
 
     def extract_features(self, signal: np.ndarray) -> Dict:
         """
@@ -0,0 +1,252 @@
+"""
+PHM Profiling Module
+Opt-in profiling of single API requests. With PHM_PROFILING_ENABLED set, a
+request carrying `?profile=1` runs under a stack sampler (collapsed stacks
+and speedscope JSON), `?profile=cprofile` under cProfile (pstats file and
+text summary). The profile is stored in PHM_PROFILE_DIR and referenced by
+the X-Profile-Id / X-Profile-Url response headers.
+
+Only one request is profiled at a time: the sampler and cProfile observe
+the whole event-loop thread, so overlapping profiles would record each
+other's frames. A profiled request arriving while another one runs gets
+409 Conflict.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+try:
+    from backend.config import PHM_PROFILE_DIR, PHM_PROFILE_INTERVAL
+except ModuleNotFoundError:
+    from config import PHM_PROFILE_DIR, PHM_PROFILE_INTERVAL
+
+PROFILE_URL_PREFIX = '/api/profiles'
+PROFILE_FILE_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+FrameKey = Tuple[str, str, int]
+
+
+class StackSampler:
+    """Periodically samples the call stack of one thread."""
+
+    def __init__(self, thread_id: int, interval: float = PHM_PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.started = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack: List[FrameKey] = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, frame.f_lineno))
+            frame = frame.f_back
+        if stack:
+            # 由最外層到最內層
+            self.samples[tuple(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            time.sleep(self.interval)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='phm-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    @staticmethod
+    def _frame_label(frame: FrameKey) -> str:
+        name, filename, _ = frame
+        return f"{name} ({Path(filename).name})"
+
+    def collapsed(self) -> str:
+        """Collapsed stacks ("a;b;c count" per line) for flamegraph tools."""
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(";".join(self._frame_label(frame) for frame in stack) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> Dict:
+        """Speedscope 'sampled' profile document."""
+        frames: List[Dict] = []
+        index: Dict[Tuple[str, str], int] = {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            sample = []
+            for func_name, filename, line in stack:
+                key = (func_name, filename)
+                if key not in index:
+                    index[key] = len(frames)
+                    frames.append({'name': func_name, 'file': filename, 'line': line})
+                sample.append(index[key])
+            samples.append(sample)
+            weights.append(count * self.interval)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'phm_profiling',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.duration,
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+def requested_profile_mode(query_string: bytes) -> Optional[str]:
+    """'sample', 'cprofile' or None from the request query string."""
+    values = parse_qs(query_string.decode('latin-1')).get('profile')
+    if not values:
+        return None
+    value = values[-1].lower()
+    if value in ('1', 'true', 'sample'):
+        return 'sample'
+    if value == 'cprofile':
+        return 'cprofile'
+    return None
+
+
+def profile_path(file_name: str, profile_dir: str = PHM_PROFILE_DIR) -> Optional[Path]:
+    """Resolve a stored profile file name, or None if invalid / missing."""
+    if not PROFILE_FILE_PATTERN.match(file_name):
+        return None
+    path = Path(profile_dir) / file_name
+    return path if path.is_file() else None
+
+
+def list_profiles(profile_dir: str = PHM_PROFILE_DIR, limit: int = 50) -> List[Dict]:
+    """Most recent stored profile files."""
+    directory = Path(profile_dir)
+    if not directory.is_dir():
+        return []
+    files = sorted(directory.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+    return [
+        {
+            'file_name': p.name,
+            'size': p.stat().st_size,
+            'url': f"{PROFILE_URL_PREFIX}/{p.name}",
+        }
+        for p in files if p.is_file()
+    ]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware running `?profile=...` requests under a profiler."""
+
+    def __init__(self, app, profile_dir: str = PHM_PROFILE_DIR, interval: float = PHM_PROFILE_INTERVAL):
+        self.app = app
+        self.profile_dir = Path(profile_dir)
+        self.interval = interval
+        self.active = False  # 只在事件迴圈執行緒中讀寫，無需鎖
+
+    def _profile_id(self, scope) -> str:
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', scope['path']).strip('_')[:60]
+        return f"{time.strftime('%Y%m%d-%H%M%S')}_{slug}_{uuid.uuid4().hex[:6]}"
+
+    def _save_sample(self, profile_id: str, sampler: StackSampler, name: str) -> str:
+        (self.profile_dir / f"{profile_id}.folded").write_text(sampler.collapsed(), encoding='utf-8')
+        speedscope_name = f"{profile_id}.speedscope.json"
+        with open(self.profile_dir / speedscope_name, 'w', encoding='utf-8') as f:
+            json.dump(sampler.speedscope(name), f)
+        return speedscope_name
+
+    def _save_cprofile(self, profile_id: str, profiler: cProfile.Profile) -> str:
+        profiler.dump_stats(str(self.profile_dir / f"{profile_id}.prof"))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(60)
+        text_name = f"{profile_id}.txt"
+        (self.profile_dir / text_name).write_text(summary.getvalue(), encoding='utf-8')
+        return text_name
+
+    @staticmethod
+    async def _reject_overlap(send):
+        body = json.dumps({"detail": "Another profiled request is running; retry when it has finished"}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 409,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        mode = requested_profile_mode(scope.get('query_string', b'')) if scope['type'] == 'http' else None
+        if mode is None or scope['path'].startswith(PROFILE_URL_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        # 剖析器觀察整個事件迴圈執行緒，同時剖析兩個請求會互相記錄對方的堆疊
+        if self.active:
+            await self._reject_overlap(send)
+            return
+        self.active = True
+        try:
+            await self._profile(mode, scope, receive, send)
+        finally:
+            self.active = False
+
+    async def _profile(self, mode: str, scope, receive, send):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profile_id = self._profile_id(scope)
+        name = f"{scope.get('method', 'GET')} {scope['path']}"
+        state = {'done': False}
+
+        if mode == 'sample':
+            # 取樣事件迴圈所在的執行緒
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            profiler = None
+        else:
+            sampler = None
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        def finish() -> str:
+            state['done'] = True
+            if sampler is not None:
+                sampler.stop()
+                return self._save_sample(profile_id, sampler, name)
+            profiler.disable()
+            return self._save_cprofile(profile_id, profiler)
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start' and not state['done']:
+                file_name = finish()
+                message = dict(message)
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'x-profile-id', profile_id.encode('latin-1')),
+                    (b'x-profile-url', f"{PROFILE_URL_PREFIX}/{file_name}".encode('latin-1')),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not state['done']:
+                finish()
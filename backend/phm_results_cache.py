@@ -0,0 +1,122 @@
+"""
+PHM Results Cache Module
+Serves the artifacts of scripts/analyze_training_data.py
+(phm_analysis_results/summary.json and vibration_statistics.csv) from
+memory. The files are parsed once and the response body is serialized
+once. Each request only compares the files' mtime / size with the loaded
+version and reloads when either changed, so a rerun of the analysis script
+is picked up without restarting the API.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from backend.phm_metrics import metrics
+except ModuleNotFoundError:
+    from phm_metrics import metrics
+
+SUMMARY_FILE = "summary.json"
+STATISTICS_FILE = "vibration_statistics.csv"
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def default_results_dir() -> str:
+    """
+    phm_analysis_results next to the backend directory.
+
+    In the container main.py lives in /app (not /app/backend) and the
+    results are mounted at /app/phm_analysis_results.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    if os.path.basename(current_dir) == 'backend':
+        project_root = os.path.dirname(current_dir)
+    else:
+        project_root = current_dir
+    return os.path.join(project_root, "phm_analysis_results")
+
+
+def _signature(path: str) -> FileSignature:
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_statistics(path: str) -> List[Dict]:
+    """vibration_statistics.csv rows with NaN replaced by None (JSON-safe)."""
+    records = pd.read_csv(path).to_dict('records')
+    return [
+        {key: (None if isinstance(value, float) and not math.isfinite(value) else value)
+         for key, value in record.items()}
+        for record in records
+    ]
+
+
+class PHMResultsCache:
+    """In-memory, pre-serialized analysis results invalidated by file mtime."""
+
+    def __init__(self, results_dir: Optional[str] = None):
+        self.results_dir = results_dir or default_results_dir()
+        self.summary_path = os.path.join(self.results_dir, SUMMARY_FILE)
+        self.statistics_path = os.path.join(self.results_dir, STATISTICS_FILE)
+        self._lock = threading.Lock()
+        # (signatures, body, etag)，以單一 tuple 替換，讀取端不需上鎖
+        self._entry: Optional[Tuple[Tuple[FileSignature, FileSignature], bytes, str]] = None
+        self.loads = 0
+
+    def _current_signatures(self) -> Tuple[FileSignature, FileSignature]:
+        return _signature(self.summary_path), _signature(self.statistics_path)
+
+    def _load(self) -> bytes:
+        with open(self.summary_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+
+        statistics = []
+        if os.path.exists(self.statistics_path):
+            statistics = _read_statistics(self.statistics_path)
+
+        payload = {"summary": summary, "statistics": statistics}
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def get(self) -> Optional[Tuple[bytes, str]]:
+        """
+        Get the serialized response body.
+
+        Returns:
+            (JSON body, ETag), or None if summary.json does not exist
+        """
+        signatures = self._current_signatures()
+        if signatures[0] is None:
+            return None
+        entry = self._entry
+        hit = entry is not None and entry[0] == signatures
+        metrics.record_cache('analysis_results', hit)
+        if hit:
+            return entry[1], entry[2]
+
+        with self._lock:
+            # 其他執行緒可能已重新載入
+            entry = self._entry
+            if entry is None or entry[0] != signatures:
+                body = self._load()
+                etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                # 檔案在讀取期間被改寫時不記錄簽章，下次請求會重新載入
+                loaded = signatures if signatures == self._current_signatures() else None
+                entry = (loaded, body, etag)
+                self._entry = entry
+                self.loads += 1
+            return entry[1], entry[2]
+
+    def invalidate(self):
+        """Force a reload on the next request."""
+        self._entry = None
@@ -0,0 +1,68 @@
+"""
+PHM Database Schema Module
+Creates the measurement tables shared by the CSV importer and the live
+ingest path.
+"""
+
+import sqlite3
+
+
+def create_measurement_schema(conn: sqlite3.Connection):
+    """Create the bearings / measurement_files / measurements tables."""
+    cursor = conn.cursor()
+
+    # Bearings table: stores metadata about each bearing
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bearings (
+            bearing_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bearing_name TEXT UNIQUE NOT NULL,
+            condition_id INTEGER,
+            description TEXT
+        )
+    """)
+
+    # Files table: stores information about each CSV file
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS measurement_files (
+            file_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            bearing_id INTEGER NOT NULL,
+            file_name TEXT NOT NULL,
+            file_number INTEGER,
+            record_count INTEGER,
+            FOREIGN KEY (bearing_id) REFERENCES bearings(bearing_id),
+            UNIQUE(bearing_id, file_name)
+        )
+    """)
+
+    # Measurements table: stores actual vibration data
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS measurements (
+            measurement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_id INTEGER NOT NULL,
+            hour INTEGER NOT NULL,
+            minute INTEGER NOT NULL,
+            second INTEGER NOT NULL,
+            microsecond INTEGER NOT NULL,
+            horizontal_acceleration REAL NOT NULL,
+            vertical_acceleration REAL NOT NULL,
+            FOREIGN KEY (file_id) REFERENCES measurement_files(file_id)
+        )
+    """)
+
+    # Create indexes for faster queries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_measurements_file_id
+        ON measurements(file_id)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_measurements_time
+        ON measurements(hour, minute, second, microsecond)
+    """)
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_files_bearing_id
+        ON measurement_files(bearing_id)
+    """)
+
+    conn.commit()
@@ -0,0 +1,173 @@
+"""
+PHM Streaming Module
+Server-Sent Events helpers that push per-file trend points while they are
+computed and forward live feature events from the event broker, so the
+frontend can render progressively instead of waiting for one large
+response.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+try:
+    from backend.phm_events import FeatureEventBroker
+    from backend.phm_feature_store import PHMFeatureStore
+except ModuleNotFoundError:
+    from phm_events import FeatureEventBroker
+    from phm_feature_store import PHMFeatureStore
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    # 停用 nginx 緩衝，讓事件立即送出
+    'X-Accel-Buffering': 'no',
+}
+
+_END = object()
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """Format one Server-Sent Event message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    payload = json.dumps(data, ensure_ascii=False, allow_nan=False)
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_comment(text: str = 'keep-alive') -> str:
+    """Format an SSE comment line (ignored by EventSource, keeps proxies open)."""
+    return f": {text}\n\n"
+
+
+async def iterate_in_thread(
+    factory: Callable[[], Iterator[Any]],
+    cancel: threading.Event,
+    max_buffer: int = 16
+) -> AsyncIterator[Any]:
+    """
+    Run a blocking iterator in a worker thread and yield its items.
+
+    The worker stops after its current item once `cancel` is set. Errors
+    raised by the iterator are re-raised in the consumer.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # 限制執行緒領先的數量，避免慢速客戶端時大量累積
+    slots = threading.Semaphore(max_buffer)
+
+    def worker():
+        try:
+            for item in factory():
+                if cancel.is_set():
+                    break
+                while not slots.acquire(timeout=0.5):
+                    if cancel.is_set():
+                        return
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _END)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            slots.release()
+            yield item
+    finally:
+        cancel.set()
+
+
+async def trend_event_stream(
+    request,
+    store: PHMFeatureStore,
+    bearing_name: str,
+    family: str,
+    feature_names: List[str],
+    files: List[tuple],
+    persist: bool = True
+) -> AsyncIterator[str]:
+    """
+    Stream a feature trend as SSE: one 'start', one 'point' per file, then 'done'.
+
+    Args:
+        request: Starlette request (used to detect client disconnects)
+        store: Feature store computing / reading the points
+        bearing_name: Bearing name
+        family: Feature family name reported to the client
+        feature_names: Features of each point
+        files: (file_number, file_id) pairs from store.list_trend_files()
+        persist: Write computed features back to the store
+    """
+    started = time.perf_counter()
+    cancel = threading.Event()
+
+    yield sse_event({
+        'bearing_name': bearing_name,
+        'family': family,
+        'features': feature_names,
+        'file_count': len(files),
+    }, event='start')
+
+    sent = 0
+    try:
+        async for point in iterate_in_thread(
+            lambda: store.iter_trend_points(files, feature_names, persist), cancel
+        ):
+            if await request.is_disconnected():
+                break
+            point['index'] = sent
+            yield sse_event(point, event='point', event_id=sent)
+            sent += 1
+    except Exception as e:
+        yield sse_event({'detail': str(e)}, event='error')
+        return
+    finally:
+        cancel.set()
+
+    yield sse_event({
+        'bearing_name': bearing_name,
+        'file_count': sent,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }, event='done')
+
+
+async def feature_event_stream(
+    request,
+    broker: FeatureEventBroker,
+    bearing_name: Optional[str] = None,
+    heartbeat: float = 15.0
+) -> AsyncIterator[str]:
+    """
+    Forward broker events (e.g. newly ingested feature points) as SSE.
+
+    A comment line is sent every `heartbeat` seconds without events so that
+    idle connections survive proxies and disconnects are noticed.
+    """
+    queue = broker.subscribe(bearing_name)
+    try:
+        yield sse_comment('subscribed')
+        while True:
+            try:
+                event: Dict[str, Any] = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield sse_comment()
+                continue
+            yield sse_event(event, event=event.get('type', 'message'))
+    finally:
+        broker.unsubscribe(queue)
@@ -0,0 +1,35 @@
+"""
+軸承故障頻率測試模組
+驗證轉速參數的檢查（包絡比對與倒頻譜路徑）
+"""
+
+import numpy as np
+import pytest
+from bearing_defects import BearingDefectAnalyzer
+from cepstrum import cepstrum, family_amplitudes
+
+FS = 25600
+
+
+@pytest.mark.parametrize("speed_rpm", [0, -1800, float('nan')])
+def test_speed_must_be_positive(speed_rpm):
+    with pytest.raises(ValueError, match="speed_rpm must be positive"):
+        BearingDefectAnalyzer(speed_rpm, FS)
+
+
+def test_defect_frequencies_above_spectrum():
+    # 1e6 rpm 時 BPFO / BPFI / BSF 皆超過 fs / 2，沒有可比對的諧波
+    with pytest.raises(ValueError, match="envelope spectrum range"):
+        BearingDefectAnalyzer(1e6, FS)
+
+
+@pytest.mark.parametrize("speed_rpm", [1500, 1650, 1800])
+def test_operating_speeds(speed_rpm):
+    assert BearingDefectAnalyzer(speed_rpm, FS).frequencies['bpfi'] < FS / 2
+
+
+def test_cepstrum_rejects_non_positive_spacing():
+    # 轉速為 0 時故障頻率皆為 0；倒頻譜視窗 fs / spacing 不可計算
+    c = cepstrum(np.random.default_rng(0).standard_normal(2560))
+    with pytest.raises(ValueError, match="spacings must be positive"):
+        family_amplitudes(c, FS, [0.0, 100.0], 0.02)
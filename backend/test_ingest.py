@@ -0,0 +1,105 @@
+"""
+即時匯入測試模組
+驗證目錄監看的失敗記錄、同名擷取檔不覆寫歷史資料，以及並行匯入的檔案編號
+"""
+
+import sqlite3
+import threading
+
+import numpy as np
+import pytest
+from phm_ingest import PHMDirectoryWatcher, PHMIngestor
+
+N = 2560
+
+
+def make_data(seed=0):
+    return np.random.default_rng(seed).standard_normal((N, 2))
+
+
+def stored_files(ingestor, bearing_name):
+    conn = sqlite3.connect(str(ingestor.db_path))
+    rows = conn.execute("""
+        SELECT mf.file_number, mf.file_name, COUNT(m.measurement_id)
+        FROM measurement_files mf
+        JOIN bearings b ON mf.bearing_id = b.bearing_id
+        LEFT JOIN measurements m ON m.file_id = mf.file_id
+        WHERE b.bearing_name = ?
+        GROUP BY mf.file_id
+        ORDER BY mf.file_number
+    """, (bearing_name,)).fetchall()
+    conn.close()
+    return rows
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    return PHMIngestor(str(tmp_path / "ingest.db"), broker=None)
+
+
+def test_failed_file_is_not_retried(tmp_path, ingestor):
+    bearing_dir = tmp_path / "watch" / "Bearing9_1"
+    bearing_dir.mkdir(parents=True)
+    bad = bearing_dir / "acc_00001.csv"
+    bad.write_text("not,a,number\n")
+
+    calls = []
+    ingest_file = ingestor.ingest_file
+    ingestor.ingest_file = lambda *args: calls.append(args) or ingest_file(*args)
+    watcher = PHMDirectoryWatcher(str(tmp_path / "watch"), ingestor, settle_time=0)
+
+    assert watcher.scan_once() == []
+    assert watcher.scan_once() == []
+    assert len(calls) == 1
+
+    # 內容變更後重新匯入
+    np.savetxt(bad, make_data(), delimiter=',')
+    events = watcher.scan_once()
+    assert len(events) == 1 and len(calls) == 2
+    print("✓ 解析失敗的檔案在變更前不再重試")
+
+
+def test_same_name_does_not_overwrite(ingestor):
+    first = ingestor.ingest('Bearing9_1', make_data(0), file_name='acc_00001.csv', file_number=1)
+    second = ingestor.ingest('Bearing9_1', make_data(1), file_name='acc_00001.csv', file_number=1)
+
+    assert second['file_id'] != first['file_id']
+    assert (second['file_number'], second['file_name']) == (2, 'acc_00001_00002.csv')
+    assert stored_files(ingestor, 'Bearing9_1') == [
+        (1, 'acc_00001.csv', N), (2, 'acc_00001_00002.csv', N)
+    ]
+    print("✓ 同名擷取檔附加為新檔案，歷史資料保留")
+
+
+def test_concurrent_ingest_numbers(ingestor):
+    ingestor.ingest('Bearing9_1', make_data(), file_number=1)
+    errors = []
+
+    def run(seed):
+        try:
+            ingestor.ingest('Bearing9_1', make_data(seed))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    numbers = [row[0] for row in stored_files(ingestor, 'Bearing9_1')]
+    assert numbers == list(range(1, 10))
+    print("✓ 並行匯入取得不重複的檔案編號")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_failed_file_is_not_retried,):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp), PHMIngestor(str(Path(tmp) / "ingest.db"), broker=None))
+    for test in (test_same_name_does_not_overwrite, test_concurrent_ingest_numbers):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(PHMIngestor(str(Path(tmp) / "ingest.db"), broker=None))
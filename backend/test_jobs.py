@@ -0,0 +1,110 @@
+"""
+背景工作佇列測試模組
+驗證租約：仍在更新心跳的執行中工作不會被重新排入佇列
+以及去重：軸承資料變更後不再重用已完成的工作
+"""
+
+import sqlite3
+
+import pytest
+from phm_jobs import JOB_COMPLETED, JOB_QUEUED, JOB_RUNNING, PHMJobQueue
+from phm_schema import create_measurement_schema
+
+
+def make_queue(tmp_path):
+    db_path = tmp_path / "jobs.db"
+    conn = sqlite3.connect(str(db_path))
+    create_measurement_schema(conn)
+    conn.execute("INSERT INTO bearings (bearing_name) VALUES ('Bearing1_1')")
+    conn.execute("""
+        INSERT INTO measurement_files (bearing_id, file_name, file_number, record_count)
+        VALUES (1, 'acc_00001.csv', 1, 2560)
+    """)
+    insert_measurement(conn, 1)
+    conn.commit()
+    conn.close()
+    return PHMJobQueue(str(db_path))
+
+
+def insert_measurement(conn, file_id):
+    conn.execute("""
+        INSERT INTO measurements
+        (file_id, hour, minute, second, microsecond, horizontal_acceleration, vertical_acceleration)
+        VALUES (?, 9, 39, 39, 65664, 0.552, -0.146)
+    """, (file_id,))
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return make_queue(tmp_path)
+
+
+def age_heartbeat(queue, job_id, seconds):
+    conn = sqlite3.connect(str(queue.db_path))
+    conn.execute(
+        "UPDATE analysis_jobs SET heartbeat_at = datetime('now', ?) WHERE job_id = ?",
+        (f"-{seconds} seconds", job_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_live_lease_is_not_requeued(queue):
+    job, _ = queue.submit('filter', 'Bearing1_1')
+    claimed = queue.claim_next('worker-a', lease_timeout=60)
+    assert claimed['job_id'] == job['job_id'] and claimed['worker_id'] == 'worker-a'
+
+    # 另一個工作程序啟動：worker-a 的租約仍有效
+    assert queue.requeue_interrupted(lease_timeout=60) == 0
+    assert queue.claim_next('worker-b', lease_timeout=60) is None
+    assert queue.get(job['job_id'])['status'] == JOB_RUNNING
+    assert queue.heartbeat(job['job_id'], 'worker-a')
+    print("✓ 有效租約的工作不會被其他工作程序接手")
+
+
+def test_expired_lease_is_taken_over(queue):
+    job, _ = queue.submit('filter', 'Bearing1_1')
+    queue.claim_next('worker-a', lease_timeout=60)
+    age_heartbeat(queue, job['job_id'], 120)
+
+    claimed = queue.claim_next('worker-b', lease_timeout=60)
+    assert claimed['job_id'] == job['job_id'] and claimed['worker_id'] == 'worker-b'
+    # 原工作程序的心跳失敗，應放棄執行
+    assert not queue.heartbeat(job['job_id'], 'worker-a')
+    print("✓ 租約過期的工作由其他工作程序接手")
+
+
+def test_release_requeues(queue):
+    job, _ = queue.submit('filter', 'Bearing1_1')
+    queue.claim_next('worker-a')
+    queue.release(job['job_id'], 'worker-a')
+    assert queue.get(job['job_id'])['status'] == JOB_QUEUED
+    print("✓ 停止時交還的工作重新排入佇列")
+
+
+def test_completed_job_reused_until_data_changes(queue):
+    job, created = queue.submit('filter', 'Bearing1_1')
+    assert created
+    queue.finish(job['job_id'], JOB_COMPLETED)
+    assert queue.submit('filter', 'Bearing1_1') == (queue.get(job['job_id']), False)
+
+    # 同名檔重新匯入：檔案數不變，但量測資料已更換
+    conn = sqlite3.connect(str(queue.db_path))
+    conn.execute("DELETE FROM measurements WHERE file_id = 1")
+    insert_measurement(conn, 1)
+    conn.commit()
+    conn.close()
+
+    rerun, created = queue.submit('filter', 'Bearing1_1')
+    assert created and rerun['job_id'] != job['job_id']
+    print("✓ 資料變更後重新建立工作")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    for test in (test_live_lease_is_not_requeued, test_expired_lease_is_taken_over, test_release_requeues,
+                 test_completed_job_reused_until_data_changes):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(make_queue(Path(tmp)))
@@ -0,0 +1,34 @@
+"""
+窄頻頻譜測試模組
+驗證 zoom FFT 解析度的上下限
+"""
+
+import numpy as np
+import pytest
+from initialization import InitParameter
+from narrowband import MAX_RESOLUTION, MIN_RESOLUTION, NarrowbandSpectrum
+
+ip = InitParameter()
+FS = 25600
+
+
+def make_signal(n=2560, fs=FS, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / fs
+    return np.sin(2 * np.pi * ip.mortor_gear * t) + 0.1 * rng.standard_normal(n)
+
+
+@pytest.mark.parametrize("resolution", [0.0, MIN_RESOLUTION / 2, MAX_RESOLUTION * 1.01, 7.0, 1000.0, np.nan, np.inf])
+def test_resolution_out_of_range(resolution):
+    with pytest.raises(ValueError):
+        NarrowbandSpectrum(FS, resolution)
+
+
+@pytest.mark.parametrize("resolution", [MIN_RESOLUTION, ip.zoom_resolution, 1.0, MAX_RESOLUTION])
+def test_sideband_mean_within_range(resolution):
+    # 最粗的允許解析度在 ± side_band_range 的搜尋視窗內仍有格點
+    band = NarrowbandSpectrum(FS, resolution).sideband_mean(
+        make_signal(), ip.mortor_gear, ip.side_band_range, ip.harmonic_gmf_range
+    )
+    assert abs(band["peak_frequency"] - ip.mortor_gear) <= ip.side_band_range
+    assert np.isfinite(band["sideband_mean"])
@@ -0,0 +1,53 @@
+"""
+線上特徵測試模組
+驗證分塊串流的 StreamingMoments / SegmentedVariance 與批次特徵計算一致
+"""
+
+import numpy as np
+from phm_feature_store import compute_signal_features
+from phm_online import SegmentedVariance, StreamingMoments
+
+FEATURES = ['rms', 'kurtosis', 'fm4', 'm6a', 'm8a', 'na4']
+CHUNK_SIZES = [1, 7, 100, 256, 333, 1000]
+
+
+def make_signal(n=2560, fs=25600, seed=0):
+    """PHM 長度的測試訊號：正弦 + 雜訊 + 週期衝擊（非零平均）"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / fs
+    x = np.sin(2 * np.pi * 180 * t) + 0.3 * rng.standard_normal(n) + 0.05
+    x[::197] += 4.0
+    return x
+
+
+def chunked_features(x, chunk_size, segment_length=256):
+    stream = SegmentedVariance(segment_length)
+    for start in range(0, len(x), chunk_size):
+        stream.update(x[start:start + chunk_size])
+    m = stream.total
+    return {'rms': m.rms, 'kurtosis': m.kurtosis, 'fm4': m.fm4, 'm6a': m.m6a, 'm8a': m.m8a, 'na4': stream.na4}
+
+
+def test_chunked_matches_batch():
+    x = make_signal()
+    batch = compute_signal_features(x, feature_names=FEATURES)
+    for chunk_size in CHUNK_SIZES:
+        online = chunked_features(x, chunk_size)
+        for name in FEATURES:
+            assert np.isclose(online[name], batch[name], rtol=1e-9), (chunk_size, name, online[name], batch[name])
+    print(f"✓ {len(CHUNK_SIZES)} 種分塊大小與批次特徵一致: {FEATURES}")
+
+
+def test_merge_matches_batch():
+    x = make_signal(seed=1)
+    batch = compute_signal_features(x, feature_names=FEATURES)
+    # 不同工作者各自累計後合併
+    merged = StreamingMoments.from_array(x[:1111]).merge(StreamingMoments.from_array(x[1111:]))
+    for name in ('rms', 'kurtosis', 'fm4', 'm6a', 'm8a'):
+        assert np.isclose(getattr(merged, name), batch[name], rtol=1e-9), (name, getattr(merged, name), batch[name])
+    print("✓ 合併部分結果與批次特徵一致")
+
+
+if __name__ == "__main__":
+    test_chunked_matches_batch()
+    test_merge_matches_batch()
@@ -0,0 +1,54 @@
+"""
+時間同步平均測試模組
+驗證 TSA 的角度重取樣涵蓋整段紀錄，且階次特徵的重取樣計畫不變
+"""
+
+import numpy as np
+from config import TSA_DEFAULT_SPEED_RPM
+from order_tracking import OrderTracker, resampling_plan
+from tsa import TimeSynchronousAverager
+
+FS = 25600
+N_SAMPLES = 2560  # 0.1 s PHM 量測檔
+SAMPLES_PER_REVOLUTION = 1024
+
+
+def test_three_revolutions_at_1800_rpm():
+    averager = TimeSynchronousAverager(1800, FS, SAMPLES_PER_REVOLUTION)
+    x = np.random.default_rng(0).standard_normal((4, N_SAMPLES))
+    assert averager.revolutions(x).shape == (4, 3, SAMPLES_PER_REVOLUTION)
+    print("✓ 1800 rpm 每檔 3 轉")
+
+
+def test_order_plan_unchanged():
+    # 已儲存的 order_* 特徵依此計畫計算：角度樣本不超過最後一個時間樣本
+    indices, _ = resampling_plan(N_SAMPLES, 1800.0, float(FS), SAMPLES_PER_REVOLUTION)
+    assert len(indices) == 3 * SAMPLES_PER_REVOLUTION - 1
+    print("✓ 階次特徵的重取樣計畫維持 3071 點")
+
+
+def test_full_record_tail_extrapolation():
+    # 末端不足一個樣本的位置以最後 4 點外插，平滑訊號的誤差很小
+    speed = 1800.0
+    tracker = OrderTracker(speed, FS, SAMPLES_PER_REVOLUTION)
+    t = np.arange(N_SAMPLES) / FS
+    frequency = 95.0
+    angular = tracker.resample(np.sin(2 * np.pi * frequency * t), full_record=True)
+    position = np.arange(angular.shape[-1]) * 60.0 / (speed * SAMPLES_PER_REVOLUTION)
+    assert np.max(np.abs(angular - np.sin(2 * np.pi * frequency * position))) < 1e-4
+    print("✓ 整段紀錄的重取樣（含末端外插）誤差 < 1e-4")
+
+
+def test_default_speed_without_operating_condition():
+    # 即時匯入的軸承沒有操作條件，改用 TSA_DEFAULT_SPEED_RPM 而非拒絕請求
+    assert TimeSynchronousAverager.for_bearing('Ingested_1').speed_rpm == TSA_DEFAULT_SPEED_RPM
+    assert TimeSynchronousAverager.for_bearing('Bearing2_1').speed_rpm == 1650
+    assert TimeSynchronousAverager.for_bearing('Ingested_1', 1500).speed_rpm == 1500
+    print("✓ 無操作條件時使用預設轉速")
+
+
+if __name__ == "__main__":
+    test_three_revolutions_at_1800_rpm()
+    test_order_plan_unchanged()
+    test_full_record_tail_extrapolation()
+    test_default_speed_without_operating_condition()
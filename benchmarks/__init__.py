@@ -0,0 +1,5 @@
+"""
+Benchmark suite for the DSP kernels (TimeDomain, FrequencyDomain,
+FilterProcess, HilbertTransform, TimeFrequency, HarmonicSildband) and the
+API endpoints. Run with `python -m benchmarks --help`.
+"""
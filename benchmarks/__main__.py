@@ -0,0 +1,115 @@
+"""
+Benchmark CLI.
+
+    python -m benchmarks                                # kernels + endpoints
+    python -m benchmarks --only kernels --sizes phm 1s
+    python -m benchmarks --output bench.json --baseline benchmarks/baseline.json
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+
+Endpoint benchmarks run against a temporary synthetic PHM database unless
+--db points at a real one.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='DSP kernel and API endpoint benchmarks')
+    parser.add_argument('--only', choices=['kernels', 'endpoints'], help='Run a single group')
+    parser.add_argument('--filter', dest='pattern', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--sizes', nargs='+', help='Signal sizes for kernels (phm, 1s, 10s)')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per kernel (endpoints use half)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip peak memory / allocation measurement')
+    parser.add_argument('--db', help='Real PHM database for endpoints and a real-signal kernel run')
+    parser.add_argument('--bearing', default='Bearing1_1', help='Bearing used with --db')
+    parser.add_argument('--trend-files', type=int, default=20, help='Files per trend endpoint call')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', help='Also write the results to this baseline path')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown / memory growth reported as regression (default 0.25)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on regressions')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+    # 資料庫路徑必須在匯入任何 backend 模組前決定
+    tmp_dir = None
+    if args.db:
+        db_path = str(Path(args.db).resolve())
+    else:
+        tmp_dir = tempfile.TemporaryDirectory(prefix='phm-bench-')
+        db_path = os.path.join(tmp_dir.name, 'phm_bench.db')
+    os.environ['PHM_DATABASE_PATH'] = db_path
+
+    from benchmarks.compare import compare_results, format_comparison, load_results, save_results
+
+    def progress(key):
+        print(f"  {key}", file=sys.stderr, flush=True)
+
+    results = {}
+    try:
+        if args.only in (None, 'kernels'):
+            from benchmarks.kernels import run_kernel_benchmarks
+            from benchmarks.signals import load_phm_signal
+
+            real_signal = load_phm_signal(db_path, args.bearing) if args.db else None
+            print("Kernel benchmarks", file=sys.stderr)
+            results.update(run_kernel_benchmarks(
+                sizes=args.sizes, pattern=args.pattern, repeat=args.repeat,
+                memory=not args.no_memory, real_signal=real_signal, progress=progress
+            ))
+
+        if args.only in (None, 'endpoints'):
+            from benchmarks.endpoints import create_synthetic_database, run_endpoint_benchmarks
+
+            if not args.db:
+                create_synthetic_database(db_path, file_count=args.trend_files)
+            print("Endpoint benchmarks", file=sys.stderr)
+            results.update(run_endpoint_benchmarks(
+                db_path, bearing_name=args.bearing if args.db else 'Bearing1_1',
+                trend_files=args.trend_files, pattern=args.pattern,
+                repeat=max(3, args.repeat // 2), memory=not args.no_memory, progress=progress
+            ))
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    settings = {
+        'only': args.only, 'filter': args.pattern, 'sizes': args.sizes, 'repeat': args.repeat,
+        'memory': not args.no_memory, 'database': 'real' if args.db else 'synthetic',
+        'trend_files': args.trend_files,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            save_results(path, results, settings)
+
+    print(f"{'benchmark':<70} {'median ms':>10} {'p95 ms':>10} {'peak KiB':>10}")
+    for key, value in results.items():
+        peak = value.get('peak_bytes')
+        peak_text = f"{peak / 1024:>10.1f}" if peak is not None else f"{'-':>10}"
+        print(f"{key:<70} {value['median_ms']:>10.3f} {value['p95_ms']:>10.3f} {peak_text}")
+
+    if args.baseline:
+        rows = compare_results(results, load_results(args.baseline)['results'], args.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row for row in rows if row['status'] == 'regression']
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Result files and baseline comparison.
+"""
+
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import scipy
+
+# 與基準比較的指標
+COMPARED_METRICS = ('median_ms', 'peak_bytes')
+
+
+def environment_info() -> Dict[str, Any]:
+    """Interpreter / library / machine info stored with every result file."""
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+    }
+
+
+def save_results(path: str, results: Dict[str, Dict], settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Write a result file: {"environment", "settings", "results"}."""
+    document = {
+        'environment': environment_info(),
+        'settings': settings,
+        'results': results,
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(
+    current: Dict[str, Dict],
+    baseline: Dict[str, Dict],
+    threshold: float = 0.25
+) -> List[Dict[str, Any]]:
+    """
+    Diff two result sets.
+
+    Args:
+        current: "results" of the new run
+        baseline: "results" of the stored baseline
+        threshold: Relative increase above which a metric is a regression
+
+    Returns:
+        One row per (benchmark, metric) present in both sets, with ratio
+        and status 'regression', 'improvement' or 'ok'
+    """
+    rows = []
+    for key in sorted(set(current) & set(baseline)):
+        for metric in COMPARED_METRICS:
+            new, old = current[key].get(metric), baseline[key].get(metric)
+            if new is None or not old:
+                continue
+            ratio = new / old
+            if ratio > 1 + threshold:
+                status = 'regression'
+            elif ratio < 1 / (1 + threshold):
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append({
+                'benchmark': key,
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'ratio': ratio,
+                'status': status,
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], only_changes: bool = False) -> str:
+    """Plain-text table of compare_results() rows."""
+    lines = [f"{'benchmark':<70} {'metric':<10} {'baseline':>12} {'current':>12} {'ratio':>7}  status"]
+    for row in rows:
+        if only_changes and row['status'] == 'ok':
+            continue
+        lines.append(
+            f"{row['benchmark']:<70} {row['metric']:<10} {row['baseline']:>12.3f} "
+            f"{row['current']:>12.3f} {row['ratio']:>7.2f}  {row['status']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,148 @@
+"""
+End-to-end endpoint benchmarks through an in-process ASGI client.
+
+The API reads PHM_DATABASE_PATH when backend modules are first imported, so
+the database (synthetic by default) must be chosen before this module
+imports the app; the CLI takes care of that ordering.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import httpx
+import numpy as np
+
+from backend.phm_schema import create_measurement_schema
+
+from benchmarks.harness import measure
+from benchmarks.signals import PHM_FS, PHM_SAMPLES, synthetic_acquisition
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+BENCH_BEARING = 'Bearing1_1'
+
+ENDPOINTS: List[str] = [
+    '/api/phm/database/bearing/{bearing}/file/{file}/data',
+    '/api/algorithms/time-domain/{bearing}/{file}',
+    '/api/algorithms/frequency-domain/{bearing}/{file}',
+    '/api/algorithms/envelope/{bearing}/{file}',
+    '/api/algorithms/stft/{bearing}/{file}',
+    '/api/algorithms/cwt/{bearing}/{file}',
+    '/api/algorithms/higher-order/{bearing}/{file}',
+    '/api/algorithms/spectrogram/{bearing}/{file}',
+    '/api/algorithms/frequency-fft/{bearing}/{file}',
+    '/api/algorithms/frequency-tsa/{bearing}/{file}',
+    '/api/algorithms/hilbert/{bearing}/{file}',
+    '/api/algorithms/filter-features/{bearing}/{file}',
+    # 趨勢端點在暖身時寫入特徵庫，量測的是讀取已計算特徵的路徑
+    '/api/algorithms/time-domain-trend/{bearing}?max_files={files}',
+    '/api/algorithms/filter-trend/{bearing}?max_files={files}',
+]
+
+
+def create_synthetic_database(db_path: str, bearing_name: str = BENCH_BEARING, file_count: int = 20) -> str:
+    """Create a PHM database holding `file_count` synthetic acquisitions of one bearing."""
+    path = Path(db_path)
+    if path.exists():
+        path.unlink()
+
+    conn = sqlite3.connect(str(path))
+    try:
+        create_measurement_schema(conn)
+        cursor = conn.execute(
+            "INSERT INTO bearings (bearing_name, condition_id, description) VALUES (?, ?, ?)",
+            (bearing_name, 1, 'Synthetic benchmark bearing')
+        )
+        bearing_id = cursor.lastrowid
+        microseconds = np.arange(PHM_SAMPLES) * (1e6 / PHM_FS)
+
+        for file_number in range(1, file_count + 1):
+            horiz, vert = synthetic_acquisition(PHM_SAMPLES, seed=file_number)
+            cursor = conn.execute("""
+                INSERT INTO measurement_files (bearing_id, file_name, file_number, record_count)
+                VALUES (?, ?, ?, ?)
+            """, (bearing_id, f"acc_{file_number:05d}.csv", file_number, PHM_SAMPLES))
+            file_id = cursor.lastrowid
+            conn.executemany("""
+                INSERT INTO measurements
+                (file_id, hour, minute, second, microsecond, horizontal_acceleration, vertical_acceleration)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (file_id, 9, file_number // 60, file_number % 60, int(us), float(h), float(v))
+                for us, h, v in zip(microseconds, horiz, vert)
+            ])
+        conn.commit()
+    finally:
+        conn.close()
+    return str(path)
+
+
+def load_app(db_path: str):
+    """Import the FastAPI app bound to `db_path`."""
+    os.environ['PHM_DATABASE_PATH'] = db_path
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import config
+    import main
+
+    if Path(config.PHM_DATABASE_PATH).resolve() != Path(db_path).resolve():
+        raise RuntimeError(
+            "backend config was imported before the benchmark database was selected; "
+            "run the endpoint benchmarks through 'python -m benchmarks'"
+        )
+    return main.app
+
+
+def run_endpoint_benchmarks(
+    db_path: str,
+    bearing_name: str = BENCH_BEARING,
+    file_number: int = 1,
+    trend_files: int = 20,
+    pattern: Optional[str] = None,
+    repeat: int = 10,
+    memory: bool = True,
+    progress: Optional[Callable[[str], None]] = None,
+    endpoints: Sequence[str] = ENDPOINTS
+) -> Dict[str, Dict]:
+    """
+    Benchmark API endpoints in-process (no network, no server).
+
+    Returns:
+        {"endpoint:<path template>": measurement}
+    """
+    app = load_app(db_path)
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://benchmark')
+
+    def request(url: str) -> Callable[[], object]:
+        def call():
+            response = loop.run_until_complete(client.get(url))
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} -> {response.status_code}: {response.text[:200]}")
+            return response.content
+        return call
+
+    results: Dict[str, Dict] = {}
+    try:
+        for template in endpoints:
+            if pattern and pattern not in template:
+                continue
+            key = f"endpoint:{template.split('?')[0]}"
+            if progress:
+                progress(key)
+            url = template.format(bearing=bearing_name, file=file_number, files=trend_files)
+            call = request(url)
+            results[key] = {
+                'group': 'endpoint',
+                'url': url,
+                'response_bytes': len(call()),
+                **measure(call, repeat=repeat, warmup=1, memory=memory),
+            }
+    finally:
+        loop.run_until_complete(client.aclose())
+        loop.close()
+    return results
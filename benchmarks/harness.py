@@ -0,0 +1,90 @@
+"""
+Benchmark harness: latency, peak memory and allocation measurement.
+
+Latency and memory are measured in separate passes because tracemalloc
+slows allocation-heavy code down considerably.
+"""
+
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        'min_ms': ordered[0] * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p95_ms': p95 * 1000,
+        'stdev_ms': (statistics.stdev(ordered) * 1000) if len(ordered) > 1 else 0.0,
+    }
+
+
+def measure_memory(func: Callable[[], Any]) -> Dict[str, int]:
+    """
+    Peak traced memory and allocations of one call.
+
+    Returns:
+        peak_bytes: Peak traced memory during the call
+        allocated_bytes / allocated_blocks: Memory and blocks allocated by
+            the call and still alive when it returned (incl. the result)
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, 'filename')
+    del result
+    return {
+        'peak_bytes': max(0, peak - base),
+        'allocated_bytes': sum(stat.size_diff for stat in diff if stat.size_diff > 0),
+        'allocated_blocks': sum(stat.count_diff for stat in diff if stat.count_diff > 0),
+    }
+
+
+def measure(
+    func: Callable[[], Any],
+    repeat: int = 20,
+    warmup: int = 2,
+    min_time: float = 0.0,
+    memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Benchmark a zero-argument callable.
+
+    Args:
+        func: Callable to measure
+        repeat: Minimum number of timed calls
+        warmup: Untimed calls before measuring (caches, lazy imports)
+        min_time: Keep timing until this many seconds have elapsed
+        memory: Also run one traced call for memory statistics
+
+    Returns:
+        Latency statistics (ms), number of runs and memory statistics
+    """
+    for _ in range(warmup):
+        func()
+
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < repeat or (time.perf_counter() - started) < min_time:
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+
+    result: Dict[str, Any] = {'runs': len(samples), **_latency_stats(samples)}
+    if memory:
+        result.update(measure_memory(func))
+    return result
@@ -0,0 +1,182 @@
+"""
+Kernel benchmarks for the DSP modules in backend/.
+
+Each case builds a zero-argument callable around one signal so the harness
+only times the kernel itself. Expensive kernels are limited to the shorter
+signal sizes.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from backend.bispectrum import BispectrumAnalyzer
+from backend.cepstrum import cepstrum
+from backend.cross_spectral import CrossSpectralAnalyzer
+from backend.filterprocess import FilterProcess
+from backend.frequencydomain import FrequencyDomain
+from backend.harmonic_sildband_table import HarmonicSildband
+from backend.hilberttransform import HilbertTransform
+from backend.kurtogram import FastKurtogram
+from backend.order_tracking import OrderTracker
+from backend.phm_online import OnlineFeatureExtractor
+from backend.timedomain import TimeDomain
+from backend.timefrequency import TimeFrequency
+from backend.tsa import TimeSynchronousAverager
+
+from benchmarks.harness import measure
+from benchmarks.signals import PHM_FS, SIGNAL_SIZES, synthetic_bearing_signal
+
+ALL_SIZES = tuple(SIGNAL_SIZES)
+SHORT_SIZES = ('phm', '1s')
+
+
+class KernelCase(NamedTuple):
+    name: str
+    sizes: Sequence[str]
+    build: Callable[[np.ndarray, int], Callable[[], object]]
+
+
+def _fft_fm0_si(x, fs):
+    fd = FrequencyDomain()
+    return lambda: fd.fft_fm0_si(x, fs)
+
+
+def _cepstrum_fm0_si(x, fs):
+    fd = FrequencyDomain()
+    return lambda: fd.fft_fm0_si(x, fs, harmonic_search='cepstrum')
+
+
+def _zoom_fm0_si(x, fs):
+    fd = FrequencyDomain()
+    return lambda: fd.zoom_fm0_si(x, fs)
+
+
+def _tsa_fft_fm0_slf(x, fs):
+    fd = FrequencyDomain()
+    fftoutput = fd.fft_fm0_si(x, fs)[0]
+    return lambda: fd.tsa_fft_fm0_slf(x, fs, fftoutput)
+
+
+def _harmonic(x, fs):
+    fftoutput = HarmonicSildband.fftoutput(x, fs)[4]
+    return lambda: HarmonicSildband.Harmonic(fftoutput)
+
+
+def _sildband(x, fs):
+    fftoutput = HarmonicSildband.fftoutput(x, fs)[4]
+    tsa_fftoutput = HarmonicSildband.tsa_fftoutput(x, fs, fftoutput)
+    return lambda: HarmonicSildband.Sildband(tsa_fftoutput)
+
+
+def _cross_spectrum(x, fs):
+    analyzer = CrossSpectralAnalyzer(fs)
+    other = np.roll(x, 7)  # 第二通道：平移後的同一訊號
+    return lambda: analyzer.analyze(x, other)
+
+
+def _online_features(x, fs, chunk=2560):
+    def run():
+        extractor = OnlineFeatureExtractor(fs)
+        for start in range(0, len(x), chunk):
+            extractor.update(x[start:start + chunk])
+        extractor.flush()
+        return extractor.features()
+    return run
+
+
+KERNEL_CASES: List[KernelCase] = [
+    # TimeDomain
+    KernelCase('TimeDomain.rms', ALL_SIZES, lambda x, fs: lambda: TimeDomain.rms(x)),
+    KernelCase('TimeDomain.peak', ALL_SIZES, lambda x, fs: lambda: TimeDomain.peak(x)),
+    KernelCase('TimeDomain.cf', ALL_SIZES, lambda x, fs: lambda: TimeDomain.cf(x)),
+    KernelCase('TimeDomain.kurt', ALL_SIZES, lambda x, fs: lambda: TimeDomain.kurt(x)),
+    # FrequencyDomain
+    KernelCase('FrequencyDomain.fft_process', ALL_SIZES,
+               lambda x, fs: lambda: FrequencyDomain.fft_process(x, fs)),
+    KernelCase('FrequencyDomain.fft_fm0_si', ALL_SIZES, _fft_fm0_si),
+    KernelCase('FrequencyDomain.fft_fm0_si.cepstrum', ALL_SIZES, _cepstrum_fm0_si),
+    KernelCase('FrequencyDomain.zoom_fm0_si', ALL_SIZES, _zoom_fm0_si),
+    KernelCase('FrequencyDomain.tsa_fft_fm0_slf', SHORT_SIZES, _tsa_fft_fm0_slf),
+    # FilterProcess
+    KernelCase('FilterProcess.calculate_all_features', ALL_SIZES,
+               lambda x, fs: lambda: FilterProcess.calculate_all_features(x, fs, 10)),
+    # HilbertTransform
+    KernelCase('HilbertTransform.analyze_signal', ALL_SIZES,
+               lambda x, fs: lambda: HilbertTransform().analyze_signal(x, 10)),
+    # TimeFrequency
+    KernelCase('TimeFrequency.stft_analysis', SHORT_SIZES,
+               lambda x, fs: lambda: TimeFrequency.stft_analysis(x, fs=fs)),
+    KernelCase('TimeFrequency.cwt_analysis', ('phm',),
+               lambda x, fs: lambda: TimeFrequency.cwt_analysis(x, fs=fs)),
+    KernelCase('TimeFrequency.envelope_analysis', ALL_SIZES,
+               lambda x, fs: lambda: TimeFrequency.envelope_analysis(x, fs=fs)),
+    KernelCase('TimeFrequency.spectrogram_features', SHORT_SIZES,
+               lambda x, fs: lambda: TimeFrequency.spectrogram_features(x, fs=fs)),
+    KernelCase('FastKurtogram.compute', ALL_SIZES,
+               lambda x, fs: lambda: FastKurtogram(fs).compute(x)),
+    KernelCase('OrderTracker.order_spectrum', ALL_SIZES,
+               lambda x, fs: lambda: OrderTracker(1800, fs).order_spectrum(x)),
+    KernelCase('TimeSynchronousAverager.average', ALL_SIZES,
+               lambda x, fs: lambda: TimeSynchronousAverager(1800, fs).average(x)),
+    KernelCase('CrossSpectralAnalyzer.analyze', ALL_SIZES, _cross_spectrum),
+    KernelCase('BispectrumAnalyzer.compute', ALL_SIZES,
+               lambda x, fs: lambda: BispectrumAnalyzer(fs).compute(x)),
+    KernelCase('cepstrum', ALL_SIZES, lambda x, fs: lambda: cepstrum(x)),
+    # Online (chunked) estimators
+    KernelCase('OnlineFeatureExtractor.update', ALL_SIZES, _online_features),
+    # HarmonicSildband
+    KernelCase('HarmonicSildband.fftoutput', SHORT_SIZES,
+               lambda x, fs: lambda: HarmonicSildband.fftoutput(x, fs)),
+    KernelCase('HarmonicSildband.Harmonic', SHORT_SIZES, _harmonic),
+    KernelCase('HarmonicSildband.Sildband', SHORT_SIZES, _sildband),
+]
+
+
+def run_kernel_benchmarks(
+    sizes: Optional[Sequence[str]] = None,
+    pattern: Optional[str] = None,
+    repeat: int = 20,
+    memory: bool = True,
+    real_signal: Optional[np.ndarray] = None,
+    fs: int = PHM_FS,
+    progress: Optional[Callable[[str], None]] = None
+) -> Dict[str, Dict]:
+    """
+    Run the kernel cases.
+
+    Args:
+        sizes: Signal size keys of SIGNAL_SIZES to run (default: all)
+        pattern: Only run cases whose name contains this substring
+        repeat: Timed calls per case
+        memory: Measure peak memory / allocations
+        real_signal: A real acquisition, benchmarked as size 'real'
+        fs: Sampling frequency
+        progress: Called with each result key before it runs
+
+    Returns:
+        {"kernel:<name>[<size>]": measurement}
+    """
+    sizes = list(sizes or ALL_SIZES)
+    signals = {size: synthetic_bearing_signal(SIGNAL_SIZES[size], fs) for size in sizes}
+    if real_signal is not None:
+        signals['real'] = real_signal
+
+    results: Dict[str, Dict] = {}
+    for case in KERNEL_CASES:
+        if pattern and pattern not in case.name:
+            continue
+        for size, x in signals.items():
+            if size != 'real' and size not in case.sizes:
+                continue
+            key = f"kernel:{case.name}[{size}]"
+            if progress:
+                progress(key)
+            # 長訊號減少重複次數
+            runs = repeat if len(x) <= SIGNAL_SIZES['1s'] else max(3, repeat // 5)
+            results[key] = {
+                'group': 'kernel',
+                'samples': len(x),
+                **measure(case.build(x, fs), repeat=runs, memory=memory),
+            }
+    return results
@@ -75,5 +75,133 @@ export default {
     return api.post('/api/phm/predict-rul', null, {
       params: { bearing_name: bearingName, model_type: modelType }
     })
+  },
+
+  // 單次取得多個特徵族群（outputs 例如 ['time-domain', 'frequency', 'hilbert']）
+  getFullAnalysis(bearingName, fileNumber, outputs = [], params = {}) {
+    return api.get(`/api/algorithms/full/${bearingName}/${fileNumber}`, {
+      params: { ...params, outputs: outputs.length ? outputs.join(',') : undefined }
+    })
+  },
+
+  // 快速峭度圖；optimal_band 可作為包絡頻譜的 lowcut/highcut（或 auto_band: true）
+  getKurtogram(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/kurtogram/${bearingName}/${fileNumber}`, { params })
+  },
+
+  // 全壽命頻譜瀑布圖（params: start, end, stride, max_files, bins, f_min, f_max, reduce, envelope）
+  getWaterfall(bearingName, params = {}) {
+    return api.get(`/api/algorithms/waterfall/${bearingName}`, { params })
+  },
+
+  // 軸承故障頻率（BPFO/BPFI/BSF/FTF）比對：單一檔案與全壽命趨勢
+  getBearingDefects(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/bearing-defects/${bearingName}/${fileNumber}`, { params })
+  },
+
+  getBearingDefectTrend(bearingName, params = {}) {
+    return api.get(`/api/algorithms/bearing-defects-trend/${bearingName}`, { params })
+  },
+
+  // 階次頻譜（角度域重取樣）與各軸承階次特徵趨勢（params.bearings: 'Bearing1_1,Bearing2_1'）
+  getOrderSpectrum(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/order-spectrum/${bearingName}/${fileNumber}`, { params })
+  },
+
+  getOrderFeatureTrends(params = {}) {
+    return api.get('/api/algorithms/order-features', { params })
+  },
+
+  // 多檔案重疊平均的 TSA 高頻特徵趨勢（params: window, step, start, end）
+  getTsaTrend(bearingName, params = {}) {
+    return api.get(`/api/algorithms/tsa-trend/${bearingName}`, { params })
+  },
+
+  // 水平/垂直通道 Welch PSD、交叉頻譜與相干性；全壽命相干性趨勢（bands 同頻帶能量趨勢）
+  getCrossSpectrum(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/cross-spectrum/${bearingName}/${fileNumber}`, { params })
+  },
+
+  getCoherenceTrend(bearingName, params = {}) {
+    return api.get(`/api/algorithms/coherence-trend/${bearingName}`, { params })
+  },
+
+  // 雙頻譜 / 雙相干性（params: nfft, f_min, f_max, max_bins）
+  getBispectrum(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/bispectrum/${bearingName}/${fileNumber}`, { params })
+  },
+
+  // 倒頻譜與諧波族偵測（params: kind, lifter_cutoff, lifter_mode）；全壽命倒頻譜特徵趨勢
+  getCepstrum(bearingName, fileNumber, params = {}) {
+    return api.get(`/api/algorithms/cepstrum/${bearingName}/${fileNumber}`, { params })
+  },
+
+  getCepstrumTrend(bearingName, params = {}) {
+    return api.get(`/api/algorithms/cepstrum-trend/${bearingName}`, { params })
+  },
+
+  // 全壽命頻帶能量趨勢（bands: 'low-high,low-high'，單位 Hz）
+  getBandEnergyTrend(bearingName, params = {}) {
+    return api.get(`/api/algorithms/band-energy-trend/${bearingName}`, { params })
+  },
+
+  // 特徵庫 Parquet / Arrow 匯出與查詢（columns、bearings 為陣列）
+  exportFeatureStore(format = 'parquet', bearings = []) {
+    return api.post('/api/features/export', null, {
+      params: { format, bearings: bearings.length ? bearings.join(',') : undefined }
+    })
+  },
+
+  queryFeatureStore({ format = 'parquet', columns = [], bearings = [], fileStart, fileEnd } = {}) {
+    return api.get('/api/features/query', {
+      params: {
+        format,
+        columns: columns.length ? columns.join(',') : undefined,
+        bearings: bearings.length ? bearings.join(',') : undefined,
+        file_start: fileStart,
+        file_end: fileEnd
+      }
+    })
+  },
+
+  // Background job APIs
+  submitJob(jobType, bearingName, params = {}) {
+    return api.post('/api/jobs', { job_type: jobType, bearing_name: bearingName, params })
+  },
+
+  getJob(jobId, includeResults = true) {
+    return api.get(`/api/jobs/${jobId}`, { params: { include_results: includeResults } })
+  },
+
+  cancelJob(jobId) {
+    return api.post(`/api/jobs/${jobId}/cancel`)
+  },
+
+  // Streaming (Server-Sent Events) APIs
+  // 逐檔推送趨勢點，不受 axios 逾時限制；回傳 EventSource 供呼叫端關閉
+  streamTrend(bearingName, family = 'filter', { maxFiles = 50, samplingRate, onStart, onPoint, onDone, onError } = {}) {
+    const params = new URLSearchParams({ family, max_files: maxFiles })
+    if (samplingRate) params.append('sampling_rate', samplingRate)
+    const source = new EventSource(`${API_BASE_URL}/api/stream/trend/${bearingName}?${params}`)
+
+    source.addEventListener('start', e => onStart && onStart(JSON.parse(e.data)))
+    source.addEventListener('point', e => onPoint && onPoint(JSON.parse(e.data)))
+    source.addEventListener('done', e => {
+      source.close()
+      onDone && onDone(JSON.parse(e.data))
+    })
+    source.addEventListener('error', e => {
+      source.close()
+      onError && onError(e.data ? JSON.parse(e.data).detail : 'Stream connection failed')
+    })
+    return source
+  },
+
+  // 訂閱即時匯入的新特徵點
+  subscribeFeatureEvents(bearingName, onEvent) {
+    const query = bearingName ? `?bearing_name=${encodeURIComponent(bearingName)}` : ''
+    const source = new EventSource(`${API_BASE_URL}/api/stream/features${query}`)
+    source.addEventListener('feature_point', e => onEvent(JSON.parse(e.data)))
+    return source
   }
 }
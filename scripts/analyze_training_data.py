@@ -4,6 +4,7 @@ PHM 2012 訓練數據分析腳本
 """
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -11,6 +12,10 @@ import seaborn as sns
 from pathlib import Path
 import json
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.phm_csv import read_phm_signals
+
 # 設定中文字體
 plt.rcParams['font.sans-serif'] = ['DejaVu Sans', 'Arial Unicode MS', 'sans-serif']
 plt.rcParams['axes.unicode_minus'] = False
@@ -47,7 +52,7 @@ def analyze_bearing_data(bearing_name, bearing_path):
 
     # 讀取第一個文件以了解數據格式
     first_file = os.path.join(bearing_path, csv_files[0])
-    df_sample = pd.read_csv(first_file, header=None)
+    first_signals = read_phm_signals(first_file)
 
     # 數據格式: hour, minute, second, microsecond, horiz_vibration, vert_vibration
     # (根據觀察到的格式)
@@ -59,11 +64,11 @@ def analyze_bearing_data(bearing_name, bearing_path):
         'speed_rpm': OPERATING_CONDITIONS[bearing_name]['speed'],
         'actual_RUL_min': ACTUAL_RUL[bearing_name],
         'num_files': len(csv_files),
-        'data_points_per_file': len(df_sample),
+        'data_points_per_file': len(first_signals),
         'sampling_rate_hz': 25600,  # 根據 TRAINING.MD
-        'duration_per_file_sec': len(df_sample) / 25600,
-        'total_duration_sec': (len(csv_files) * len(df_sample)) / 25600,
-        'total_duration_min': (len(csv_files) * len(df_sample)) / 25600 / 60,
+        'duration_per_file_sec': len(first_signals) / 25600,
+        'total_duration_sec': (len(csv_files) * len(first_signals)) / 25600,
+        'total_duration_min': (len(csv_files) * len(first_signals)) / 25600 / 60,
     }
 
     # 計算一些基本統計
@@ -71,11 +76,9 @@ def analyze_bearing_data(bearing_name, bearing_path):
     sample_indices = np.linspace(0, len(csv_files)-1, min(50, len(csv_files)), dtype=int)
 
     for idx in sample_indices:
-        file_path = os.path.join(bearing_path, csv_files[idx])
-        df = pd.read_csv(file_path, header=None)
-
-        horiz_vib = df.iloc[:, 4].values  # 水平振動
-        vert_vib = df.iloc[:, 5].values   # 垂直振動
+        signals = read_phm_signals(os.path.join(bearing_path, csv_files[idx]))
+        horiz_vib = signals[:, 0]  # 水平振動
+        vert_vib = signals[:, 1]   # 垂直振動
 
         vibration_stats.append({
             'file_index': idx,
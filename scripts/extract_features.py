@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Extract the full feature set of every acquisition of every bearing.
+
+Files are read and processed by a process pool in chunks; each finished
+chunk is written as a checkpoint part, so an interrupted run resumes where
+it stopped. When all chunks of a bearing are done they are merged into one
+columnar file per bearing: Parquet when pyarrow is installed, NPZ otherwise.
+
+Usage:
+    python scripts/extract_features.py --data-dir phm-ieee-2012-data-challenge-dataset/Learning_set
+    python scripts/extract_features.py --data-dir ... --bearings Bearing1_1 Bearing1_2 --workers 8
+    python scripts/extract_features.py --data-dir ... --format npz --output features/
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.config import DEFAULT_SAMPLING_RATE
+from backend.phm_csv import read_phm_signals
+from backend.phm_feature_store import CHANNELS, STORED_FEATURES, compute_signal_features
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FILE_NUMBER_PATTERN = re.compile(r'(\d+)')
+CHECKPOINT_NAME = '_checkpoint.json'
+
+
+def feature_columns() -> List[str]:
+    """Output columns after file_number: <channel>_<feature>."""
+    return [f"{channel}_{name}" for channel in CHANNELS for name in STORED_FEATURES]
+
+
+def list_acquisitions(bearing_dir: Path) -> List[Tuple[int, Path]]:
+    """(file_number, path) of the acc_*.csv files of one bearing, in order."""
+    files = []
+    for path in bearing_dir.glob('acc_*.csv'):
+        match = FILE_NUMBER_PATTERN.search(path.stem)
+        if match:
+            files.append((int(match.group(1)), path))
+    return sorted(files)
+
+
+def read_acquisition(path: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """Horizontal / vertical columns of a PHM acquisition (',' or ';' separated)."""
+    data = read_phm_signals(path)
+    return data[:, 0], data[:, 1]
+
+
+def extract_chunk(paths: List[str], fs: int, segment_count: int) -> np.ndarray:
+    """
+    Feature rows of a chunk of files (runs in a worker process).
+
+    Returns:
+        float array (len(paths), len(feature_columns())); rows of unreadable
+        files are NaN
+    """
+    rows = np.full((len(paths), len(CHANNELS) * len(STORED_FEATURES)), np.nan)
+    for i, path in enumerate(paths):
+        try:
+            signals = read_acquisition(Path(path))
+        except Exception as e:
+            print(f"Error reading {path}: {e}", file=sys.stderr)
+            continue
+        values = []
+        for signal in signals:
+            features = compute_signal_features(signal, fs, segment_count)
+            values.extend(features[name] for name in STORED_FEATURES)
+        rows[i] = values
+    return rows
+
+
+class FeatureExtractor:
+    """Process-parallel feature extraction with per-chunk checkpoints."""
+
+    def __init__(
+        self,
+        data_dir: str,
+        output_dir: str,
+        output_format: str = 'auto',
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+        sampling_rate: int = DEFAULT_SAMPLING_RATE,
+        segment_count: int = 10
+    ):
+        self.data_dir = Path(data_dir)
+        self.output_dir = Path(output_dir)
+        if output_format == 'auto':
+            output_format = 'parquet' if pa is not None else 'npz'
+        if output_format == 'parquet' and pa is None:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow) or --format npz")
+        self.output_format = output_format
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.sampling_rate = sampling_rate
+        self.segment_count = segment_count
+
+    def list_bearings(self, names: Optional[List[str]] = None) -> List[Path]:
+        bearing_dirs = sorted(p for p in self.data_dir.iterdir() if p.is_dir() and p.name.startswith('Bearing'))
+        if names:
+            bearing_dirs = [p for p in bearing_dirs if p.name in names]
+        return bearing_dirs
+
+    def output_path(self, bearing_name: str) -> Path:
+        return self.output_dir / f"{bearing_name}.{self.output_format}"
+
+    def _parts_dir(self, bearing_name: str) -> Path:
+        return self.output_dir / f"{bearing_name}.parts"
+
+    def _fingerprint(self, files: List[Tuple[int, Path]]) -> str:
+        """Identifies the inputs and settings of a run; a change discards old checkpoints."""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({
+            'fs': self.sampling_rate,
+            'segment_count': self.segment_count,
+            'chunk_size': self.chunk_size,
+            'columns': feature_columns(),
+        }, sort_keys=True).encode())
+        for number, path in files:
+            stat = path.stat()
+            digest.update(f"{number}:{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def _load_checkpoint(self, parts_dir: Path, fingerprint: str) -> set:
+        checkpoint = parts_dir / CHECKPOINT_NAME
+        if checkpoint.exists():
+            state = json.loads(checkpoint.read_text())
+            if state.get('fingerprint') == fingerprint:
+                return {i for i in state.get('done', []) if (parts_dir / f"part-{i:05d}.npy").exists()}
+        for stale in parts_dir.glob('part-*.npy'):
+            stale.unlink()
+        return set()
+
+    @staticmethod
+    def _save_checkpoint(parts_dir: Path, fingerprint: str, done: set):
+        tmp = parts_dir / (CHECKPOINT_NAME + '.tmp')
+        tmp.write_text(json.dumps({'fingerprint': fingerprint, 'done': sorted(done)}))
+        os.replace(tmp, parts_dir / CHECKPOINT_NAME)
+
+    def _write_output(self, bearing_name: str, file_numbers: np.ndarray, rows: np.ndarray) -> Path:
+        path = self.output_path(bearing_name)
+        tmp = path.with_name(path.name + '.tmp')
+        columns = feature_columns()
+        if self.output_format == 'parquet':
+            table = pa.table(
+                {'file_number': pa.array(file_numbers, pa.int32()),
+                 **{name: pa.array(rows[:, i]) for i, name in enumerate(columns)}},
+                metadata={'bearing_name': bearing_name, 'sampling_rate': str(self.sampling_rate)}
+            )
+            pq.write_table(table, tmp)
+        else:
+            with open(tmp, 'wb') as f:
+                np.savez(f, file_number=file_numbers.astype(np.int32),
+                         **{name: rows[:, i] for i, name in enumerate(columns)})
+        os.replace(tmp, path)
+        return path
+
+    def extract_bearing(self, executor: ProcessPoolExecutor, bearing_dir: Path, limit: Optional[int] = None) -> Dict:
+        """Extract one bearing; returns a summary dict."""
+        bearing_name = bearing_dir.name
+        files = list_acquisitions(bearing_dir)
+        if limit:
+            files = files[:limit]
+        if not files:
+            logger.warning(f"{bearing_name}: no acc_*.csv files")
+            return {'bearing_name': bearing_name, 'files': 0}
+
+        parts_dir = self._parts_dir(bearing_name)
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        fingerprint = self._fingerprint(files)
+        done = self._load_checkpoint(parts_dir, fingerprint)
+
+        chunks = [files[i:i + self.chunk_size] for i in range(0, len(files), self.chunk_size)]
+        pending = {
+            executor.submit(
+                extract_chunk, [str(path) for _, path in chunk], self.sampling_rate, self.segment_count
+            ): index
+            for index, chunk in enumerate(chunks) if index not in done
+        }
+        if done:
+            logger.info(f"{bearing_name}: resuming, {len(done)}/{len(chunks)} chunks already done")
+
+        started = time.perf_counter()
+        processed = 0
+        for future in as_completed(pending):
+            index = pending[future]
+            rows = future.result()
+            part = parts_dir / f"part-{index:05d}.npy"
+            with open(part.with_name(part.name + '.tmp'), 'wb') as f:
+                np.save(f, rows)
+            os.replace(part.with_name(part.name + '.tmp'), part)
+            done.add(index)
+            self._save_checkpoint(parts_dir, fingerprint, done)
+
+            processed += len(chunks[index])
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"{bearing_name}: {len(done)}/{len(chunks)} chunks, "
+                f"{processed / elapsed:.1f} files/s"
+            )
+
+        rows = np.vstack([np.load(parts_dir / f"part-{i:05d}.npy") for i in range(len(chunks))])
+        file_numbers = np.array([number for number, _ in files])
+        output = self._write_output(bearing_name, file_numbers, rows)
+
+        for part in parts_dir.iterdir():
+            part.unlink()
+        parts_dir.rmdir()
+
+        failed = int(np.isnan(rows).all(axis=1).sum())
+        logger.info(f"{bearing_name}: {len(files)} files -> {output} ({failed} unreadable)")
+        return {'bearing_name': bearing_name, 'files': len(files), 'failed': failed, 'output': str(output)}
+
+    def run(self, bearings: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        bearing_dirs = self.list_bearings(bearings)
+        if not bearing_dirs:
+            raise FileNotFoundError(f"No Bearing* directories in {self.data_dir}")
+
+        logger.info(
+            f"Extracting {len(bearing_dirs)} bearing(s) with {self.workers} worker(s), "
+            f"{self.output_format} output in {self.output_dir}"
+        )
+        # 每個行程單執行緒計算，避免 BLAS/FFT 執行緒與行程數相乘；spawn 的子行程會繼承環境變數
+        for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+            os.environ.setdefault(name, '1')
+
+        summaries = []
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(self.workers, mp_context=context) as executor:
+            for bearing_dir in bearing_dirs:
+                summaries.append(self.extract_bearing(executor, bearing_dir, limit))
+        return summaries
+
+
+def load_features(path: str) -> pd.DataFrame:
+    """Read a per-bearing output file (.parquet or .npz) as a DataFrame."""
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise RuntimeError("Reading Parquet requires pyarrow")
+        return pq.read_table(path).to_pandas()
+    with np.load(path) as data:
+        return pd.DataFrame({name: data[name] for name in data.files})
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Process-parallel feature extraction for every PHM acquisition")
+    parser.add_argument('--data-dir', required=True, help="Directory with Bearing*/acc_*.csv")
+    parser.add_argument('--output', default='features', help="Output directory (default: features)")
+    parser.add_argument('--bearings', nargs='+', help="Only these bearings")
+    parser.add_argument('--format', choices=['auto', 'parquet', 'npz'], default='auto',
+                        help="Output format (auto: parquet if pyarrow is installed, else npz)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Files per task / checkpoint part")
+    parser.add_argument('--sampling-rate', type=int, default=DEFAULT_SAMPLING_RATE)
+    parser.add_argument('--segment-count', type=int, default=10, help="NA4 / NB4 segments")
+    parser.add_argument('--limit', type=int, help="Only the first N files of each bearing")
+    args = parser.parse_args()
+
+    extractor = FeatureExtractor(
+        args.data_dir, args.output, args.format, args.workers, args.chunk_size,
+        args.sampling_rate, args.segment_count
+    )
+    started = time.perf_counter()
+    summaries = extractor.run(args.bearings, args.limit)
+    total = sum(s['files'] for s in summaries)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Done: {total} files in {elapsed:.1f}s ({total / elapsed:.1f} files/s)")
+
+
+if __name__ == '__main__':
+    main()
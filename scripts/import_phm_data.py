@@ -10,83 +10,46 @@ Data structure:
 """
 
 import os
+import sys
 import sqlite3
-import csv
+import argparse
 from pathlib import Path
 from typing import List, Tuple
 import logging
 
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.phm_schema import create_measurement_schema
+from backend.phm_manifest import ImportManifest, ACTION_SKIP
+from backend.phm_feature_store import PHMFeatureStore
+from backend.phm_csv import read_phm_csv
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
 class PHMDataImporter:
-    def __init__(self, db_path: str, data_dir: str):
+    def __init__(self, db_path: str, data_dir: str, compute_features: bool = True):
         self.db_path = db_path
         self.data_dir = Path(data_dir)
+        self.compute_features = compute_features
         self.conn = None
+        self.manifest = None
+        # file_ids whose measurements changed during this run
+        self.affected_file_ids = []
 
     def create_database_schema(self):
         """Create database tables for PHM data."""
         logger.info("Creating database schema...")
 
-        cursor = self.conn.cursor()
-
-        # Bearings table: stores metadata about each bearing
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS bearings (
-                bearing_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bearing_name TEXT UNIQUE NOT NULL,
-                condition_id INTEGER,
-                description TEXT
-            )
-        """)
-
-        # Files table: stores information about each CSV file
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS measurement_files (
-                file_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bearing_id INTEGER NOT NULL,
-                file_name TEXT NOT NULL,
-                file_number INTEGER,
-                record_count INTEGER,
-                FOREIGN KEY (bearing_id) REFERENCES bearings(bearing_id),
-                UNIQUE(bearing_id, file_name)
-            )
-        """)
-
-        # Measurements table: stores actual vibration data
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS measurements (
-                measurement_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_id INTEGER NOT NULL,
-                hour INTEGER NOT NULL,
-                minute INTEGER NOT NULL,
-                second INTEGER NOT NULL,
-                microsecond INTEGER NOT NULL,
-                horizontal_acceleration REAL NOT NULL,
-                vertical_acceleration REAL NOT NULL,
-                FOREIGN KEY (file_id) REFERENCES measurement_files(file_id)
-            )
-        """)
+        create_measurement_schema(self.conn)
 
-        # Create indexes for faster queries
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_measurements_file_id
-            ON measurements(file_id)
-        """)
+        self.manifest = ImportManifest(self.conn)
+        self.manifest.ensure_schema()
+        PHMFeatureStore.ensure_schema(self.conn)
 
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_measurements_time
-            ON measurements(hour, minute, second, microsecond)
-        """)
-
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_files_bearing_id
-            ON measurement_files(bearing_id)
-        """)
-
-        self.conn.commit()
         logger.info("Database schema created successfully")
 
     def insert_bearing(self, bearing_name: str, condition_id: int = None, description: str = None) -> int:
@@ -100,75 +63,97 @@ class PHMDataImporter:
             self.conn.commit()
             return cursor.lastrowid
         except sqlite3.IntegrityError:
-            # Bearing already exists, fetch its ID
+            # Bearing already exists, end the failed transaction and fetch its ID
+            self.conn.rollback()
             cursor.execute("SELECT bearing_id FROM bearings WHERE bearing_name = ?", (bearing_name,))
             return cursor.fetchone()[0]
 
     def insert_file(self, bearing_id: int, file_name: str, file_number: int, record_count: int) -> int:
-        """Insert a measurement file record and return its ID."""
+        """Insert or update a measurement file record and return its ID (caller commits)."""
         cursor = self.conn.cursor()
-        try:
-            cursor.execute("""
-                INSERT INTO measurement_files (bearing_id, file_name, file_number, record_count)
-                VALUES (?, ?, ?, ?)
-            """, (bearing_id, file_name, file_number, record_count))
-            self.conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            # File already exists, fetch its ID
+        cursor.execute("""
+            SELECT file_id FROM measurement_files
+            WHERE bearing_id = ? AND file_name = ?
+        """, (bearing_id, file_name))
+        row = cursor.fetchone()
+
+        if row is not None:
             cursor.execute("""
-                SELECT file_id FROM measurement_files
-                WHERE bearing_id = ? AND file_name = ?
-            """, (bearing_id, file_name))
-            return cursor.fetchone()[0]
+                UPDATE measurement_files SET file_number = ?, record_count = ?
+                WHERE file_id = ?
+            """, (file_number, record_count, row[0]))
+            return row[0]
+
+        cursor.execute("""
+            INSERT INTO measurement_files (bearing_id, file_name, file_number, record_count)
+            VALUES (?, ?, ?, ?)
+        """, (bearing_id, file_name, file_number, record_count))
+        return cursor.lastrowid
 
     def insert_measurements_batch(self, file_id: int, measurements: List[Tuple]):
-        """Insert a batch of measurements."""
+        """Insert a batch of measurements (caller commits)."""
         cursor = self.conn.cursor()
         cursor.executemany("""
             INSERT INTO measurements
             (file_id, hour, minute, second, microsecond, horizontal_acceleration, vertical_acceleration)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, measurements)
-        self.conn.commit()
 
-    def import_csv_file(self, bearing_id: int, csv_path: Path) -> int:
-        """Import a single CSV file."""
+    @staticmethod
+    def read_csv_rows(csv_path: Path) -> List[Tuple]:
+        """Parse a PHM CSV file into (hour, minute, second, microsecond, h_acc, v_acc) rows."""
+        data = read_phm_csv(csv_path)
+        # Time columns are truncated to int (microseconds may be in scientific notation)
+        time_columns = data[:, :4].astype(np.int64).tolist()
+        signals = data[:, 4:].tolist()
+        return [(*t, h_acc, v_acc) for t, (h_acc, v_acc) in zip(time_columns, signals)]
+
+    def import_csv_file(self, bearing_id: int, csv_path: Path, bearing_name: str = None) -> int:
+        """
+        Import a single CSV file unless the manifest shows it is unchanged.
+
+        The file row, its measurements and the manifest entry are written in
+        one transaction, and any measurements left by an earlier interrupted
+        import are replaced rather than duplicated.
+
+        Returns:
+            Number of records imported (0 when the file was skipped)
+        """
         file_name = csv_path.name
         file_number = int(file_name.replace('acc_', '').replace('.csv', ''))
+        bearing_name = bearing_name or csv_path.parent.name
 
-        # Read and prepare measurements
-        measurements = []
-        with open(csv_path, 'r') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if len(row) == 6:
-                    hour, minute, second, microsecond, h_acc, v_acc = row
-                    # Convert microsecond to int (handles both regular and scientific notation)
-                    microsecond_int = int(float(microsecond))
-                    measurements.append((
-                        file_id := 0,  # Will be set after file insertion
-                        int(hour), int(minute), int(second), microsecond_int,
-                        float(h_acc), float(v_acc)
-                    ))
-
-        record_count = len(measurements)
-
-        # Insert file record
-        file_id = self.insert_file(bearing_id, file_name, file_number, record_count)
-
-        # Update file_id in measurements
-        measurements = [
-            (file_id, hour, minute, second, microsecond, h_acc, v_acc)
-            for (_, hour, minute, second, microsecond, h_acc, v_acc) in measurements
-        ]
-
-        # Insert measurements in batches
-        batch_size = 1000
-        for i in range(0, len(measurements), batch_size):
-            batch = measurements[i:i + batch_size]
-            self.insert_measurements_batch(file_id, batch)
+        check = self.manifest.check(bearing_name, csv_path)
+        if check['action'] == ACTION_SKIP:
+            return 0
 
+        # 先記錄匯入中狀態，中斷後重新執行時會重新匯入此檔案
+        self.manifest.mark_importing(
+            bearing_name, file_name,
+            check['file_size'], check['file_mtime'], check['content_hash']
+        )
+        self.conn.commit()
+
+        rows = self.read_csv_rows(csv_path)
+        record_count = len(rows)
+
+        try:
+            file_id = self.insert_file(bearing_id, file_name, file_number, record_count)
+
+            # Remove measurements left by a previous (partial) import of this file
+            # and invalidate its stored features in the same transaction
+            self.conn.execute("DELETE FROM measurements WHERE file_id = ?", (file_id,))
+            self.conn.execute("DELETE FROM file_features WHERE file_id = ?", (file_id,))
+            self.insert_measurements_batch(file_id, [(file_id, *row) for row in rows])
+
+            self.manifest.mark_complete(bearing_name, file_name, file_id, record_count)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+        logger.debug(f"  Imported {file_name} ({check['reason']})")
+        self.affected_file_ids.append(file_id)
         return record_count
 
     def import_bearing_directory(self, bearing_dir: Path):
@@ -186,17 +171,23 @@ class PHMDataImporter:
         logger.info(f"Found {total_files} CSV files for {bearing_name}")
 
         total_records = 0
+        imported_files = 0
         for idx, csv_file in enumerate(csv_files, 1):
             try:
-                record_count = self.import_csv_file(bearing_id, csv_file)
+                record_count = self.import_csv_file(bearing_id, csv_file, bearing_name)
                 total_records += record_count
+                if record_count:
+                    imported_files += 1
 
                 if idx % 100 == 0 or idx == total_files:
                     logger.info(f"  Progress: {idx}/{total_files} files processed ({total_records} records)")
             except Exception as e:
                 logger.error(f"  Error processing {csv_file.name}: {e}")
 
-        logger.info(f"Completed {bearing_name}: {total_records} total records imported")
+        logger.info(
+            f"Completed {bearing_name}: {imported_files} files imported, "
+            f"{total_files - imported_files} unchanged, {total_records} total records imported"
+        )
 
     def import_all_data(self):
         """Import all data from Learning_set directory."""
@@ -218,6 +209,15 @@ class PHMDataImporter:
             for bearing_dir in bearing_dirs:
                 self.import_bearing_directory(bearing_dir)
 
+            # Recompute features only for files whose measurements changed,
+            # plus files left without features by an interrupted earlier run
+            if self.compute_features:
+                store = PHMFeatureStore(self.db_path)
+                stale_ids = sorted(set(self.affected_file_ids) | set(store.get_stale_file_ids()))
+                if stale_ids:
+                    logger.info(f"Recomputing features for {len(stale_ids)} files...")
+                    store.recompute_files(stale_ids)
+
             # Print summary statistics
             self.print_summary()
 
@@ -275,6 +275,11 @@ class PHMDataImporter:
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Import PHM Learning_set CSV files into SQLite")
+    parser.add_argument('--skip-features', action='store_true',
+                        help="do not recompute features for imported files")
+    args = parser.parse_args()
+
     # Configuration
     project_root = Path(__file__).parent.parent
     data_dir = project_root / "phm-ieee-2012-data-challenge-dataset" / "Learning_set"
@@ -289,7 +294,7 @@ def main():
     logger.info(f"Database path: {db_path}")
 
     # Create importer and run
-    importer = PHMDataImporter(str(db_path), str(data_dir))
+    importer = PHMDataImporter(str(db_path), str(data_dir), compute_features=not args.skip_features)
     importer.import_all_data()
 
 